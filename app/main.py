@@ -1,20 +1,31 @@
 import streamlit as st
+import asyncio
 import sys
 import os
 from dotenv import load_dotenv
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
-from parsing import extract_text_from_pdf, extract_text_from_docx, extract_text_from_txt
-from skills import extract_skills
 from llm_enhancer import enhance_resume_section
-from learning_resources import get_learning_resources
 from project_ideas import generate_project_ideas
-from fit_classifier import predict_fit
-# Keep import but don't use it unless explicitly requested
-from ner_skill_extractor import extract_skills_ner
+from ai_recommendations import generate_all
+from analysis_cache import (PARSERS, extract_document_skills, lookup_learning_resources, match_skills,
+                            parse_document, predict_document_fit, stage_stats)
+from llm_cache import llm_cache
+from parsing import get_parse_cache_stats
+from fit_classifier import get_classifier
+from ner_skill_extractor import load_nlp
+import tracing
+from request_profiler import start_profile
 
 load_dotenv()
 
+# Snapshot of the stage counters, so the debug panel can show what this rerun recomputed
+run_start_stats = stage_stats()
+
+# Opt-in profile of this run's analysis (PROFILING_ENABLED=1, or ?profile=1 for this run only);
+# stopped before the LLM recommendations, whose time is spent waiting on the API
+app_profile = start_profile('app_analysis', force=bool(st.query_params.get('profile')), replace=True)
+
 # Sidebar for instructions and info
 with st.sidebar:
     st.markdown('# 📋 How to Use')
@@ -74,19 +85,11 @@ st.markdown('''
 </div>
 ''', unsafe_allow_html=True)
 
-# Try to use NER if available, otherwise fall back to basic extraction
-try:
-    # Create a flag to indicate which method is being used
-    use_ner = True
-    # Try importing spaCy to see if it's available
-    import spacy
-    try:
-        # Check if model can be loaded
-        spacy.load("en_core_web_sm")
-    except:
-        use_ner = False
-except:
-    use_ner = False
+# Try to use NER if available, otherwise fall back to basic extraction.
+# load_nlp() is cached, so the probe reuses the model NER extraction runs with and
+# spaCy is only loaded once skills are first extracted
+def ner_available():
+    return load_nlp() is not None
 
 st.divider()
 
@@ -119,21 +122,16 @@ with col2:
 resume_text = None
 jd_text = None
 
+# Parsing is cached on the file bytes, so reruns with the same uploads skip it
 if resume_file:
-    if resume_file.type == 'application/pdf':
-        resume_text = extract_text_from_pdf(resume_file)
-    elif resume_file.type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-        resume_text = extract_text_from_docx(resume_file)
+    if resume_file.type in PARSERS and resume_file.type != 'text/plain':
+        resume_text = parse_document(resume_file.getvalue(), resume_file.type)
     else:
         st.warning('Unsupported resume file type.')
 
 if jd_file:
-    if jd_file.type == 'application/pdf':
-        jd_text = extract_text_from_pdf(jd_file)
-    elif jd_file.type == 'application/vnd.openxmlformats-officedocument.wordprocessingml.document':
-        jd_text = extract_text_from_docx(jd_file)
-    elif jd_file.type == 'text/plain':
-        jd_text = extract_text_from_txt(jd_file)
+    if jd_file.type in PARSERS:
+        jd_text = parse_document(jd_file.getvalue(), jd_file.type)
     else:
         st.warning('Unsupported Job Description file type.')
 
@@ -163,14 +161,9 @@ if resume_text or jd_text:
             
             # Skills extraction
             with st.spinner('🔍 Extracting skills from resume...'):
-                if use_ner:
-                    try:
-                        resume_skills = extract_skills_ner(resume_text)
-                    except Exception as e:
-                        st.warning(f"NER extraction failed, falling back to basic extraction: {str(e)}")
-                        resume_skills = extract_skills(resume_text)
-                else:
-                    resume_skills = extract_skills(resume_text)
+                resume_skills, ner_warning = extract_document_skills(resume_text, ner_available())
+                if ner_warning:
+                    st.warning(ner_warning)
             
             if resume_skills:
                 st.success(f'✅ Found {len(resume_skills)} skills in your resume')
@@ -204,14 +197,9 @@ if resume_text or jd_text:
             
             # Skills extraction
             with st.spinner('🔍 Extracting required skills...'):
-                if use_ner:
-                    try:
-                        jd_skills = extract_skills_ner(jd_text)
-                    except Exception as e:
-                        st.warning(f"NER extraction failed, falling back to basic extraction: {str(e)}")
-                        jd_skills = extract_skills(jd_text)
-                else:
-                    jd_skills = extract_skills(jd_text)
+                jd_skills, ner_warning = extract_document_skills(jd_text, ner_available())
+                if ner_warning:
+                    st.warning(ner_warning)
             
             if jd_skills:
                 st.success(f'✅ Found {len(jd_skills)} required skills')
@@ -230,10 +218,9 @@ if resume_text and jd_text and resume_skills and jd_skills:
     st.markdown('---')
     
     # Skill Match Analysis
-    matched_skills = set(resume_skills) & set(jd_skills)
-    missing_skills = set(jd_skills) - set(resume_skills)
-    extra_skills = set(resume_skills) - set(jd_skills)
-    match_score = len(matched_skills) / len(jd_skills) * 100 if jd_skills else 0
+    matched_skills, missing_skills, extra_skills, match_score = match_skills(
+        tuple(sorted(resume_skills)), tuple(sorted(jd_skills))
+    )
     
     st.markdown('## 📊 Skill Match Analysis')
     st.markdown('Comprehensive analysis of how well your skills align with job requirements.')
@@ -336,13 +323,7 @@ if resume_text and jd_text and resume_skills and jd_skills:
     
     with st.spinner(' Advanced AI is analyzing your profile...'):
         # Try advanced ML model first with full text
-        result = predict_fit(
-            resume_text=resume_text,
-            job_description=jd_text,
-            match_score=match_score,
-            num_matched=len(matched_skills),
-            num_missing=len(missing_skills)
-        )
+        result = predict_document_fit(resume_text, jd_text, match_score, len(matched_skills), len(missing_skills))
     
     # Extract prediction details
     prediction = result['prediction']
@@ -431,7 +412,7 @@ if resume_text and jd_text and resume_skills and jd_skills:
     # Learning Resources
     if missing_skills:
         st.subheader('📚 Skill Development Resources')
-        resources = get_learning_resources(missing_skills)
+        resources = lookup_learning_resources(tuple(sorted(missing_skills)))
         if resources:
             st.success(f'Found learning resources for {len(resources)} out of {len(missing_skills)} missing skills:')
             
@@ -448,6 +429,9 @@ if resume_text and jd_text and resume_skills and jd_skills:
         
         st.divider()
 
+    if app_profile:
+        app_profile.stop(resume_text=resume_text, job_description=jd_text)
+
     # AI-Powered Recommendations with improved layout
     st.markdown('##  AI-Powered Recommendations')
 
@@ -457,6 +441,20 @@ if resume_text and jd_text and resume_skills and jd_skills:
     if 'project_ideas' not in st.session_state:
         st.session_state.project_ideas = None
     
+    # Generate both recommendations concurrently; each one is shown as soon as it is ready
+    if st.button('⚡ Generate All Recommendations', use_container_width=True, key='generate_all'):
+        live_results = st.container()
+        result_labels = {'resume_improvements': 'AI Resume Suggestions', 'project_ideas': 'Personalized Project Suggestions'}
+        
+        def show_result(name, text, elapsed):
+            st.session_state[name] = text
+            with live_results.expander(f'✅ {result_labels[name]} ready in {elapsed:.1f}s', expanded=True):
+                st.markdown(text)
+        
+        with st.spinner(' Generating resume improvements and project ideas...'):
+            asyncio.run(generate_all(resume_text, jd_text, missing_skills, resume_skills, on_result=show_result))
+        st.rerun()
+    
     # Resume Enhancement Section
     st.markdown('### 📝 Resume Enhancement')
     st.markdown('Improve your resume with AI-powered suggestions tailored to the job requirements.')
@@ -510,3 +508,28 @@ if resume_text and jd_text and resume_skills and jd_skills:
             st.rerun()
 else:
     st.info('Upload both resume and Job Description files to see skill match analysis and improvement suggestions.')
+
+# Runs that did not reach the recommendations stop their profile here (stop() is idempotent)
+if app_profile:
+    app_profile.stop(resume_text=resume_text, job_description=jd_text)
+
+# Debug panel: open the app with ?debug=1 to see what each rerun recomputed
+if st.query_params.get('debug'):
+    with st.sidebar.expander('🛠️ Pipeline Cache Debug', expanded=True):
+        current_stats = stage_stats()
+        rows = [
+            f"| {stage} | {counts['hits'] - run_start_stats[stage]['hits']} "
+            f"| {counts['misses'] - run_start_stats[stage]['misses']} | {counts['hits']} | {counts['misses']} |"
+            for stage, counts in current_stats.items()
+        ]
+        st.markdown('**Stage caches** (this rerun / since server start)')
+        st.markdown('\n'.join(['| Stage | Hits | Misses | Total hits | Total misses |', '|---|---|---|---|---|', *rows]))
+        st.markdown('**Parse cache**')
+        st.json(get_parse_cache_stats())
+        st.markdown('**LLM response cache**')
+        st.json(llm_cache.stats())
+        st.markdown('**Document feature caches**')
+        st.json(get_classifier().feature_cache_stats())
+        if tracing.is_enabled():
+            st.markdown('**Stage tracing** (since server start)')
+            st.json(tracing.snapshot()['stages'])
@@ -0,0 +1,333 @@
+"""
+Benchmark suite for parsing, skill extraction, feature creation, prediction and learning resources
+
+Inputs are synthetic (benchmarks/synthetic.py) in several sizes, so runs are reproducible and
+offline. Every case reports a latency distribution, throughput and the peak Python heap
+(tracemalloc, measured in a separate untimed call); the run also records peak process RSS.
+
+Usage:
+    python benchmarks/run_benchmarks.py run [--quick] [--only REGEX] [--out FILE] [--save-baseline]
+    python benchmarks/run_benchmarks.py run --compare benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py compare BASELINE CURRENT [--threshold 0.2]
+
+compare exits with status 1 if any case's p50 latency or peak memory grew by more than the
+threshold (a fraction; 0.2 = 20%) relative to the baseline. run also exits with status 1 if a
+case's peak memory exceeds its absolute budget in MEMORY_BUDGETS_KB.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+sys.path.insert(0, str(BENCH_DIR))
+
+import synthetic
+from synthetic import SIZES
+
+RESULTS_DIR = BENCH_DIR / 'results'
+BASELINE_PATH = BENCH_DIR / 'baseline.json'
+REGRESSION_THRESHOLD = float(os.getenv('BENCH_REGRESSION_THRESHOLD', '0.2'))
+# Differences below this many milliseconds / KB are noise, whatever the ratio
+MIN_LATENCY_DELTA_MS = 0.05
+MIN_MEMORY_DELTA_KB = 64
+# Peak traced memory per call (KB) a case may not exceed, whatever the baseline. Sized for the
+# lean inference path (fit_classifier.LEAN_INFERENCE) and the NumPy tree evaluator with ~50% headroom.
+MEMORY_BUDGETS_KB = {
+    'create_text_features[medium]': 224,
+    'predict_advanced[small]': 136,
+    'predict_advanced[medium]': 160,
+    'predict_advanced[large]': 544,
+    'predict_advanced_batch[10x10]': 3584,
+}
+
+class Skip(Exception):
+    """Raised by a case's setup when its dependency is unavailable"""
+
+def _classifier(cached_sides=()):
+    from feature_cache import FEATURE_CACHE_MAX_BYTES
+    from fit_classifier import get_classifier
+
+    classifier = get_classifier()
+    if not classifier.is_loaded:
+        raise Skip('advanced ML model not loaded')
+    # Cases time featurization, so only the named sides may be served from the feature cache
+    for col_name, cache in classifier.feature_caches.items():
+        cache.clear()
+        cache.max_bytes = FEATURE_CACHE_MAX_BYTES if col_name in cached_sides else 0
+    return classifier
+
+def _xgboost_model():
+    classifier = _classifier()
+    if classifier.model is None:
+        raise Skip('XGBoost model not loaded (FIT_TREE_EVALUATOR=only)')
+    return classifier.model
+
+def _compiled_trees():
+    classifier = _classifier()
+    if classifier.trees is None:
+        raise Skip('NumPy tree evaluator disabled')
+    return classifier.trees
+
+def _feature_row(size='medium'):
+    return _classifier()._create_sparse_features(synthetic.resume_text(size), synthetic.job_text(size))
+
+def _ner():
+    # Check for the model first: load_nlp() reports a missing model with st.warning, which
+    # logs Streamlit bare-mode warnings outside `streamlit run`
+    import importlib.util
+    if importlib.util.find_spec('spacy') is None or importlib.util.find_spec('en_core_web_sm') is None:
+        raise Skip('spaCy model en_core_web_sm not installed')
+    from ner_skill_extractor import extract_skills_ner
+
+    return extract_skills_ner
+
+def _cases():
+    """
+    Yield (name, setup, items) for every case; setup() returns the callable to time and
+    items is the number of documents or pairs one call processes
+    """
+    from parsing import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+    from skills import extract_skills
+
+    for size in SIZES:
+        yield f'parse_pdf[{size}]', lambda size=size: (
+            lambda data=synthetic.resume_pdf(size): extract_text_from_pdf(data, use_cache=False)), 1
+    for size in SIZES:
+        yield f'parse_docx[{size}]', lambda size=size: (
+            lambda data=synthetic.resume_docx(size): extract_text_from_docx(data, use_cache=False)), 1
+    yield 'parse_txt[large]', lambda: (
+        lambda data=synthetic.resume_text('large').encode('utf-8'): extract_text_from_txt(data, use_cache=False)), 1
+
+    for size in SIZES:
+        yield f'extract_skills[{size}]', lambda size=size: (
+            lambda text=synthetic.resume_text(size): extract_skills(text)), 1
+    for size in SIZES:
+        yield f'extract_skills_ner[{size}]', lambda size=size: (
+            lambda extract=_ner(), text=synthetic.resume_text(size): extract(text)), 1
+
+    yield 'create_text_features[medium]', lambda: (
+        lambda classifier=_classifier(), resume=synthetic.resume_text('medium'), job=synthetic.job_text('medium'):
+        classifier._create_text_features(resume, job)), 1
+    for size in SIZES:
+        yield f'predict_advanced[{size}]', lambda size=size: (
+            lambda classifier=_classifier(), resume=synthetic.resume_text(size), job=synthetic.job_text(size):
+            classifier.predict_advanced(resume, job)), 1
+    # A new resume against a job description already in the feature cache
+    yield 'predict_known_jd[medium]', lambda: (
+        lambda classifier=_classifier(cached_sides=('job_description_text',)),
+               resume=synthetic.resume_text('medium'), job=synthetic.job_text('medium'):
+        classifier.predict_advanced(resume, job)), 1
+    # The model call alone on one prebuilt feature row: XGBoost against the NumPy tree evaluator
+    yield 'predict_proba_xgboost[1]', lambda: (
+        lambda model=_xgboost_model(), X=_feature_row(): model.predict_proba(X)), 1
+    yield 'predict_proba_numpy[1]', lambda: (
+        lambda trees=_compiled_trees(), X=_feature_row(): trees.predict_proba(X)), 1
+    yield 'predict_advanced_batch[10x10]', lambda: (
+        lambda classifier=_classifier(),
+               resumes=[synthetic.resume_text('medium', seed) for seed in range(10)],
+               jobs=[synthetic.job_text('medium', seed) for seed in range(10)]:
+        classifier.predict_advanced_batch(resumes, jobs, cross_product=True)), 100
+
+    from learning_resources import SKILL_RESOURCES, get_learning_resources
+    skills = list(SKILL_RESOURCES)[:10] + ['Unknown Skill', 'k8s']
+    yield 'get_learning_resources[12]', lambda: (lambda: get_learning_resources(skills)), len(skills)
+
+def _percentiles(samples):
+    samples_ms = np.array(samples) * 1000
+    return {
+        'min_ms': float(samples_ms.min()),
+        'mean_ms': float(samples_ms.mean()),
+        'p50_ms': float(np.percentile(samples_ms, 50)),
+        'p90_ms': float(np.percentile(samples_ms, 90)),
+        'p99_ms': float(np.percentile(samples_ms, 99)),
+        'max_ms': float(samples_ms.max()),
+    }
+
+def measure(func, items=1, repeats=30, warmup=3, max_seconds=5.0):
+    """
+    Time func() `repeats` times after `warmup` calls (fewer if max_seconds runs out), then
+    measure its peak Python heap in one extra call under tracemalloc
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    budget_end = time.perf_counter() + max_seconds
+    while len(samples) < repeats and (len(samples) < 3 or time.perf_counter() < budget_end):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    stats = _percentiles(samples)
+    stats.update({
+        'repeats': len(samples),
+        'items_per_call': items,
+        'throughput_per_s': items / (stats['mean_ms'] / 1000) if stats['mean_ms'] else 0.0,
+        'peak_traced_kb': peak / 1024,
+    })
+    return stats
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+def _max_rss_mb():
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+def run(only=None, quick=False):
+    """
+    Run every case (or those matching the `only` regex)
+
+    Returns:
+        dict: {'meta': {...}, 'results': {case: stats or {'skipped': reason}}}
+    """
+    import xgboost
+
+    repeats, warmup, max_seconds = (5, 1, 1.0) if quick else (30, 3, 5.0)
+    results = {}
+    for name, setup, items in _cases():
+        if only and not re.search(only, name):
+            continue
+        try:
+            func = setup()
+        except Skip as e:
+            results[name] = {'skipped': str(e)}
+            print(f"  {name:<32} skipped: {e}")
+            continue
+        results[name] = stats = measure(func, items, repeats, warmup, max_seconds)
+        print(f"  {name:<32} p50 {stats['p50_ms']:9.3f} ms  p99 {stats['p99_ms']:9.3f} ms  "
+              f"{stats['throughput_per_s']:10.1f}/s  peak {stats['peak_traced_kb']:9.0f} KB")
+
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'git_commit': _git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'numpy': np.__version__,
+            'xgboost': xgboost.__version__,
+            'quick': quick,
+            'max_rss_mb': _max_rss_mb(),
+        },
+        'results': results,
+    }
+
+def compare(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare two result dicts case by case
+
+    Returns:
+        list: One dict per case present in both with metric, baseline, current, change and status
+            ('regression', 'improvement' or 'ok')
+    """
+    rows = []
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if before is None or 'skipped' in before or 'skipped' in now:
+            continue
+        for metric, min_delta in (('p50_ms', MIN_LATENCY_DELTA_MS), ('peak_traced_kb', MIN_MEMORY_DELTA_KB)):
+            old, new = before[metric], now[metric]
+            change = (new - old) / old if old else 0.0
+            status = 'ok'
+            if abs(new - old) >= min_delta:
+                if change > threshold:
+                    status = 'regression'
+                elif change < -threshold:
+                    status = 'improvement'
+            rows.append({'case': name, 'metric': metric, 'baseline': old, 'current': new,
+                         'change': change, 'status': status})
+    return rows
+
+def check_budgets(results, budgets=MEMORY_BUDGETS_KB):
+    """Return (case, peak_kb, budget_kb) for every measured case over its memory budget"""
+    return [(name, stats['peak_traced_kb'], budgets[name]) for name, stats in results['results'].items()
+            if name in budgets and 'skipped' not in stats and stats['peak_traced_kb'] > budgets[name]]
+
+def _print_comparison(rows, threshold):
+    for row in rows:
+        if row['status'] == 'ok':
+            continue
+        marker = '❌' if row['status'] == 'regression' else '✅'
+        print(f"{marker} {row['case']:<32} {row['metric']:<15} {row['baseline']:10.3f} -> {row['current']:10.3f} "
+              f"({row['change']:+.0%})")
+    regressions = [row for row in rows if row['status'] == 'regression']
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {threshold:.0%}")
+    else:
+        print(f"No regressions beyond {threshold:.0%} ({len(rows)} metrics compared)")
+    return regressions
+
+def _load(path):
+    return json.loads(Path(path).read_text())
+
+def main():
+    parser = argparse.ArgumentParser(description='Run or compare benchmarks')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument('--only', default=None, help='Regex selecting case names')
+    run_parser.add_argument('--quick', action='store_true', help='Fewer repeats, for smoke runs')
+    run_parser.add_argument('--out', type=Path, default=None, help='Results file (default: benchmarks/results/)')
+    run_parser.add_argument('--save-baseline', action='store_true', help=f'Also write {BASELINE_PATH.name}')
+    run_parser.add_argument('--compare', type=Path, default=None, metavar='BASELINE',
+                            help='Compare against a baseline after running')
+    run_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('baseline', type=Path)
+    compare_parser.add_argument('current', type=Path)
+    compare_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    args = parser.parse_args()
+
+    # Model loading and fallback warnings would interleave with the table
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings('ignore')
+
+    if args.command == 'compare':
+        regressions = _print_comparison(compare(_load(args.baseline), _load(args.current), args.threshold),
+                                        args.threshold)
+        sys.exit(1 if regressions else 0)
+
+    print('Running benchmarks' + (' (quick)' if args.quick else ''))
+    report = run(args.only, args.quick)
+    out = args.out or RESULTS_DIR / f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Peak RSS {report['meta']['max_rss_mb']:.0f} MB; results written to {out}")
+    if args.save_baseline:
+        BASELINE_PATH.write_text(json.dumps(report, indent=2))
+        print(f"Baseline written to {BASELINE_PATH}")
+
+    over_budget = check_budgets(report)
+    for name, peak, budget in over_budget:
+        print(f"❌ {name:<32} peak {peak:.0f} KB exceeds its {budget} KB memory budget")
+    regressions = []
+    if args.compare:
+        regressions = _print_comparison(compare(_load(args.compare), report, args.threshold), args.threshold)
+    sys.exit(1 if regressions or over_budget else 0)
+
+if __name__ == '__main__':
+    main()
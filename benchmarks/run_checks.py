@@ -0,0 +1,397 @@
+"""
+Correctness checks for the optimized paths
+
+Each check runs an optimized path and a slower reference side by side on synthetic inputs
+(benchmarks/synthetic.py), so it is offline and reproducible. A check raises AssertionError
+on a mismatch and otherwise returns the lines of its report.
+
+Usage:
+    python benchmarks/run_checks.py [--only REGEX] [--list]
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import logging
+import re
+import sys
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+BENCH_DIR = Path(__file__).parent
+sys.path.insert(0, str(BENCH_DIR.parent / 'src'))
+sys.path.insert(0, str(BENCH_DIR))
+
+import synthetic
+from run_benchmarks import Skip, _classifier
+
+CHECKS = {}
+
+def check(name):
+    """Register a check function under name"""
+    def register(func):
+        CHECKS[name] = func
+        return func
+    return register
+
+def _synthetic_pairs(n_pairs):
+    """Synthetic resume/job pairs of mixed sizes, plus empty and one-word documents"""
+    sizes = list(synthetic.SIZES)
+    pairs = [(synthetic.resume_text(sizes[i % len(sizes)], i),
+              synthetic.job_text(sizes[(i // len(sizes)) % len(sizes)], i)) for i in range(n_pairs)]
+    return pairs + [('', pairs[0][1]), (pairs[0][0], ''), ('Python', 'SQL')]
+
+@check('sparse_features')
+def check_sparse_features(n_pairs=260):
+    """
+    Sparse feature path against the dense fallback
+
+    _create_sparse_features and _create_text_features are compared in lean and full mode under
+    the same predictor, then predict_advanced end to end with the sparse path on and off.
+    """
+    import scipy.sparse as sp
+    from tree_evaluator import TOLERANCE
+
+    classifier = _classifier()
+    if not classifier.sparse_ready:
+        raise Skip('no sparse feature path')
+    predict_proba = classifier.model.predict_proba if classifier.model is not None else classifier.trees.predict_proba
+    pairs = _synthetic_pairs(n_pairs)
+
+    lines = []
+    worst = 0.0
+    label_changes = 0
+    lean = classifier.lean
+    try:
+        for mode in (True, False):
+            classifier.lean = mode
+            dense = np.vstack([np.asarray(classifier._create_text_features(resume, job), dtype=np.float64)
+                               for resume, job in pairs])
+            sparse = sp.vstack([classifier._create_sparse_features(resume, job) for resume, job in pairs]).tocsr()
+            feature_diff = np.abs(sparse.toarray() - dense).max()
+            dense_proba, sparse_proba = predict_proba(dense), predict_proba(sparse)
+            proba_diff = np.abs(sparse_proba - dense_proba).max()
+            changed = int((sparse_proba.argmax(axis=1) != dense_proba.argmax(axis=1)).sum())
+            worst = max(worst, proba_diff)
+            label_changes += changed
+            lines.append(f"{('lean' if mode else 'full') + ' features':<16} {len(pairs):5d} pairs  "
+                         f"max |feature diff| {feature_diff:.2e}  max |proba diff| {proba_diff:.2e}  "
+                         f"label changes {changed}")
+
+        # End to end, where single rows may be scored by the NumPy evaluator on one path only
+        classifier.lean = lean
+        results = {}
+        for sparse_ready in (True, False):
+            classifier.sparse_ready = sparse_ready
+            results[sparse_ready] = [classifier.predict_advanced(resume, job) for resume, job in pairs]
+        proba_diff = max(abs(sparse['probabilities'][name] - dense['probabilities'][name])
+                         for sparse, dense in zip(results[True], results[False]) for name in sparse['probabilities'])
+        changed = sum(sparse['prediction'] != dense['prediction'] for sparse, dense in zip(results[True], results[False]))
+        worst = max(worst, proba_diff)
+        label_changes += changed
+        lines.append(f"{'predict_advanced':<16} {len(pairs):5d} pairs  max |proba diff| {proba_diff:.2e}  "
+                     f"label changes {changed}")
+    finally:
+        classifier.lean = lean
+        classifier.sparse_ready = True
+
+    if worst > TOLERANCE or label_changes:
+        raise AssertionError(f"sparse path differs: proba by up to {worst:.2e} (tolerance {TOLERANCE:.0e}), "
+                             f"{label_changes} label changes")
+    return lines
+
+def _pandas_statistics(raw_texts, processed_texts):
+    """The training-time pandas implementation text_features has to reproduce"""
+    import pandas as pd
+
+    raw, processed = pd.Series(list(raw_texts), dtype=object), pd.Series(list(processed_texts), dtype=object)
+    stats = pd.DataFrame({
+        'length': raw.str.len().fillna(0),
+        'word_count': processed.str.split().str.len().fillna(0),
+        'unique_words': processed.apply(lambda x: len(set(str(x).split())) if pd.notna(x) else 0),
+        'avg_word_length': processed.apply(
+            lambda x: np.mean([len(word) for word in str(x).split()]) if pd.notna(x) and str(x).strip() else 0
+        ),
+        'sentence_count': raw.str.count(r'[.!?]').fillna(0),
+        'capital_ratio': raw.apply(
+            lambda x: sum(1 for c in str(x) if c.isupper()) / len(str(x)) if pd.notna(x) and len(str(x)) > 0 else 0
+        ),
+    })
+    return stats.fillna(0).to_numpy(dtype=np.float64)
+
+@check('text_statistics')
+def check_text_statistics(n_docs=300):
+    """
+    text_statistics_batch against the original pandas implementation
+
+    Every column has to be bitwise identical, on synthetic documents plus edge cases (empty,
+    whitespace, None, NaN, punctuation-only and non-ASCII), for preprocessed text and for raw
+    text in the processed column (production_predictor passes whatever that column holds).
+    """
+    import time
+    from fit_classifier import preprocess_text
+    from text_features import STAT_SUFFIXES, text_statistics_batch
+
+    sizes = list(synthetic.SIZES)
+    raw = [(synthetic.resume_text if i % 2 else synthetic.job_text)(sizes[i % len(sizes)], i) for i in range(n_docs)]
+    raw += ['', '   ', None, float('nan'), '...', 'Hello. World! Really?', 'ALL CAPS RESUME',
+            'tab\tseparated\nlines  and   spaces', 'Ünïcödé ÅBC straße İstanbul ΣΊΣΥΦΟΣ', 'naïve café — résumé №5']
+    inputs = {'preprocessed': [preprocess_text(text) for text in raw], 'raw as processed': raw}
+
+    _pandas_statistics(raw[:1], raw[:1])  # Import pandas outside the timing
+    lines, mismatches = [], []
+    for name, processed in inputs.items():
+        start = time.perf_counter()
+        actual = text_statistics_batch(raw, processed)
+        batch_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        expected = _pandas_statistics(raw, processed)
+        pandas_ms = (time.perf_counter() - start) * 1000
+
+        mismatched = [STAT_SUFFIXES[k] for k in range(len(STAT_SUFFIXES))
+                      if not np.array_equal(actual[:, k], expected[:, k])]
+        mismatches += [f"{suffix} ({name})" for suffix in mismatched]
+        lines.append(f"{name:<17} {len(raw):5d} docs  max |diff| {np.abs(actual - expected).max():.2e}  "
+                     f"batch {batch_ms:.1f} ms, pandas {pandas_ms:.1f} ms")
+
+    if mismatches:
+        raise AssertionError(f"statistics differ from the pandas implementation: {', '.join(mismatches)}")
+    return lines
+
+@check('minhash_jaccard')
+def check_minhash_jaccard(n_words=200, n_trials=20):
+    """
+    MinHash similarity estimates against exact shingle Jaccard
+
+    Pairs of documents are overlapping windows of a random word sequence, so their exact
+    Jaccard similarity sweeps from 1 down to 0. With 128 permutations the estimate's standard
+    deviation is at most 0.044; every estimate has to be within 0.2 (4.5 sigma) and the mean
+    error below 0.03. dedup_groups must merge exactly the pairs whose estimate reaches the threshold.
+    """
+    from jd_dedup import DEDUP_THRESHOLD, MinHasher, dedup_groups
+
+    hasher = MinHasher()
+    rng = np.random.default_rng(0)
+    letters = np.array(list('abcdefghijklmnopqrstuvwxyz'))
+    lines, errors = [], []
+    for offset in (0, 5, 10, 20, 40, 60, 100, 150, 190, n_words):
+        exact, estimated, merged = [], [], []
+        for _ in range(n_trials):
+            words = [''.join(rng.choice(letters, 6)) for _ in range(n_words + offset)]
+            first, second = ' '.join(words[:n_words]), ' '.join(words[offset:offset + n_words])
+            first_shingles, second_shingles = set(hasher.shingles(first).tolist()), set(hasher.shingles(second).tolist())
+            exact.append(len(first_shingles & second_shingles) / len(first_shingles | second_shingles))
+            estimated.append(float((hasher.signature(first) == hasher.signature(second)).mean()))
+            merged.append(dedup_groups([first, second])[1] == 0)
+        error = np.abs(np.array(estimated) - np.array(exact))
+        errors.extend(error)
+        # LSH may miss a pair above the threshold, but must never merge one below it
+        wrongly_merged = sum(m and e < DEDUP_THRESHOLD for m, e in zip(merged, estimated))
+        if error.max() > 0.2 or wrongly_merged:
+            raise AssertionError(f"offset {offset}: exact Jaccard {np.mean(exact):.3f}, estimate off by up to "
+                                 f"{error.max():.3f}, {wrongly_merged} pairs below the threshold merged")
+        lines.append(f"exact J {np.mean(exact):.3f}  mean estimate {np.mean(estimated):.3f}  "
+                     f"max |error| {error.max():.3f}  merged {sum(merged)}/{n_trials}")
+
+    if np.mean(errors) >= 0.03:
+        raise AssertionError(f"mean estimate error {np.mean(errors):.3f} is not below 0.03")
+    return lines
+
+@check('job_index')
+def check_job_index(n_jobs=300, n_queries=5, k=40):
+    """
+    JobIndex retrieval with and without model priors
+
+    Candidates of an index built with_prior=False (--no-prior), before and after a save/load
+    round trip, have to be the exhaustive cosine top k. A prior index with prior_share=0 has to
+    return the same candidates, and with the default share it has to include the prior top jobs.
+    """
+    import tempfile
+    from job_index import PRIOR_SHARE, JobIndex, _synthetic_corpus
+
+    classifier = _classifier()
+    jobs, resumes = _synthetic_corpus(classifier, n_jobs, n_queries)
+    cosine_only = JobIndex.build(jobs, classifier=classifier, with_prior=False)
+    with_prior = JobIndex.build(jobs, classifier=classifier)
+    with tempfile.TemporaryDirectory() as tmp:
+        cosine_only.save(tmp)
+        indexes = {'no prior': cosine_only, 'no prior, loaded': JobIndex.load(tmp)}
+
+        n_hits = 0
+        for resume in resumes:
+            scores = cosine_only.similarities(resume, classifier)
+            # Compared as score values, so ties at the k-th place may resolve either way
+            expected = np.sort(scores)[::-1][:k]
+            for name, index in indexes.items():
+                positions, _ = index.retrieve(resume, k, classifier)
+                if not np.array_equal(np.sort(scores[positions])[::-1], expected):
+                    raise AssertionError(f"{name}: candidates are not the cosine top {k}")
+                n_hits += len(index.search(resume, k, 5, classifier))
+            positions, _ = with_prior.retrieve(resume, k, classifier, prior_share=0.0)
+            if not np.array_equal(np.sort(scores[positions])[::-1], expected):
+                raise AssertionError(f"prior index with prior_share=0: candidates are not the cosine top {k}")
+            positions, _ = with_prior.retrieve(resume, k, classifier)
+            n_prior = int(round(k * PRIOR_SHARE))
+            if not set(with_prior.prior_order[:n_prior].tolist()) <= set(positions.tolist()):
+                raise AssertionError("prior index: prior top jobs missing from the candidates")
+
+    return [f"{n_jobs} jobs, {n_queries} queries, k={k}: cosine-only retrieval matches the exhaustive top k, "
+            f"{n_hits} search results"]
+
+class _FakeLLM:
+    """Offline stand-in for the LangChain OpenAI client: numbered responses, counted calls"""
+
+    def __init__(self, model_name='fake-model', temperature=0.3):
+        self.model_name = model_name
+        self.temperature = temperature
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        return f"response {self.calls}"
+
+    async def ainvoke(self, prompt):
+        return self(prompt)
+
+# Prints the cache key of a request whose skills come from a set, for key stability across processes
+_KEY_SCRIPT = """
+import sys
+sys.path.insert(0, sys.argv[1])
+from llm_cache import _request_key, llm_cache
+from llm_enhancer import _build_request
+prompt, inputs = _build_request('resume', 'job', {'python', 'sql', 'docker', 'aws', 'react', 'go', 'rust'})
+print(_request_key(llm_cache, type('LLM', (), {'model_name': 'm', 'temperature': 0.3})(), prompt, prompt.format(**inputs)))
+"""
+
+@check('llm_cache')
+def check_llm_cache():
+    """
+    LLM response cache with a fake client: memory and SQLite hits, skill-order key stability,
+    bypass and TTL expiry, through enhance_resume_section and generate_project_ideas
+    """
+    import asyncio
+    import os
+    import subprocess
+    import tempfile
+    import types
+    import llm_cache
+    from llm_cache import LLMResponseCache, acached_completion
+    from llm_enhancer import _build_request, enhance_resume_section
+    from project_ideas import generate_project_ideas
+
+    def expect(condition, message):
+        if not condition:
+            raise AssertionError(message)
+
+    resume, job = synthetic.resume_text('small'), synthetic.job_text('small')
+    skills = ['python', 'sql', 'docker', 'aws']
+    process_cache, real_time = llm_cache.llm_cache, llm_cache.time
+    clock = [1_000_000.0]
+    lines = []
+    try:
+        # A controllable clock for TTL expiry; the entry points use the process-wide cache
+        llm_cache.time = types.SimpleNamespace(time=lambda: clock[0])
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'llm_cache.sqlite')
+            cache = llm_cache.llm_cache = LLMResponseCache(ttl_seconds=3600, db_path=db_path)
+            llm = _FakeLLM()
+
+            first = enhance_resume_section(resume, job, set(skills), llm=llm)
+            expect(first == 'response 1', f"unexpected first response {first!r}")
+            # Same skills in another order, as a list and as a differently built set: memory hits
+            for variant in (list(reversed(skills)), set(reversed(skills)), skills + skills[:2]):
+                expect(enhance_resume_section(resume, job, variant, llm=llm) == first, "skill order changed the key")
+            expect(llm.calls == 1 and cache.hits == 3, f"expected 3 memory hits, got {cache.stats()}")
+            ideas = generate_project_ideas(resume, set(skills), llm=llm)
+            expect(generate_project_ideas(resume, list(reversed(skills)), llm=llm) == ideas, "project ideas missed")
+            expect(llm.calls == 2, "project ideas were generated twice")
+            lines.append(f"memory: {cache.hits} hits for {llm.calls} LLM calls, independent of skill order")
+
+            # A new process-wide cache on the same file: served from SQLite, then from memory
+            cache = llm_cache.llm_cache = LLMResponseCache(ttl_seconds=3600, db_path=db_path)
+            expect(enhance_resume_section(resume, job, skills, llm=llm) == first, "SQLite tier missed")
+            expect(asyncio.run(acached_completion(llm, *_build_request(resume, job, skills))) == first,
+                   "async path missed")
+            expect(llm.calls == 2 and cache.hits == 2, f"expected 2 hits from SQLite, got {cache.stats()}")
+            lines.append("sqlite: a fresh cache on the same file serves earlier responses (sync and async)")
+
+            # Bypass, per call and through LLM_CACHE_DISABLED: always calls the LLM, stores nothing new
+            bypassed = enhance_resume_section(resume, job, skills, use_cache=False, llm=llm)
+            os.environ['LLM_CACHE_DISABLED'] = '1'
+            try:
+                disabled = enhance_resume_section(resume, job, skills, llm=llm)
+            finally:
+                del os.environ['LLM_CACHE_DISABLED']
+            expect((bypassed, disabled) == ('response 3', 'response 4') and cache.bypassed == 2,
+                   f"bypass did not call the LLM: {bypassed!r}, {disabled!r}, {cache.stats()}")
+            expect(enhance_resume_section(resume, job, skills, llm=llm) == first, "bypass overwrote the entry")
+            lines.append("bypass: use_cache=False and LLM_CACHE_DISABLED call the LLM and keep the cached entry")
+
+            # Past the TTL both tiers expire: the memory entry and the SQLite row are dropped
+            clock[0] += 3601
+            expect(enhance_resume_section(resume, job, skills, llm=llm) == 'response 5', "expired entry served")
+            cache = llm_cache.llm_cache = LLMResponseCache(ttl_seconds=3600, db_path=db_path)
+            expect(enhance_resume_section(resume, job, skills, llm=llm) == 'response 5', "refreshed entry missed")
+            clock[0] += 3601
+            cache = llm_cache.llm_cache = LLMResponseCache(ttl_seconds=3600, db_path=db_path)
+            expect(enhance_resume_section(resume, job, skills, llm=llm) == 'response 6', "expired SQLite row served")
+            lines.append("ttl: expired entries are regenerated in memory and in SQLite")
+    finally:
+        llm_cache.llm_cache, llm_cache.time = process_cache, real_time
+
+    # Sets iterate in hash-seed order; the key must not depend on it
+    src_dir = str(BENCH_DIR.parent / 'src')
+    keys = {subprocess.run([sys.executable, '-c', _KEY_SCRIPT, src_dir], capture_output=True, text=True, check=True,
+                           env={**os.environ, 'PYTHONHASHSEED': str(seed)}).stdout.strip() for seed in range(1, 5)}
+    expect(len(keys) == 1, f"cache key differs across PYTHONHASHSEED values: {sorted(keys)}")
+    lines.append("key: identical across 4 PYTHONHASHSEED values for a set of skills")
+    return lines
+
+def run(only=None):
+    """Run the selected checks, printing each report; returns the names of the failed checks"""
+    failed = []
+    for name, func in CHECKS.items():
+        if only and not re.search(only, name):
+            continue
+        try:
+            lines = func()
+        except Skip as e:
+            print(f"⏭️  {name}: skipped ({e})")
+            continue
+        except AssertionError as e:
+            print(f"❌ {name}: {e}")
+            failed.append(name)
+            continue
+        except Exception as e:
+            # A crash in the code under check is a failure too, not the end of the run
+            print(f"❌ {name}: {type(e).__name__}: {e}")
+            failed.append(name)
+            continue
+        print(f"✅ {name}")
+        for line in lines:
+            print(f"     {line}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(description='Run correctness checks for the optimized paths')
+    parser.add_argument('--only', default=None, help='Regex selecting check names')
+    parser.add_argument('--list', action='store_true', help='List the checks and exit')
+    args = parser.parse_args()
+
+    if args.list:
+        for name, func in CHECKS.items():
+            print(f"{name:<20} {func.__doc__.strip().splitlines()[0]}")
+        return
+
+    # Model loading and fallback warnings would interleave with the reports
+    logging.basicConfig(level=logging.ERROR)
+    warnings.filterwarnings('ignore')
+
+    failed = run(args.only)
+    if failed:
+        print(f"{len(failed)} check(s) failed: {', '.join(failed)}")
+    sys.exit(1 if failed else 0)
+
+if __name__ == '__main__':
+    main()
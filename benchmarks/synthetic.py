@@ -0,0 +1,110 @@
+"""
+Deterministic synthetic resumes, job descriptions and documents for the benchmark suite
+
+Everything is generated from a seed, so runs are reproducible and need no network or data files.
+Skills are drawn from skills.COMMON_SKILLS so extraction and matching do real work.
+"""
+import io
+import random
+
+from skills import COMMON_SKILLS
+
+SIZES = {
+    # name: (resume words, job description words, PDF pages)
+    'small': (200, 120, 1),
+    'medium': (800, 400, 5),
+    'large': (3000, 1200, 20),
+}
+
+_VERBS = ['built', 'designed', 'led', 'improved', 'migrated', 'automated', 'deployed', 'optimized',
+          'maintained', 'shipped', 'mentored', 'analyzed', 'reduced', 'scaled', 'launched']
+_NOUNS = ['pipeline', 'service', 'dashboard', 'platform', 'model', 'api', 'workflow', 'database',
+          'infrastructure', 'feature', 'report', 'integration', 'release process', 'test suite']
+_FILLER = ['team', 'customers', 'latency', 'costs', 'quality', 'stakeholders', 'requirements',
+           'production', 'reliability', 'revenue', 'users', 'data', 'the business', 'on time']
+_COMPANIES = ['Acme Corp', 'Globex', 'Initech', 'Umbrella Labs', 'Stark Industries', 'Hooli', 'Wayne Tech']
+_JD_LINES = ['Responsibilities', 'Requirements', 'Nice to have', 'About the team', 'Benefits']
+
+def _sentence(rng, skill_share=0.3):
+    words = [rng.choice(_VERBS), 'a', rng.choice(_NOUNS), 'using']
+    words += rng.sample(COMMON_SKILLS, 2)
+    words += ['to', 'improve', rng.choice(_FILLER)]
+    if rng.random() < skill_share:
+        words += ['with', rng.choice(COMMON_SKILLS)]
+    return ' '.join(words).capitalize() + '.'
+
+def _words(lines):
+    return sum(len(line.split()) for line in lines)
+
+def resume_lines(n_words, seed=0):
+    """Lines of a resume with roughly n_words words"""
+    rng = random.Random(seed)
+    lines = [f'Candidate {seed}', 'Summary', _sentence(rng), 'Skills',
+             ', '.join(rng.sample(COMMON_SKILLS, min(12, len(COMMON_SKILLS))))]
+    while _words(lines) < n_words:
+        lines.append(f'{rng.choice(_COMPANIES)} - {rng.choice(["Engineer", "Analyst", "Developer", "Lead"])}')
+        lines.extend(f'- {_sentence(rng)}' for _ in range(rng.randint(3, 6)))
+    lines += ['Education', 'B.Sc. Computer Science']
+    return lines
+
+def job_lines(n_words, seed=0):
+    """Lines of a job description with roughly n_words words"""
+    rng = random.Random(seed + 10_000)
+    lines = [f'{rng.choice(["Senior", "Junior", "Staff", ""])} {rng.choice(["Data", "Backend", "ML", "Platform"])} '
+             f'Engineer at {rng.choice(_COMPANIES)}'.strip()]
+    while _words(lines) < n_words:
+        lines.append(rng.choice(_JD_LINES))
+        lines.extend(f'- {_sentence(rng, 0.6)}' for _ in range(rng.randint(3, 6)))
+    return lines
+
+def resume_text(size='medium', seed=0):
+    return '\n'.join(resume_lines(SIZES[size][0], seed))
+
+def job_text(size='medium', seed=0):
+    return '\n'.join(job_lines(SIZES[size][1], seed))
+
+def make_pdf(pages):
+    """
+    Minimal text PDF (Helvetica, one content stream per page) from a list of pages of lines,
+    written by hand so the suite needs no PDF-writing dependency
+    """
+    objects = [b'<< /Type /Catalog /Pages 2 0 R >>', None,
+               b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        kids.append(f'{page_id} 0 R')
+        escaped = (line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)') for line in lines)
+        stream = ('BT /F1 10 Tf 50 780 Td 12 TL ' + ' '.join(f"({line}) '" for line in escaped) + ' ET').encode('latin-1')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>'.encode())
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(pages)} >>'.encode()
+
+    out = b'%PDF-1.4\n'
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b'%d 0 obj\n' % number + body + b'\nendobj\n'
+    xref = len(out)
+    out += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    out += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    out += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return out
+
+def resume_pdf(size='medium', seed=0, lines_per_page=60):
+    """PDF bytes of a resume spanning the page count of `size`"""
+    n_pages = SIZES[size][2]
+    lines = resume_lines(n_pages * lines_per_page * 10, seed)[:n_pages * lines_per_page]
+    return make_pdf([lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)])
+
+def resume_docx(size='medium', seed=0):
+    """DOCX bytes of a resume, one paragraph per line"""
+    from docx import Document
+
+    document = Document()
+    for line in resume_lines(SIZES[size][0], seed):
+        document.add_paragraph(line)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
@@ -2,12 +2,17 @@
 import pandas as pd
 import numpy as np
 import joblib
+import os
 import re
+import sys
 import nltk
 from nltk.corpus import stopwords
 from nltk.tokenize import word_tokenize
 from nltk.stem import WordNetLemmatizer
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+from text_features import STAT_SUFFIXES, text_statistics_batch
+
 class ResumeJobFitPredictor:
     def __init__(self, pipeline_path):
         """Load the trained pipeline"""
@@ -52,19 +57,10 @@ class ResumeJobFitPredictor:
             processed_col = f'{col}_processed'
             features[processed_col] = features[col].apply(self.preprocess_text)
 
-            # Basic text statistics
-            features[f'{col}_length'] = features[col].str.len().fillna(0)
-            features[f'{col}_word_count'] = features[processed_col].str.split().str.len().fillna(0)
-            features[f'{col}_unique_words'] = features[processed_col].apply(
-                lambda x: len(set(str(x).split())) if pd.notna(x) else 0
-            )
-            features[f'{col}_avg_word_length'] = features[processed_col].apply(
-                lambda x: np.mean([len(word) for word in str(x).split()]) if pd.notna(x) and str(x).strip() else 0
-            )
-            features[f'{col}_sentence_count'] = features[col].str.count(r'[.!?]').fillna(0)
-            features[f'{col}_capital_ratio'] = features[col].apply(
-                lambda x: sum(1 for c in str(x) if c.isupper()) / len(str(x)) if pd.notna(x) and len(str(x)) > 0 else 0
-            )
+            # Basic text statistics, computed in one pass per document
+            stats = text_statistics_batch(features[col].tolist(), features[processed_col].tolist())
+            for i, suffix in enumerate(STAT_SUFFIXES):
+                features[f'{col}_{suffix}'] = stats[:, i]
 
         return features
 
@@ -0,0 +1,124 @@
+"""
+Concurrent generation of the AI-powered recommendations (resume improvements and project ideas)
+
+Run directly to measure sequential vs concurrent wall-clock time against a local stub
+of the OpenAI completions endpoint:
+
+    python src/ai_recommendations.py --stub-delay 2.0
+"""
+import argparse
+import asyncio
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_enhancer import LLM_TIMEOUT, aenhance_resume_section, enhance_resume_section
+from project_ideas import agenerate_project_ideas, generate_project_ideas
+
+# At most this many LLM calls are in flight per "generate all" request
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '2'))
+
+async def generate_all(resume_text, jd_text, missing_skills, resume_skills, on_result=None,
+                       max_concurrency=LLM_MAX_CONCURRENCY, timeout=LLM_TIMEOUT, use_cache=True):
+    """
+    Generate resume improvements and project ideas concurrently
+
+    Args:
+        resume_text (str): Resume text
+        jd_text (str): Job description text
+        missing_skills (list): Skills required by the job but missing from the resume
+        resume_skills (list): Skills found in the resume
+        on_result (callable): Called as on_result(name, text, seconds) as soon as each
+            result completes, so the UI can render it without waiting for the other
+        max_concurrency (int): Maximum number of LLM calls in flight
+        timeout (float): Per-call timeout in seconds
+        use_cache (bool): Set False to bypass the LLM response cache
+
+    Returns:
+        dict: {'resume_improvements': str, 'project_ideas': str, 'timings': {name: seconds}}
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(name, make_call):
+        async with semaphore:
+            start = time.perf_counter()
+            result = await make_call()
+            elapsed = time.perf_counter() - start
+        if on_result is not None:
+            on_result(name, result, elapsed)
+        return name, result, elapsed
+
+    calls = [
+        run('resume_improvements', lambda: aenhance_resume_section(
+            resume_text, jd_text, list(missing_skills), use_cache=use_cache, timeout=timeout)),
+        run('project_ideas', lambda: agenerate_project_ideas(
+            resume_text, list(resume_skills), use_cache=use_cache, timeout=timeout)),
+    ]
+
+    results = {'timings': {}}
+    for finished in asyncio.as_completed(calls):
+        name, result, elapsed = await finished
+        results[name] = result
+        results['timings'][name] = elapsed
+    return results
+
+def _start_stub_server(delay):
+    """Serve a minimal OpenAI-compatible /v1/completions endpoint that answers after `delay` seconds"""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            time.sleep(delay)
+            body = json.dumps({
+                'id': 'cmpl-stub',
+                'object': 'text_completion',
+                'created': int(time.time()),
+                'model': request.get('model', 'stub'),
+                'choices': [{'text': 'Stub completion.', 'index': 0, 'logprobs': None, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure sequential vs concurrent LLM generation against a local stub')
+    parser.add_argument('--stub-delay', type=float, default=1.0, help='Seconds the stub waits before answering')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    server = _start_stub_server(args.stub_delay)
+    os.environ['OPENAI_API_BASE'] = f'http://127.0.0.1:{server.server_address[1]}/v1'
+    os.environ.setdefault('OPENAI_API_KEY', 'stub-key')
+
+    resume, jd, missing, skills = 'Python developer', 'Backend engineer job', ['aws'], ['python']
+    sequential, concurrent = [], []
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        enhance_resume_section(resume, jd, missing, use_cache=False)
+        generate_project_ideas(resume, skills, use_cache=False)
+        sequential.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        asyncio.run(generate_all(resume, jd, missing, skills, use_cache=False))
+        concurrent.append(time.perf_counter() - start)
+
+    server.shutdown()
+    print(f'Stub delay: {args.stub_delay:.2f}s per call, {args.rounds} rounds')
+    print(f'Sequential: {min(sequential):.2f}s best, {sum(sequential) / len(sequential):.2f}s mean')
+    print(f'Concurrent: {min(concurrent):.2f}s best, {sum(concurrent) / len(concurrent):.2f}s mean')
+
+if __name__ == '__main__':
+    main()
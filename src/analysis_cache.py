@@ -0,0 +1,112 @@
+"""
+Content-keyed caches for the stages of the Streamlit analysis pipeline
+
+Streamlit re-executes app/main.py on every widget interaction. Each stage below is wrapped
+in st.cache_data, keyed on its inputs (file bytes, document text, skill lists), so a rerun
+with unchanged uploads recomputes nothing. Per-stage call/miss counters feed the debug panel.
+"""
+import functools
+import os
+import threading
+
+import streamlit as st
+
+from fit_classifier import predict_fit
+from learning_resources import get_learning_resources
+from parsing import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+from skills import extract_skills, skill_match
+
+STAGES = ('parse', 'skills', 'match', 'fit', 'resources')
+
+# Entries kept per stage; a few recent uploads per stage is enough for reruns
+STAGE_CACHE_ENTRIES = int(os.getenv('STAGE_CACHE_ENTRIES', '32'))
+
+PARSERS = {
+    'application/pdf': extract_text_from_pdf,
+    'application/vnd.openxmlformats-officedocument.wordprocessingml.document': extract_text_from_docx,
+    'text/plain': extract_text_from_txt,
+}
+
+# Process-wide counters; st.cache_data is shared by all sessions, so these are too
+_stage_counts = {stage: {'calls': 0, 'misses': 0} for stage in STAGES}
+_stage_lock = threading.Lock()
+_cached_stages = []
+
+def _record(stage, counter):
+    with _stage_lock:
+        _stage_counts[stage][counter] += 1
+
+def cached_stage(stage):
+    """Cache a pipeline stage with st.cache_data and count its calls and misses"""
+    def decorate(func):
+        # Runs only on a cache miss; functools.wraps keeps each stage's cache key distinct
+        @functools.wraps(func)
+        def compute(*args):
+            _record(stage, 'misses')
+            return func(*args)
+
+        cached = st.cache_data(show_spinner=False, max_entries=STAGE_CACHE_ENTRIES)(compute)
+        _cached_stages.append(cached)
+
+        @functools.wraps(func)
+        def call(*args):
+            _record(stage, 'calls')
+            return cached(*args)
+        return call
+    return decorate
+
+def stage_stats():
+    """Return {stage: {'calls', 'hits', 'misses'}} since the server started"""
+    with _stage_lock:
+        return {
+            stage: {'calls': c['calls'], 'hits': c['calls'] - c['misses'], 'misses': c['misses']}
+            for stage, c in _stage_counts.items()
+        }
+
+def clear_stage_caches():
+    for cached in _cached_stages:
+        cached.clear()
+    with _stage_lock:
+        for counts in _stage_counts.values():
+            counts['calls'] = counts['misses'] = 0
+
+@cached_stage('parse')
+def parse_document(data, file_type):
+    """Extract text from uploaded file bytes; None for unsupported types"""
+    parser = PARSERS.get(file_type)
+    return parser(data) if parser else None
+
+@cached_stage('skills')
+def extract_document_skills(text, use_ner):
+    """
+    Extract skills from a document
+
+    Returns:
+        tuple: (skills, warning) where warning is set if NER failed and basic extraction was used
+    """
+    if use_ner:
+        try:
+            from ner_skill_extractor import extract_skills_ner
+            return extract_skills_ner(text), None
+        except Exception as e:
+            return extract_skills(text), f"NER extraction failed, falling back to basic extraction: {str(e)}"
+    return extract_skills(text), None
+
+@cached_stage('match')
+def match_skills(resume_skills, jd_skills):
+    """Return (matched, missing, extra, match_score) for two skill lists"""
+    return skill_match(resume_skills, jd_skills)
+
+@cached_stage('fit')
+def predict_document_fit(resume_text, jd_text, match_score, num_matched, num_missing):
+    return predict_fit(
+        resume_text=resume_text,
+        job_description=jd_text,
+        match_score=match_score,
+        num_matched=num_matched,
+        num_missing=num_missing
+    )
+
+@cached_stage('resources')
+def lookup_learning_resources(missing_skills):
+    return get_learning_resources(missing_skills)
@@ -0,0 +1,424 @@
+"""
+Offline bulk scoring of resumes against job descriptions
+
+Inputs are directories of PDF/DOCX/TXT files or JSONL files with one {"id", "text"} record per
+line. The work is cut into tiles of at most --max-pairs resume/job pairs: a chunk of resumes
+against a slice of the job descriptions (cross mode) or a chunk of position-paired documents
+(zip mode). Tiles are streamed to a process pool; each worker parses its resumes, extracts
+skills and scores the tile with one batched model call. Rows are written to JSONL or CSV as
+tiles complete.
+
+Memory stays bounded: job descriptions are loaded once per worker, resumes are read lazily,
+a model call never sees more than --max-pairs feature rows and at most 2 tiles per worker are
+in flight. A checkpoint file next to the output records the output size after every finished
+tile, so an interrupted run resumes where it stopped.
+
+With --dedup-jobs (cross mode), near-duplicate job descriptions (jd_dedup.py) share the skills
+and fit scores of their first copy; their rows carry the canonical job in "duplicate_of".
+
+Usage:
+    python src/bulk_score.py --resumes resumes/ --jobs jobs.jsonl --output scores.jsonl
+    python src/bulk_score.py --resumes resumes.jsonl --jobs jobs/ --output scores.csv --workers 8
+    python src/bulk_score.py --resumes resumes/ --jobs jobs.jsonl --output scores.jsonl --max-pairs 512
+    python src/bulk_score.py --resumes a.jsonl --jobs b.jsonl --pairs zip --output scores.jsonl
+    python src/bulk_score.py --resumes resumes/ --jobs jobs/ --output scores.jsonl --dedup-jobs 0.8
+"""
+import argparse
+import csv
+import hashlib
+import io
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on resume/job pairs scored by one task. Each sparse feature row holds at least
+# the ~2.7k features the trees split on (~21 KB), so 2048 pairs stay around 45 MB per call.
+MAX_PAIRS_PER_TASK = int(os.getenv('BULK_MAX_PAIRS', '2048'))
+
+DOCUMENT_SUFFIXES = ('.pdf', '.docx', '.txt')
+TARGET_NAMES = ('Good Fit', 'No Fit', 'Potential Fit')
+CSV_FIELDS = ('resume_id', 'job_id', 'duplicate_of', 'prediction', 'confidence', 'model_type', 'match_score',
+              'num_matched', 'num_missing', 'missing_skills', *(f'prob_{name}' for name in TARGET_NAMES), 'error')
+
+def iter_documents(source):
+    """
+    Yield (doc_id, path, text) records from a directory or a JSONL file
+
+    Directory entries carry a path and are parsed by the worker; JSONL records carry their text.
+    """
+    source = Path(source)
+    if source.is_dir():
+        for path in sorted(p for p in source.rglob('*') if p.suffix.lower() in DOCUMENT_SUFFIXES):
+            yield str(path.relative_to(source)), str(path), None
+        return
+
+    with open(source, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record.get('text', record.get('resume_text', record.get('job_description', '')))
+            yield str(record.get('id', line_number)), None, text
+
+def _read_document(path, text):
+    """Return the text of a record, parsing files with parsing.py (serially, without the cache)"""
+    if path is None:
+        return text or ''
+    from parsing import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+
+    suffix = Path(path).suffix.lower()
+    if suffix == '.pdf':
+        return extract_text_from_pdf(path, use_cache=False, workers=1)
+    if suffix == '.docx':
+        return extract_text_from_docx(path, use_cache=False)
+    return extract_text_from_txt(path, use_cache=False)
+
+def _load_side(records, dedup_threshold=None):
+    """
+    Parse records and extract skills; returns (ids, texts, skills, errors, canonical)
+
+    canonical[i] is the position of the first near-duplicate of document i (i itself without
+    dedup_threshold); duplicates reuse its skills instead of extracting their own.
+    """
+    from skills import extract_skills
+
+    ids, texts, errors = [], [], []
+    for doc_id, path, text in records:
+        try:
+            text = _read_document(path, text)
+            error = None
+        except Exception as e:
+            text, error = '', f'{type(e).__name__}: {e}'
+        ids.append(doc_id)
+        texts.append(text)
+        errors.append(error)
+
+    if dedup_threshold:
+        from jd_dedup import dedup_groups
+        canonical = dedup_groups(texts, dedup_threshold)
+    else:
+        canonical = list(range(len(texts)))
+    skills = [None] * len(texts)
+    for i, first in enumerate(canonical):
+        skills[i] = skills[first] if first != i else extract_skills(texts[i])
+    return ids, texts, skills, errors, canonical
+
+# Per-worker state set by _init_worker
+_jobs = None
+# (chunk index, loaded resumes) of the last chunk parsed; consecutive tiles share a chunk
+_last_resumes = (None, None)
+
+def _init_worker(job_records, dedup_threshold=None):
+    """Load the model and the shared job descriptions once per worker process"""
+    global _jobs
+    sys.path.insert(0, str(Path(__file__).parent))
+    logging.getLogger('fit_classifier').setLevel(logging.WARNING)
+    from fit_classifier import get_classifier
+
+    get_classifier()
+    _jobs = _load_side(job_records, dedup_threshold) if job_records is not None else None
+
+def _load_resumes(chunk_index, resume_records):
+    """Parse a resume chunk, reusing the previous result when the same chunk comes again"""
+    global _last_resumes
+    if _last_resumes[0] != chunk_index:
+        _last_resumes = (chunk_index, _load_side(resume_records))
+    return _last_resumes[1]
+
+def _score_tile(chunk_index, resume_records, job_range=None, job_records=None):
+    """
+    Score a chunk of resumes against the job descriptions in job_range (cross mode) or
+    against the job description at the same position (zip mode, job_records given)
+
+    Returns:
+        list: Output rows
+    """
+    from fit_classifier import predict_fit_batch
+    from skills import skill_match
+
+    resume_ids, resume_texts, resume_skills, resume_errors, _ = _load_resumes(chunk_index, resume_records)
+    if job_records is None:
+        job_ids, job_texts, job_skills, job_errors, canonical = _jobs
+        pairs = [(i, j) for i in range(len(resume_ids)) for j in range(*job_range)]
+    else:
+        job_ids, job_texts, job_skills, job_errors, canonical = _load_side(job_records)
+        pairs = [(i, i) for i in range(len(resume_ids))]
+
+    # Only canonical jobs are scored (possibly outside this tile); near-duplicates reuse their scores
+    scored_pairs = list(dict.fromkeys((i, canonical[j]) for i, j in pairs))
+    matches = [skill_match(resume_skills[i], job_skills[j]) for i, j in scored_pairs]
+    results = predict_fit_batch(
+        [resume_texts[i] for i, _ in scored_pairs],
+        [job_texts[j] for _, j in scored_pairs],
+        match_scores=[match[3] for match in matches],
+        num_matched=[len(match[0]) for match in matches],
+        num_missing=[len(match[1]) for match in matches]
+    )
+    scored = dict(zip(scored_pairs, zip(matches, results)))
+
+    rows = []
+    for i, j in pairs:
+        (matched, missing, _, match_score), result = scored[(i, canonical[j])]
+        error = resume_errors[i] or job_errors[j]
+        # A document that failed to parse gets no score rather than a fallback guess
+        if error:
+            result = {'prediction': None, 'confidence': None, 'probabilities': {}, 'model_type': None}
+        rows.append({
+            'resume_id': resume_ids[i],
+            'job_id': job_ids[j],
+            'prediction': result['prediction'],
+            'confidence': result['confidence'],
+            'probabilities': result['probabilities'],
+            'model_type': result.get('model_type'),
+            'match_score': match_score,
+            'num_matched': len(matched),
+            'num_missing': len(missing),
+            'missing_skills': sorted(missing),
+            'error': error,
+        })
+        if canonical[j] != j:
+            rows[-1]['duplicate_of'] = job_ids[canonical[j]]
+    return rows
+
+class ResultWriter:
+    """Append rows to a JSONL or CSV file; offset() is the byte size after the last flush"""
+
+    def __init__(self, path, resume_offset=None):
+        self.path = Path(path)
+        self.is_csv = self.path.suffix.lower() == '.csv'
+        if resume_offset is None:
+            self.file = open(self.path, 'w', encoding='utf-8', newline='')
+            if self.is_csv:
+                self.file.write(','.join(CSV_FIELDS) + '\r\n')
+        else:
+            # Drop anything written after the last checkpoint (an interrupted chunk)
+            self.file = open(self.path, 'r+', encoding='utf-8', newline='')
+            self.file.truncate(resume_offset)
+            self.file.seek(resume_offset)
+
+    def write(self, rows):
+        if self.is_csv:
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, CSV_FIELDS)
+            for row in rows:
+                flat = {key: row[key] for key in CSV_FIELDS if key in row}
+                flat['missing_skills'] = ';'.join(row['missing_skills'])
+                for name in TARGET_NAMES:
+                    flat[f'prob_{name}'] = row['probabilities'].get(name, '')
+                writer.writerow(flat)
+            self.file.write(buffer.getvalue())
+        else:
+            self.file.write(''.join(json.dumps(row) + '\n' for row in rows))
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def offset(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+class Checkpoint:
+    """
+    Append-only log of finished tiles: a config line, then one line per tile with its
+    (resume chunk, job slice) index and the output size once its rows were written
+    """
+
+    def __init__(self, path, config, restart=False):
+        self.path = Path(path)
+        self.done = set()
+        self.offset = None
+        if self.path.exists() and not restart:
+            with open(self.path, encoding='utf-8') as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            if lines and lines[0].get('config') != config:
+                raise ValueError(f"Checkpoint {self.path} was written for different inputs or tiling; use --restart")
+            for entry in lines[1:]:
+                self.done.add(tuple(entry['tile']))
+                self.offset = entry['offset']
+            self.file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self.file = open(self.path, 'w', encoding='utf-8')
+            self._append({'config': config})
+
+    def record(self, tile, offset):
+        self._append({'tile': list(tile), 'offset': offset})
+
+    def _append(self, entry):
+        self.file.write(json.dumps(entry) + '\n')
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+def _chunks(records, size):
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _source_fingerprint(source):
+    """
+    Identify an input by path, size and mtime so a changed input invalidates the checkpoint.
+    For a directory that is every document in it: editing a file changes neither the
+    directory's own size nor its mtime.
+    """
+    source = Path(source)
+    stat = source.stat()
+    digest = hashlib.sha256(f'{source.resolve()}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    if source.is_dir():
+        for path in sorted(p for p in source.rglob('*') if p.suffix.lower() in DOCUMENT_SUFFIXES):
+            stat = path.stat()
+            digest.update(f'\n{path.relative_to(source)}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()[:16]
+
+def _tiles(resumes, jobs, pairs, chunk_size, max_pairs, job_records):
+    """
+    Yield (tile, resume_ids, n_tiles, task_args) in a fixed order, so tile indices stay valid
+    across runs with the same inputs and tiling
+    """
+    # A tile never holds more than max_pairs pairs, whatever chunk_size asks for
+    chunk_size = max(1, min(chunk_size, max_pairs))
+    if pairs == 'zip':
+        zipped = zip(iter_documents(resumes), iter_documents(jobs))
+        for chunk_index, chunk in enumerate(_chunks(zipped, chunk_size)):
+            resume_chunk = [resume for resume, _ in chunk]
+            yield ((chunk_index, 0), [doc_id for doc_id, _, _ in resume_chunk], 1,
+                   (chunk_index, resume_chunk, None, [job for _, job in chunk]))
+        return
+
+    job_slice = max(1, max_pairs // chunk_size)
+    job_starts = range(0, len(job_records), job_slice)
+    for chunk_index, resume_chunk in enumerate(_chunks(iter_documents(resumes), chunk_size)):
+        resume_ids = [doc_id for doc_id, _, _ in resume_chunk]
+        for slice_index, start in enumerate(job_starts):
+            job_range = (start, min(start + job_slice, len(job_records)))
+            yield (chunk_index, slice_index), resume_ids, len(job_starts), (chunk_index, resume_chunk, job_range, None)
+
+def bulk_score(resumes, jobs, output, pairs='cross', workers=None, chunk_size=32, restart=False,
+               dedup_jobs=None, max_pairs=MAX_PAIRS_PER_TASK):
+    """
+    Score every resume in `resumes` against `jobs` and stream rows to `output`
+
+    Args:
+        resumes (str | Path): Directory of documents or JSONL file
+        jobs (str | Path): Directory of documents or JSONL file
+        output (str | Path): .jsonl or .csv output path; a .checkpoint file is kept next to it
+        pairs (str): 'cross' scores every resume against every job; 'zip' pairs them by position
+        workers (int): Worker processes (default: all cores)
+        chunk_size (int): Resumes per task (capped at max_pairs)
+        restart (bool): Ignore an existing checkpoint and start over
+        dedup_jobs (float): Jaccard threshold above which job descriptions share scores (cross mode)
+        max_pairs (int): Most resume/job pairs one task scores; cross mode splits the job
+            descriptions into slices of max_pairs // chunk_size
+
+    Returns:
+        dict: Counts and throughput
+    """
+    workers = workers or os.cpu_count() or 1
+    output = Path(output)
+    config = {'resumes': _source_fingerprint(resumes), 'jobs': _source_fingerprint(jobs), 'pairs': pairs,
+              'format': output.suffix.lower(), 'dedup_jobs': dedup_jobs, 'chunk_size': chunk_size,
+              'max_pairs': max_pairs}
+    if config['format'] == '.csv':
+        # A CSV written with other columns cannot be appended to
+        config['columns'] = list(CSV_FIELDS)
+    checkpoint = Checkpoint(output.with_name(output.name + '.checkpoint'), config, restart)
+    if checkpoint.done and not output.exists():
+        raise ValueError(f"Checkpoint lists finished tiles but {output} is missing; use --restart")
+    writer = ResultWriter(output, checkpoint.offset if checkpoint.done else None)
+
+    job_records = list(iter_documents(jobs)) if pairs == 'cross' else None
+    tiles = iter(_tiles(resumes, jobs, pairs, chunk_size, max_pairs, job_records))
+
+    # Tiles still to score per resume chunk; a chunk's resumes count as scored once all are done
+    remaining = {}
+    chunk_resumes = {}
+    skipped = 0
+    scored_resumes = 0
+    rows_written = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(job_records, dedup_jobs)) as pool:
+        pending = {}
+        exhausted = False
+        while pending or not exhausted:
+            # Bounded number of tiles in flight keeps memory flat on large corpora
+            while not exhausted and len(pending) < workers * 2:
+                tile = next(tiles, None)
+                if tile is None:
+                    exhausted = True
+                    break
+                (chunk_index, slice_index), resume_ids, n_tiles, task_args = tile
+                if chunk_index not in remaining:
+                    remaining[chunk_index] = sum((chunk_index, k) not in checkpoint.done for k in range(n_tiles))
+                    chunk_resumes[chunk_index] = len(resume_ids)
+                    if not remaining[chunk_index]:
+                        skipped += len(resume_ids)
+                if (chunk_index, slice_index) in checkpoint.done:
+                    continue
+                pending[pool.submit(_score_tile, *task_args)] = (chunk_index, slice_index)
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                tile = pending.pop(future)
+                rows = future.result()
+                writer.write(rows)
+                checkpoint.record(tile, writer.offset())
+                rows_written += len(rows)
+                remaining[tile[0]] -= 1
+                if not remaining[tile[0]]:
+                    scored_resumes += chunk_resumes[tile[0]]
+            elapsed = time.perf_counter() - start
+            logger.info(f"Scored {scored_resumes} resumes ({rows_written} rows, "
+                        f"{rows_written / elapsed:.1f} rows/s)")
+
+    writer.close()
+    checkpoint.close()
+    elapsed = time.perf_counter() - start
+    return {
+        'resumes_scored': scored_resumes,
+        'resumes_skipped': skipped,
+        'rows_written': rows_written,
+        'seconds': elapsed,
+        'resumes_per_second': scored_resumes / elapsed if elapsed else 0.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Score resumes against job descriptions in bulk')
+    parser.add_argument('--resumes', required=True, help='Directory of PDF/DOCX/TXT files or JSONL file')
+    parser.add_argument('--jobs', required=True, help='Directory of PDF/DOCX/TXT files or JSONL file')
+    parser.add_argument('--output', required=True, help='Output .jsonl or .csv file')
+    parser.add_argument('--pairs', choices=('cross', 'zip'), default='cross')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: all cores)')
+    parser.add_argument('--chunk-size', type=int, default=32, help='Resumes per task')
+    parser.add_argument('--max-pairs', type=int, default=MAX_PAIRS_PER_TASK,
+                        help=f'Most resume/job pairs per task (default: {MAX_PAIRS_PER_TASK})')
+    parser.add_argument('--restart', action='store_true', help='Ignore an existing checkpoint')
+    parser.add_argument('--dedup-jobs', type=float, default=None, metavar='JACCARD',
+                        help='Reuse scores for near-duplicate job descriptions (cross mode)')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.dedup_jobs is not None and args.pairs != 'cross':
+        parser.error('--dedup-jobs requires --pairs cross')
+    summary = bulk_score(args.resumes, args.jobs, args.output, args.pairs, args.workers, args.chunk_size,
+                         args.restart, args.dedup_jobs, args.max_pairs)
+    print(f"✅ Scored {summary['resumes_scored']} resumes ({summary['resumes_skipped']} already done), "
+          f"{summary['rows_written']} rows in {summary['seconds']:.1f}s "
+          f"({summary['resumes_per_second']:.1f} resumes/s) -> {args.output}")
+
+if __name__ == '__main__':
+    main()
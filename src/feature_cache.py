@@ -0,0 +1,95 @@
+"""
+Per-document feature cache for the advanced fit classifier
+
+A resume/job feature row is two independent halves, one per document: the statistics block and
+the TF-IDF entries, already mapped to model column slots. When the same job description is
+scored against hundreds of resumes (or one resume against many jobs), only the unseen document
+needs preprocessing and vectorizing; the other half comes from here.
+"""
+import hashlib
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Byte budget per side (resume / job description); 0 disables caching
+FEATURE_CACHE_MAX_BYTES = int(os.getenv('FEATURE_CACHE_MAX_BYTES', str(16 * 1024 * 1024)))
+
+class DocumentFeatureCache:
+    """
+    LRU of per-document feature blocks keyed by SHA-256 of the document text.
+
+    Entries are (positions, values) array pairs, stored read-only since they are shared between
+    requests. Size is accounted as the array bytes plus the key; least-recently-used entries are
+    evicted once the total exceeds max_bytes.
+    """
+
+    def __init__(self, max_bytes=FEATURE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(text, variant=''):
+        """Key of a document; variant separates incompatible block formats of the same text"""
+        # Same normalization as the featurizer: None / NaN read as empty, other values as str
+        if not isinstance(text, str):
+            text = '' if text is None or text != text else str(text)
+        digest = hashlib.sha256(f'{variant}:'.encode())
+        digest.update(text.encode('utf-8', errors='surrogatepass'))
+        return digest.digest()
+
+    @staticmethod
+    def _entry_bytes(key, block):
+        return sum(array.nbytes for array in block) + sys.getsizeof(key)
+
+    def get(self, key):
+        with self._lock:
+            block = self._entries.get(key)
+            if block is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return block
+
+    def put(self, key, block):
+        size = self._entry_bytes(key, block)
+        if size > self.max_bytes:
+            return
+        for array in block:
+            array.flags.writeable = False
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= self._entry_bytes(key, previous)
+            self._entries[key] = block
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                old_key, old_block = self._entries.popitem(last=False)
+                self.bytes -= self._entry_bytes(old_key, old_block)
+                self.evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'max_bytes': self.max_bytes,
+                'evictions': self.evictions,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self.hits = self.misses = self.evictions = 0
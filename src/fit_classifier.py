@@ -3,23 +3,250 @@ Advanced ML-based Resume-Job Fit Classifier
 Uses enterprise-grade XGBoost model trained on 6.24k real resume-job pairs from HuggingFace
 """
 import numpy as np
-import pandas as pd
+import scipy.sparse as sp
 import joblib
+import math
 import re
 import os
+import threading
 from pathlib import Path
+from collections import Counter
 import logging
 
+from text_features import STAT_SUFFIXES, text_statistics_batch
+from model_artifact import artifact_matches_pickle, find_latest_artifact, load_artifact
+from feature_cache import DocumentFeatureCache
+from tree_evaluator import TOLERANCE, CompiledTrees, random_rows
+from tracing import count, is_enabled, span, text_size
+from request_profiler import profile_request
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Memory-lean inference: float32 features assembled in per-thread scratch buffers.
+# XGBoost converts features to float32 anyway, so predictions are unchanged.
+LEAN_INFERENCE = os.getenv('FIT_LEAN_INFERENCE', '1').lower() in ('1', 'true', 'yes')
+
+# NumPy tree evaluator (tree_evaluator.py): 'auto' scores requests of up to TREE_EVALUATOR_MAX_ROWS
+# rows with it once it reproduces XGBoost at load, 'off' never uses it, 'only' uses it for every
+# request and, given an exported artifact, does not load (or import) XGBoost at all
+TREE_EVALUATOR = os.getenv('FIT_TREE_EVALUATOR', 'auto').lower()
+# XGBoost's fixed per-call overhead (~0.8 ms) dominates small requests. On the bundled model the
+# evaluator is ~4x faster at 1 row and ~1.2x at 8, and the two break even at about 16 rows
+# (python src/tree_evaluator.py bench). The default stays at 8: between 8 and 16 rows the two are
+# within timing noise of each other, so routing those requests to the evaluator gains nothing
+TREE_EVALUATOR_MAX_ROWS = int(os.getenv('TREE_EVALUATOR_MAX_ROWS', '8'))
+
+def _pair_indices(n_resumes, n_jobs, cross_product=False):
+    """Return (resume_index, job_index) pairs for a batch request"""
+    if cross_product:
+        return [(i, j) for i in range(n_resumes) for j in range(n_jobs)]
+    if n_resumes == 1:
+        return [(0, j) for j in range(n_jobs)]
+    if n_jobs == 1:
+        return [(i, 0) for i in range(n_resumes)]
+    if n_resumes != n_jobs:
+        raise ValueError(
+            f"Cannot pair {n_resumes} resumes with {n_jobs} job descriptions; "
+            "pass equal-length lists or use cross_product=True"
+        )
+    return [(i, i) for i in range(n_resumes)]
+
+TEXT_COLUMNS = ('resume_text', 'job_description_text')
+
+def preprocess_text(text):
+    """Normalize text the way the model was trained: lowercase letters and single spaces"""
+    if text is None or (isinstance(text, float) and math.isnan(text)):
+        return ""
+    
+    text = str(text).lower()
+    text = re.sub(r'[^a-zA-Z\s]', '', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    
+    return text
+
+def _scatter(row, slots, values):
+    """Write values into row at their layout slots, skipping features the model does not use"""
+    used = slots >= 0
+    row[slots[used]] = values[used]
+
+class _RowBuffers(threading.local):
+    """Per-thread float32 scratch row and presence mask, kept all-zero between uses"""
+    
+    def get(self, n_features):
+        if getattr(self, 'values', None) is None or len(self.values) != n_features:
+            self.values = np.zeros(n_features, dtype=np.float32)
+            self.present = np.zeros(n_features, dtype=bool)
+        return self.values, self.present
+
+_row_buffers = _RowBuffers()
+
+class FeatureLayout:
+    """
+    Integer model-column slots for every feature the pipeline can generate.
+    
+    Built once at model load so per-request assembly is index arithmetic
+    instead of matching ~10k column names. A slot of -1 marks a generated
+    feature the model does not use.
+    """
+    
+    def __init__(self, feature_columns, vectorizers, booster=None, split_features=None):
+        column_index = {name: i for i, name in enumerate(feature_columns)}
+        self.n_features = len(feature_columns)
+        produced = set()
+        
+        # Statistical features, in STAT_SUFFIXES order per text column
+        self.stat_slots = {}
+        for col_name in TEXT_COLUMNS:
+            names = [f'{col_name}_{suffix}' for suffix in STAT_SUFFIXES]
+            produced.update(names)
+            self.stat_slots[col_name] = np.array([column_index.get(name, -1) for name in names], dtype=np.int64)
+        
+        # TF-IDF output index -> model column; a pruned vectorizer (see vocab_pruning.py)
+        # emits only the vocabulary columns listed in its output_indices_
+        self.tfidf_slots = {}
+        for col_name, vectorizer in vectorizers.items():
+            vocabulary_columns = getattr(vectorizer, 'output_indices_', range(len(vectorizer.vocabulary_)))
+            names = [f'{col_name}_tfidf_{i}' for i in vocabulary_columns]
+            produced.update(names)
+            self.tfidf_slots[col_name] = np.array([column_index.get(name, -1) for name in names], dtype=np.int64)
+        
+        # Features the model expects but the pipeline never generates (always zero at serve time)
+        self.unproducible = [name for name in feature_columns if name not in produced]
+        self.unproducible_slots = np.array([column_index[name] for name in self.unproducible], dtype=np.int64)
+        
+        # XGBoost treats entries absent from a sparse matrix as missing, not zero, and this
+        # model was trained on dense input. Every feature the trees split on therefore has
+        # to be stored as an explicit zero when it is not otherwise present.
+        self.split_slots = None
+        if booster is not None:
+            booster_names = booster.feature_names or [f'f{i}' for i in range(self.n_features)]
+            booster_index = {name: i for i, name in enumerate(booster_names)}
+            split_counts = booster.get_score(importance_type='weight')
+            self.split_slots = np.array(sorted(booster_index[name] for name in split_counts), dtype=np.int64)
+        elif split_features is not None:
+            self.split_slots = np.asarray(split_features, dtype=np.int64)
+    
+    def validate(self):
+        """Log and return the model features the pipeline can never produce"""
+        if self.unproducible:
+            preview = ', '.join(self.unproducible[:5])
+            logger.warning(
+                f"Model expects {len(self.unproducible)} features the pipeline never generates "
+                f"(they will always be 0): {preview}{'...' if len(self.unproducible) > 5 else ''}"
+            )
+        else:
+            logger.info(f"Feature layout validated: all {self.n_features} model features are generated")
+        return self.unproducible
+
+BASIC_MODEL_PATH = Path(__file__).parent / 'fit_classifier.pkl'
+
+def _train_basic_model():
+    """Train the basic fallback model in memory (only used if fit_classifier.pkl is missing)"""
+    from sklearn.ensemble import RandomForestClassifier
+    X = [
+        [100, 10, 0], [90, 9, 1], [80, 8, 2], [70, 7, 3], [60, 6, 4],
+        [50, 5, 5], [40, 4, 6], [30, 3, 7], [20, 2, 8], [10, 1, 9], [0, 0, 10]
+    ]
+    y = [1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0]
+    clf = RandomForestClassifier(n_estimators=50, random_state=42)
+    clf.fit(X, y)
+    return clf
+
+class BasicFitModel:
+    """
+    Lookup-table form of the basic (match_score, num_matched, num_missing) random forest.
+    
+    The forest only compares each feature against its split thresholds, so those
+    thresholds cut the input space into a small grid of cells with constant output
+    (210 cells for the shipped model). The forest is evaluated once per cell at load;
+    a prediction is then one binary search per feature and an array read, exact for
+    any input rather than only integer skill counts.
+    """
+    
+    def __init__(self, clf):
+        self.clf = clf
+        thresholds = [set() for _ in range(clf.n_features_in_)]
+        for estimator in clf.estimators_:
+            for feature, threshold in zip(estimator.tree_.feature, estimator.tree_.threshold):
+                if feature >= 0:
+                    thresholds[feature].add(threshold)
+        self.thresholds = [np.array(sorted(values), dtype=np.float64) for values in thresholds]
+        
+        # One representative point per cell: between neighbouring thresholds, or beyond the outermost ones
+        axes = [self._cell_points(values) for values in self.thresholds]
+        grid = np.stack(np.meshgrid(*axes, indexing='ij'), axis=-1).reshape(-1, len(axes))
+        shape = tuple(len(axis) for axis in axes)
+        proba = clf.predict_proba(grid)
+        self.good_fit_proba = proba[:, list(clf.classes_).index(1)].reshape(shape)
+        self.is_good_fit = (clf.classes_[proba.argmax(axis=1)] == 1).reshape(shape)
+    
+    @staticmethod
+    def _cell_points(thresholds):
+        if len(thresholds) == 0:
+            return np.zeros(1)
+        inner = (thresholds[:-1] + thresholds[1:]) / 2
+        return np.concatenate([[thresholds[0] - 1], inner, [thresholds[-1] + 1]])
+    
+    def predict_batch(self, match_scores, num_matched, num_missing):
+        """
+        Returns:
+            tuple: (good_fit_proba, is_good_fit) arrays, one entry per input row
+        """
+        X = np.column_stack([
+            np.asarray(match_scores, dtype=np.float64),
+            np.asarray(num_matched, dtype=np.float64),
+            np.asarray(num_missing, dtype=np.float64)
+        ])
+        # Trees compare float32 inputs against their thresholds; x <= threshold goes left,
+        # so the cell index is the number of thresholds strictly below x
+        X32 = X.astype(np.float32).astype(np.float64)
+        cells = tuple(np.searchsorted(values, X32[:, f], side='left') for f, values in enumerate(self.thresholds))
+        proba = self.good_fit_proba[cells]
+        good = self.is_good_fit[cells]
+        
+        # Missing values follow the forest's own routing
+        missing = np.isnan(X).any(axis=1)
+        if missing.any():
+            model_proba = self.clf.predict_proba(X[missing])
+            proba[missing] = model_proba[:, list(self.clf.classes_).index(1)]
+            good[missing] = self.clf.classes_[model_proba.argmax(axis=1)] == 1
+        return proba, good
+
+_basic_model = None
+_basic_model_lock = threading.Lock()
+
+def get_basic_model():
+    """Return the resident BasicFitModel, loading it on first call; never writes to disk"""
+    global _basic_model
+    if _basic_model is None:
+        with _basic_model_lock:
+            if _basic_model is None:
+                if BASIC_MODEL_PATH.exists():
+                    import pickle
+                    with open(BASIC_MODEL_PATH, 'rb') as f:
+                        clf = pickle.load(f)
+                else:
+                    logger.warning(f"⚠️ {BASIC_MODEL_PATH.name} not found, training basic model in memory")
+                    clf = _train_basic_model()
+                _basic_model = BasicFitModel(clf)
+    return _basic_model
+
+def _fallback_result():
+    return {
+        'prediction': 'No Fit',
+        'confidence': 0.5,
+        'probabilities': {'Good Fit': 0.3, 'No Fit': 0.7},
+        'model_type': 'fallback'
+    }
+
 class AdvancedFitClassifier:
     """
     Production-ready resume-job fit classifier using advanced ML
     """
     
-    def __init__(self):
+    def __init__(self, pipeline_data=None):
         self.pipeline_data = None
         self.model = None
         self.vectorizers = None
@@ -27,28 +254,43 @@ class AdvancedFitClassifier:
         self.feature_columns = None
         self.target_names = None
         self.is_loaded = False
+        self.layout = None
+        self.sparse_ready = False
+        self.lean = LEAN_INFERENCE
+        self.trees = None
+        # One cache per side, so a known job description only costs a lookup
+        self.feature_caches = {col_name: DocumentFeatureCache() for col_name in TEXT_COLUMNS}
         
         # Try to load the advanced model
-        self._load_advanced_model()
+        self._load_advanced_model(pipeline_data)
     
-    def _load_advanced_model(self):
-        """Load the advanced ML pipeline"""
+    def _load_advanced_model(self, pipeline_data=None):
+        """Load the advanced ML pipeline (the newest one in models/ unless a loaded one is given)"""
         try:
+            self.pipeline_data = pipeline_data
             # Find the latest model file
             models_dir = Path(__file__).parent.parent / 'models'
             model_files = list(models_dir.glob('ml_pipeline_xgboost_*.pkl'))
+            # Get the most recent model
+            latest_model = max(model_files, key=os.path.getctime) if model_files else None
+            if self.pipeline_data is None:
+                self.pipeline_data = self._load_artifact(models_dir, latest_model)
             
-            if model_files:
-                # Get the most recent model
-                latest_model = max(model_files, key=os.path.getctime)
+            if self.pipeline_data is None and latest_model is not None:
                 logger.info(f"Loading advanced ML model: {latest_model}")
                 
                 self.pipeline_data = joblib.load(latest_model)
-                self.model = self.pipeline_data['model']
+            
+            if self.pipeline_data is not None:
+                self.model = self.pipeline_data.get('model')
                 self.vectorizers = self.pipeline_data['vectorizers']
                 self.label_encoder = self.pipeline_data['label_encoder']
                 self.feature_columns = self.pipeline_data['feature_columns']
                 self.target_names = self.pipeline_data['target_names']
+                self._compile_trees()
+                if self.model is None and self.trees is None:
+                    raise ValueError("Pipeline has neither an XGBoost model nor compiled trees")
+                self._build_layout()
                 self.is_loaded = True
                 
                 # Log model performance
@@ -66,90 +308,262 @@ class AdvancedFitClassifier:
             logger.error(f"Failed to load advanced ML model: {e}")
             self.is_loaded = False
     
+    def _load_artifact(self, models_dir, latest_model=None):
+        """
+        Load the newest split artifact (see model_artifact.py) if one was exported, else None
+
+        When there is a pickle, the artifact is only used if it was exported from that pickle,
+        so retraining without re-exporting cannot serve the old model.
+        """
+        artifact_dir = find_latest_artifact(models_dir)
+        if artifact_dir is None:
+            return None
+        try:
+            if latest_model is not None and not artifact_matches_pickle(artifact_dir, latest_model):
+                logger.warning(f"⚠️ Model artifact {artifact_dir} was not exported from {latest_model.name}, "
+                               f"loading the pickle instead (export it again to use the artifact)")
+                return None
+            logger.info(f"Loading advanced ML model artifact: {artifact_dir}")
+            pipeline_data = load_artifact(artifact_dir, load_booster=TREE_EVALUATOR != 'only')
+            if pipeline_data['model'] is None and pipeline_data['compiled_trees'] is None:
+                raise ValueError("artifact has no compiled trees (export it again)")
+            return pipeline_data
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load model artifact {artifact_dir}, falling back to pickle: {e}")
+            return None
+    
+    def _compile_trees(self):
+        """Set up the NumPy tree evaluator, keeping it only if it reproduces XGBoost's probabilities"""
+        self.trees = None
+        if TREE_EVALUATOR == 'off':
+            return
+        
+        try:
+            trees = self.pipeline_data.get('compiled_trees')
+            if self.model is not None:
+                if not np.isnan(self.model.missing):
+                    raise ValueError(f"model uses missing={self.model.missing}")
+                if trees is None:
+                    trees = CompiledTrees.from_booster(self.model.get_booster())
+                X = random_rows(64, trees.split_features(), trees.num_feature)
+                difference = np.abs(trees.predict_proba(X) - self.model.predict_proba(X)).max()
+                if difference > TOLERANCE:
+                    raise ValueError(f"probabilities differ from XGBoost by {difference:.2e}")
+            self.trees = trees
+        except Exception as e:
+            logger.warning(f"⚠️ NumPy tree evaluator unavailable, using XGBoost: {e}")
+            return
+        
+        if self.trees is not None:
+            if TREE_EVALUATOR == 'only' or self.model is None:
+                scope = 'every request'
+            else:
+                scope = f'requests of up to {TREE_EVALUATOR_MAX_ROWS} rows'
+            logger.info(f"NumPy tree evaluator ready for {scope} ({len(self.trees.roots)} trees)")
+    
+    def _build_layout(self):
+        """Build the feature layout and enable the sparse path if the booster can be inspected"""
+        booster = None
+        if self.model is not None:
+            try:
+                booster = self.model.get_booster()
+            except Exception as e:
+                logger.warning(f"Could not inspect booster: {e}")
+        split_features = self.trees.split_features() if self.trees is not None else None
+        
+        try:
+            self.layout = FeatureLayout(self.feature_columns, self.vectorizers, booster, split_features)
+        except Exception as e:
+            logger.warning(f"Sparse feature path unavailable, using dense features: {e}")
+            self.layout = FeatureLayout(self.feature_columns, self.vectorizers)
+        self.layout.validate()
+        
+        self.sparse_ready = self.layout.split_slots is not None
+        if self.sparse_ready:
+            logger.info(f"Sparse feature path ready ({len(self.layout.split_slots)} split features)")
+    
     def _preprocess_text(self, text):
         """Preprocess text data"""
-        if pd.isna(text) or text is None:
-            return ""
-        
-        text = str(text).lower()
-        text = re.sub(r'[^a-zA-Z\s]', '', text)
-        text = re.sub(r'\s+', ' ', text).strip()
+        return preprocess_text(text)
+    
+    def _document_features(self, texts):
+        """Preprocess a list of documents and compute their statistical features"""
+        raw = list(texts)
+        processed = [self._preprocess_text(text) for text in raw]
         
-        return text
+        return processed, text_statistics_batch(raw, processed)
     
     def _create_text_features(self, resume_text, job_description):
-        """Create text features for the advanced model"""
-        # Create DataFrame
-        data = {
-            'resume_text': [resume_text],
-            'job_description_text': [job_description]
-        }
-        df = pd.DataFrame(data)
+        """Create text features for the advanced model (dense fallback path)"""
+        layout = self.layout
+        X_features = np.zeros((1, layout.n_features), dtype=np.float32 if self.lean else np.float64)
         
-        # Preprocess text
-        df['resume_text_processed'] = df['resume_text'].apply(self._preprocess_text)
-        df['job_description_text_processed'] = df['job_description_text'].apply(self._preprocess_text)
+        for col_name, text in zip(TEXT_COLUMNS, (resume_text, job_description)):
+            processed, stats = self._document_features([text])
+            _scatter(X_features[0], layout.stat_slots[col_name], stats[0])
+            
+            # Add TF-IDF features
+            if col_name in self.vectorizers:
+                tfidf_matrix = self.vectorizers[col_name].transform(processed)
+                if self.lean:
+                    # Scatter the stored entries only; no dense 5k-wide TF-IDF row
+                    _scatter(X_features[0], layout.tfidf_slots[col_name][tfidf_matrix.indices], tfidf_matrix.data)
+                else:
+                    _scatter(X_features[0], layout.tfidf_slots[col_name], tfidf_matrix.toarray()[0])
         
-        # Create statistical features
-        features = df.copy()
+        if self.lean:
+            return X_features
+        import pandas as pd  # Only the dense fallback needs pandas; keep it out of startup
+        return pd.DataFrame(X_features, columns=self.feature_columns)
+    
+    def _document_blocks(self, texts, col_name):
+        """
+        Featurize documents from one side into (positions, values) blocks in model column space,
+        taking already-seen documents from the side's feature cache
+        """
+        cache = self.feature_caches[col_name]
+        if cache.max_bytes <= 0:
+            return self._compute_document_blocks(texts, col_name)
         
-        # Resume features
-        features['resume_text_length'] = features['resume_text'].str.len().fillna(0)
-        features['resume_text_word_count'] = features['resume_text_processed'].str.split().str.len().fillna(0)
-        features['resume_text_unique_words'] = features['resume_text_processed'].apply(
-            lambda x: len(set(str(x).split())) if pd.notna(x) else 0
-        )
-        features['resume_text_avg_word_length'] = features['resume_text_processed'].apply(
-            lambda x: np.mean([len(word) for word in str(x).split()]) if pd.notna(x) and str(x).strip() else 0
-        )
-        features['resume_text_sentence_count'] = features['resume_text'].str.count(r'[.!?]').fillna(0)
-        features['resume_text_capital_ratio'] = features['resume_text'].apply(
-            lambda x: sum(1 for c in str(x) if c.isupper()) / len(str(x)) if pd.notna(x) and len(str(x)) > 0 else 0
-        )
+        # Lean and regular blocks differ in format, so the mode is part of the key
+        keys = [cache.make_key(text, 'lean' if self.lean else 'full') for text in texts]
+        blocks = [cache.get(key) for key in keys]
+        missing = [i for i, block in enumerate(blocks) if block is None]
+        if missing:
+            computed = self._compute_document_blocks([texts[i] for i in missing], col_name)
+            for i, block in zip(missing, computed):
+                blocks[i] = block
+                cache.put(keys[i], block)
         
-        # Job description features
-        features['job_description_text_length'] = features['job_description_text'].str.len().fillna(0)
-        features['job_description_text_word_count'] = features['job_description_text_processed'].str.split().str.len().fillna(0)
-        features['job_description_text_unique_words'] = features['job_description_text_processed'].apply(
-            lambda x: len(set(str(x).split())) if pd.notna(x) else 0
-        )
-        features['job_description_text_avg_word_length'] = features['job_description_text_processed'].apply(
-            lambda x: np.mean([len(word) for word in str(x).split()]) if pd.notna(x) and str(x).strip() else 0
-        )
-        features['job_description_text_sentence_count'] = features['job_description_text'].str.count(r'[.!?]').fillna(0)
-        features['job_description_text_capital_ratio'] = features['job_description_text'].apply(
-            lambda x: sum(1 for c in str(x) if c.isupper()) / len(str(x)) if pd.notna(x) and len(str(x)) > 0 else 0
-        )
+        return blocks
+    
+    def feature_cache_stats(self):
+        return {col_name: cache.stats() for col_name, cache in self.feature_caches.items()}
+    
+    def _compute_document_blocks(self, texts, col_name):
+        """Featurize documents from one side into (positions, values) blocks in model column space"""
+        processed, stat_values = self._document_features(texts)
+        stat_positions = self.layout.stat_slots[col_name]
         
-        # Extract numerical features
-        feature_cols = [col for col in features.columns if col.endswith(('_length', '_word_count', '_unique_words', '_avg_word_length', '_sentence_count', '_capital_ratio'))]
-        X_features = features[feature_cols].fillna(0)
+        # One transform call for every document on this side
+        tfidf = self.vectorizers[col_name].transform(processed).tocsr()
+        tfidf_positions = self.layout.tfidf_slots[col_name]
         
-        # Add TF-IDF features
-        for col_name, vectorizer in self.vectorizers.items():
-            if col_name == 'resume_text':
-                processed_col = 'resume_text_processed'
-            else:  # job_description_text
-                processed_col = 'job_description_text_processed'
-            
-            text_data = features[processed_col].fillna('').astype(str)
-            tfidf_matrix = vectorizer.transform(text_data)
+        blocks = []
+        for i in range(len(processed)):
+            start, end = tfidf.indptr[i], tfidf.indptr[i + 1]
+            positions = np.concatenate([stat_positions, tfidf_positions[tfidf.indices[start:end]]])
+            values = np.concatenate([stat_values[i], tfidf.data[start:end]])
+            if self.lean:
+                # Drop unused features once per document, not once per pair
+                used = positions >= 0
+                positions, values = positions[used], values[used].astype(np.float32)
+            blocks.append((positions, values))
+        
+        return blocks
+    
+    def _assemble_sparse_rows(self, rows):
+        """Build a CSR matrix in the trained column order from per-row lists of blocks"""
+        if self.lean:
+            return self._assemble_lean_rows(rows)
+        indptr = [0]
+        all_positions = []
+        all_values = []
+        
+        for blocks in rows:
+            positions = np.concatenate([block[0] for block in blocks])
+            values = np.concatenate([block[1] for block in blocks])
+            present = positions >= 0
+            positions, values = positions[present], values[present]
             
-            # Create TF-IDF DataFrame
-            feature_names = [f'{col_name}_tfidf_{i}' for i in range(tfidf_matrix.shape[1])]
-            tfidf_df = pd.DataFrame(tfidf_matrix.toarray(), columns=feature_names)
+            # Explicit zeros for split features that are not already present
+            zeros = np.setdiff1d(self.layout.split_slots, positions, assume_unique=True)
+            positions = np.concatenate([positions, zeros])
+            values = np.concatenate([values, np.zeros(len(zeros))])
             
-            X_features = pd.concat([X_features, tfidf_df], axis=1)
+            order = np.argsort(positions, kind='stable')
+            all_positions.append(positions[order])
+            all_values.append(values[order])
+            indptr.append(indptr[-1] + len(positions))
+        
+        return sp.csr_matrix(
+            (np.concatenate(all_values), np.concatenate(all_positions), np.array(indptr)),
+            shape=(len(rows), self.layout.n_features)
+        )
+    
+    def _assemble_lean_rows(self, rows):
+        """
+        Lean version of _assemble_sparse_rows: each row is scattered into the thread's scratch
+        buffers, whose presence mask already holds the split features, and read back in column
+        order straight into preallocated float32 / int32 CSR arrays (no concatenate, setdiff
+        or argsort copies per row)
+        """
+        split_slots = self.layout.split_slots
+        values_row, present = _row_buffers.get(self.layout.n_features)
         
-        # Ensure all required features are present
-        missing_features = set(self.feature_columns) - set(X_features.columns)
-        for feature in missing_features:
-            X_features[feature] = 0
+        # Upper bound on the stored entries; the unused tail is sliced off at the end
+        capacity = sum(len(split_slots) + sum(len(block[0]) for block in blocks) for blocks in rows)
+        # scipy would upcast mixed index dtypes with a copy, so indices and indptr share one
+        index_dtype = np.int32 if capacity < np.iinfo(np.int32).max else np.int64
+        data = np.empty(capacity, dtype=np.float32)
+        indices = np.empty(capacity, dtype=index_dtype)
+        indptr = np.zeros(len(rows) + 1, dtype=index_dtype)
         
-        # Reorder columns to match training data
-        X_features = X_features[self.feature_columns].fillna(0)
+        nnz = 0
+        present[split_slots] = True
+        try:
+            for r, blocks in enumerate(rows):
+                for positions, values in blocks:
+                    values_row[positions] = values
+                    present[positions] = True
+                slots = np.flatnonzero(present)
+                end = nnz + len(slots)
+                indices[nnz:end] = slots
+                data[nnz:end] = values_row[slots]
+                indptr[r + 1] = nnz = end
+                
+                # Back to the split-features-only state for the next row
+                values_row[slots] = 0
+                present[slots] = False
+                present[split_slots] = True
+        finally:
+            values_row[:] = 0
+            present[:] = False
         
-        return X_features
+        return sp.csr_matrix((data[:nnz], indices[:nnz], indptr), shape=(len(rows), self.layout.n_features))
+    
+    def _create_sparse_features(self, resume_text, job_description):
+        """Create features as a single CSR row in the trained column order"""
+        resume_blocks = self._document_blocks([resume_text], 'resume_text')
+        job_blocks = self._document_blocks([job_description], 'job_description_text')
+        
+        return self._assemble_sparse_rows([(resume_blocks[0], job_blocks[0])])
+    
+    def _predict_proba(self, X_features):
+        """Class probabilities, from the NumPy tree evaluator for small requests"""
+        n_rows = X_features.shape[0]
+        use_trees = self.trees is not None and (
+            self.model is None or TREE_EVALUATOR == 'only' or n_rows <= TREE_EVALUATOR_MAX_ROWS
+        )
+        with span('predict_proba', rows=n_rows, evaluator='numpy' if use_trees else 'xgboost'):
+            if use_trees:
+                return self.trees.predict_proba(X_features)
+            return self.model.predict_proba(X_features)
+    
+    def _format_result(self, prediction_proba):
+        """Convert one row of class probabilities into a prediction result"""
+        # predict() is the argmax of predict_proba for multi-class
+        prediction = int(np.argmax(prediction_proba))
+        
+        # Convert back to original labels
+        predicted_class = self.label_encoder.inverse_transform([prediction])[0]
+        
+        return {
+            'prediction': predicted_class,
+            'confidence': float(max(prediction_proba)),
+            'probabilities': dict(zip(self.target_names, prediction_proba.astype(float))),
+            'model_type': 'advanced_ml'
+        }
     
     def predict_advanced(self, resume_text, job_description):
         """Make prediction using advanced ML model"""
@@ -157,80 +571,121 @@ class AdvancedFitClassifier:
             return None
         
         try:
-            # Create features
-            X_features = self._create_text_features(resume_text, job_description)
+            # Create features, preferring the sparse path
+            X_features = None
+            with span('features', text_size(resume_text, job_description), rows=1) as stage:
+                if self.sparse_ready:
+                    try:
+                        X_features = self._create_sparse_features(resume_text, job_description)
+                    except Exception as e:
+                        logger.warning(f"Sparse feature path failed, using dense fallback: {e}")
+                if X_features is None:
+                    stage.set(path='dense')
+                    X_features = self._create_text_features(resume_text, job_description)
             
             # Make prediction
-            prediction = self.model.predict(X_features)[0]
-            prediction_proba = self.model.predict_proba(X_features)[0]
+            prediction_proba = self._predict_proba(X_features)[0]
             
-            # Convert back to original labels
-            predicted_class = self.label_encoder.inverse_transform([prediction])[0]
-            
-            # Create result
-            result = {
-                'prediction': predicted_class,
-                'confidence': float(max(prediction_proba)),
-                'probabilities': dict(zip(self.target_names, prediction_proba.astype(float))),
-                'model_type': 'advanced_ml'
-            }
-            
-            return result
+            return self._format_result(prediction_proba)
             
         except Exception as e:
             logger.error(f"Error in advanced prediction: {e}")
             return None
     
-    def predict_basic(self, match_score, num_matched, num_missing):
-        """Fallback basic prediction method"""
+    def predict_advanced_batch(self, resume_texts, job_descriptions, cross_product=False):
+        """
+        Score many resume/job pairs with one model call
+        
+        Args:
+            resume_texts (list): Resume texts
+            job_descriptions (list): Job description texts
+            cross_product (bool): Score every resume against every job description
+                (resume-major order) instead of pairing the lists element-wise.
+                In element-wise mode a single-item list is paired with every item of the other.
+        
+        Returns:
+            list: One result dict per pair in input order, or None if the model is unavailable
+        """
+        if not self.is_loaded:
+            return None
+        
         try:
-            # Load or create basic model
-            basic_model_path = Path(__file__).parent / 'fit_classifier.pkl'
+            resume_texts = list(resume_texts)
+            job_descriptions = list(job_descriptions)
+            pairs = _pair_indices(len(resume_texts), len(job_descriptions), cross_product)
+            if not pairs:
+                return []
             
-            if basic_model_path.exists():
-                with open(basic_model_path, 'rb') as f:
-                    import pickle
-                    clf = pickle.load(f)
-            else:
-                # Create basic model
-                from sklearn.ensemble import RandomForestClassifier
-                X = [
-                    [100, 10, 0], [90, 9, 1], [80, 8, 2], [70, 7, 3], [60, 6, 4],
-                    [50, 5, 5], [40, 4, 6], [30, 3, 7], [20, 2, 8], [10, 1, 9], [0, 0, 10]
-                ]
-                y = [1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0]
-                clf = RandomForestClassifier(n_estimators=50, random_state=42)
-                clf.fit(X, y)
+            if not self.sparse_ready:
+                return [self.predict_advanced(resume_texts[i], job_descriptions[j]) for i, j in pairs]
+            
+            # Featurize each distinct document once per side
+            unique_resumes = list(dict.fromkeys(resume_texts))
+            unique_jobs = list(dict.fromkeys(job_descriptions))
+            with span('features', text_size(*unique_resumes, *unique_jobs), rows=len(pairs)):
+                resume_slot = {text: i for i, text in enumerate(unique_resumes)}
+                job_slot = {text: i for i, text in enumerate(unique_jobs)}
+                resume_blocks = self._document_blocks(unique_resumes, 'resume_text')
+                job_blocks = self._document_blocks(unique_jobs, 'job_description_text')
                 
-                with open(basic_model_path, 'wb') as f:
-                    import pickle
-                    pickle.dump(clf, f)
+                X_features = self._assemble_sparse_rows([
+                    (resume_blocks[resume_slot[resume_texts[i]]], job_blocks[job_slot[job_descriptions[j]]])
+                    for i, j in pairs
+                ])
             
-            X = np.array([[match_score, num_matched, num_missing]])
-            pred = clf.predict(X)[0]
-            prob = clf.predict_proba(X)[0][1]
+            # Single model call for the whole batch
+            prediction_proba = self._predict_proba(X_features)
             
-            # Convert to advanced format
-            result = {
-                'prediction': 'Good Fit' if pred == 1 else 'No Fit',
-                'confidence': float(prob) if pred == 1 else float(1 - prob),
-                'probabilities': {'Good Fit': float(prob), 'No Fit': float(1 - prob)},
-                'model_type': 'basic'
-            }
+            return [self._format_result(row) for row in prediction_proba]
             
-            return result
+        except Exception as e:
+            logger.error(f"Error in advanced batch prediction: {e}")
+            return None
+    
+    def predict_basic(self, match_score, num_matched, num_missing):
+        """Fallback basic prediction method"""
+        return self.predict_basic_batch([match_score], [num_matched], [num_missing])[0]
+    
+    def predict_basic_batch(self, match_scores, num_matched, num_missing):
+        """Basic predictions for many pairs with one lookup-table read"""
+        try:
+            with span('predict_basic', rows=len(match_scores)):
+                good_fit_proba, is_good_fit = get_basic_model().predict_batch(match_scores, num_matched, num_missing)
+            
+            # Convert to advanced format
+            return [
+                {
+                    'prediction': 'Good Fit' if good else 'No Fit',
+                    'confidence': float(prob) if good else float(1 - prob),
+                    'probabilities': {'Good Fit': float(prob), 'No Fit': float(1 - prob)},
+                    'model_type': 'basic'
+                }
+                for prob, good in zip(good_fit_proba, is_good_fit)
+            ]
             
         except Exception as e:
             logger.error(f"Error in basic prediction: {e}")
-            return {
-                'prediction': 'No Fit',
-                'confidence': 0.5,
-                'probabilities': {'Good Fit': 0.3, 'No Fit': 0.7},
-                'model_type': 'fallback'
-            }
+            return [_fallback_result() for _ in match_scores]
+
+# Global classifier instance, created on first use so importing this module stays cheap
+_classifier = None
+_classifier_lock = threading.Lock()
+
+def get_classifier():
+    """Return the shared AdvancedFitClassifier, loading the model on first call"""
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                _classifier = AdvancedFitClassifier()
+    return _classifier
 
-# Global classifier instance
-_classifier = AdvancedFitClassifier()
+def count_predictions(results):
+    """Count predictions per model type (advanced_ml / basic / fallback) for the tracing metrics"""
+    if not is_enabled():
+        return
+    for model_type, n in Counter(result['model_type'] for result in results).items():
+        count('predictions', n, model_type=model_type)
 
 def predict_fit(resume_text=None, job_description=None, match_score=None, num_matched=None, num_missing=None):
     """
@@ -246,29 +701,92 @@ def predict_fit(resume_text=None, job_description=None, match_score=None, num_ma
     Returns:
         dict: Prediction result with confidence and probabilities
     """
-    # Try advanced model first if we have text data
-    if resume_text and job_description and _classifier.is_loaded:
-        result = _classifier.predict_advanced(resume_text, job_description)
-        if result:
-            logger.info(f"🚀 Advanced ML prediction: {result['prediction']} ({result['confidence']:.3f})")
+    with profile_request('predict_fit', resume_text=resume_text, job_description=job_description,
+                         match_score=match_score, num_matched=num_matched, num_missing=num_missing):
+        classifier = get_classifier()
+    
+        # Try advanced model first if we have text data
+        if resume_text and job_description and classifier.is_loaded:
+            result = classifier.predict_advanced(resume_text, job_description)
+            if result:
+                logger.info(f"🚀 Advanced ML prediction: {result['prediction']} ({result['confidence']:.3f})")
+                count_predictions([result])
+                return result
+    
+        # Fall back to basic model
+        if match_score is not None and num_matched is not None and num_missing is not None:
+            result = classifier.predict_basic(match_score, num_matched, num_missing)
+            logger.info(f"📊 Basic prediction: {result['prediction']} ({result['confidence']:.3f})")
+            count_predictions([result])
             return result
     
-    # Fall back to basic model
-    if match_score is not None and num_matched is not None and num_missing is not None:
-        result = _classifier.predict_basic(match_score, num_matched, num_missing)
-        logger.info(f"📊 Basic prediction: {result['prediction']} ({result['confidence']:.3f})")
+        # Ultimate fallback
+        logger.warning("Using fallback prediction")
+        result = _fallback_result()
+        count_predictions([result])
         return result
+
+def predict_fit_batch(resume_texts=None, job_descriptions=None, match_scores=None, num_matched=None,
+                      num_missing=None, cross_product=False):
+    """
+    Batch version of predict_fit for scoring many resume/job pairs at once
     
-    # Ultimate fallback
-    logger.warning("Using fallback prediction")
-    return {
-        'prediction': 'No Fit',
-        'confidence': 0.5,
-        'probabilities': {'Good Fit': 0.3, 'No Fit': 0.7},
-        'model_type': 'fallback'
-    }
+    Args:
+        resume_texts (list): Resume texts
+        job_descriptions (list): Job description texts
+        match_scores (list): Per-pair match percentages (for basic model fallback)
+        num_matched (list): Per-pair numbers of matched skills (for basic model fallback)
+        num_missing (list): Per-pair numbers of missing skills (for basic model fallback)
+        cross_product (bool): Score every resume against every job description (resume-major
+            order); otherwise lists are paired element-wise and a single-item list is broadcast
+    
+    Returns:
+        list: One prediction dict per pair in input order, shaped like predict_fit's result
+    """
+    resume_texts = list(resume_texts or [])
+    job_descriptions = list(job_descriptions or [])
+    
+    if resume_texts and job_descriptions:
+        pairs = _pair_indices(len(resume_texts), len(job_descriptions), cross_product)
+    else:
+        pairs = [(None, None)] * len(match_scores or [])
+    
+    results = [None] * len(pairs)
+    classifier = get_classifier()
+    
+    # Advanced model for every pair that has both texts, in a single batch
+    if classifier.is_loaded:
+        scored = [k for k, (i, j) in enumerate(pairs)
+                  if i is not None and resume_texts[i] and job_descriptions[j]]
+        if scored:
+            batch = classifier.predict_advanced_batch(
+                [resume_texts[pairs[k][0]] for k in scored],
+                [job_descriptions[pairs[k][1]] for k in scored]
+            )
+            if batch:
+                for k, result in zip(scored, batch):
+                    results[k] = result
+                logger.info(f"🚀 Advanced ML batch prediction for {len(scored)} pairs")
+    
+    # Fall back to basic model (one batched lookup), then to the ultimate fallback, per pair
+    remaining = [k for k in range(len(pairs)) if results[k] is None]
+    has_basic = match_scores is not None and num_matched is not None and num_missing is not None
+    if remaining and has_basic:
+        basic = classifier.predict_basic_batch(
+            [match_scores[k] for k in remaining],
+            [num_matched[k] for k in remaining],
+            [num_missing[k] for k in remaining]
+        )
+        for k, result in zip(remaining, basic):
+            results[k] = result
+    else:
+        for k in remaining:
+            results[k] = _fallback_result()
+    
+    count_predictions(results)
+    return results
 
 # Legacy function for backward compatibility
 def load_fit_classifier():
     """Legacy function for backward compatibility"""
-    return _classifier
+    return get_classifier()
@@ -0,0 +1,363 @@
+"""
+Local HTTP inference service for fit prediction and skill extraction
+
+Concurrent /predict requests are queued and coalesced into micro-batches (up to
+max_batch pairs, waiting at most max_wait_ms after the first request of a batch)
+before one predict_advanced_batch call. Standard library only, besides the model stack.
+
+Endpoints:
+    POST /predict   {"resume_text", "job_description"[, "match_score", "num_matched", "num_missing"]}
+    POST /skills    {"text"}
+    GET  /healthz   process is up
+    GET  /readyz    model is loaded (503 until then)
+    GET  /metrics   request counts, throughput, p50/p99 latency and batch sizes
+    GET  /metrics/prometheus   per-stage tracing metrics (tracing.py) in Prometheus text format
+
+Usage:
+    python src/inference_server.py serve [--port 8000] [--max-batch 32] [--max-wait-ms 10] [--trace]
+    python src/inference_server.py bench [--url URL] [--concurrency 16] [--requests 400]
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from fit_classifier import count_predictions, get_classifier, predict_fit
+from skills import extract_skills
+from tracing import enable as enable_tracing, prometheus_text
+
+logger = logging.getLogger(__name__)
+
+SERVER_MAX_BATCH = int(os.getenv('SERVER_MAX_BATCH', '32'))
+SERVER_MAX_WAIT_MS = float(os.getenv('SERVER_MAX_WAIT_MS', '10'))
+# Latency samples kept per endpoint for the percentiles in /metrics
+LATENCY_WINDOW = 10000
+
+class MicroBatcher:
+    """
+    Queue of prediction requests served by one worker thread in micro-batches.
+
+    The worker takes the first waiting request, then keeps collecting until the batch holds
+    max_batch requests or max_wait_ms has passed since that first request, and calls
+    batch_fn once for the whole batch.
+    """
+
+    def __init__(self, batch_fn, max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_MAX_WAIT_MS):
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.max_batch_seen = 0
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Batch prediction failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+            with self._lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.max_batch_seen = max(self.max_batch_seen, len(batch))
+
+    def stats(self):
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'items': self.items,
+                'mean_batch_size': self.items / self.batches if self.batches else 0.0,
+                'max_batch_size': self.max_batch_seen,
+                'queue_depth': self._queue.qsize(),
+            }
+
+class LatencyStats:
+    """Per-endpoint request counts, errors and a sliding window of latencies"""
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self.window = window
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._endpoints = {}
+
+    def record(self, endpoint, seconds, error=False):
+        with self._lock:
+            stats = self._endpoints.setdefault(
+                endpoint, {'count': 0, 'errors': 0, 'latencies': deque(maxlen=self.window)}
+            )
+            stats['count'] += 1
+            stats['errors'] += int(error)
+            stats['latencies'].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            uptime = time.monotonic() - self.started
+            report = {'uptime_seconds': uptime, 'endpoints': {}}
+            for endpoint, stats in self._endpoints.items():
+                latencies = np.array(stats['latencies'])
+                report['endpoints'][endpoint] = {
+                    'count': stats['count'],
+                    'errors': stats['errors'],
+                    'throughput_rps': stats['count'] / uptime if uptime else 0.0,
+                    'p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else None,
+                    'p99_ms': float(np.percentile(latencies, 99) * 1000) if len(latencies) else None,
+                }
+            return report
+
+def _predict_batch(items):
+    """Score a micro-batch of /predict payloads with one model call where possible"""
+    classifier = get_classifier()
+    results = [None] * len(items)
+    scored = [k for k, item in enumerate(items) if item.get('resume_text') and item.get('job_description')]
+    if scored and classifier.is_loaded:
+        batch = classifier.predict_advanced_batch(
+            [items[k]['resume_text'] for k in scored],
+            [items[k]['job_description'] for k in scored]
+        )
+        for k, result in zip(scored, batch or []):
+            results[k] = result
+        count_predictions(batch or [])
+
+    # Anything the advanced model did not score goes through the usual fallbacks
+    for k, item in enumerate(items):
+        if results[k] is None:
+            results[k] = predict_fit(
+                resume_text=item.get('resume_text'),
+                job_description=item.get('job_description'),
+                match_score=item.get('match_score'),
+                num_matched=item.get('num_matched'),
+                num_missing=item.get('num_missing')
+            )
+    return results
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # The default listen backlog of 5 drops connections under concurrent load (1 s SYN retries)
+    request_queue_size = 128
+
+    def __init__(self, address, max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_MAX_WAIT_MS):
+        super().__init__(address, InferenceHandler)
+        self.batcher = MicroBatcher(_predict_batch, max_batch, max_wait_ms)
+        self.latency = LatencyStats()
+        self.ready = threading.Event()
+        # Load the model in the background; /readyz reports 503 until it is done
+        threading.Thread(target=self._warm_up, daemon=True).start()
+
+    def _warm_up(self):
+        classifier = get_classifier()
+        if classifier.is_loaded:
+            logger.info("✅ Inference server ready")
+        else:
+            logger.warning("⚠️ Advanced model not loaded; serving basic predictions only")
+        self.ready.set()
+
+class InferenceHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        start = time.perf_counter()
+        if self.path == '/healthz':
+            self._send(200, {'status': 'ok'})
+        elif self.path == '/readyz':
+            ready = self.server.ready.is_set()
+            self._send(200 if ready else 503, {'ready': ready, 'model_loaded': ready and get_classifier().is_loaded})
+        elif self.path == '/metrics':
+            report = self.server.latency.snapshot()
+            report['batcher'] = self.server.batcher.stats()
+            if self.server.ready.is_set():
+                report['feature_cache'] = get_classifier().feature_cache_stats()
+            self._send(200, report)
+        elif self.path == '/metrics/prometheus':
+            self._send_text(200, prometheus_text(), 'text/plain; version=0.0.4')
+        else:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+            return
+        if not self.path.startswith('/metrics'):
+            self.server.latency.record(self.path, time.perf_counter() - start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        status = 200
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            if not isinstance(payload, dict):
+                raise ValueError('Request body must be a JSON object')
+
+            if self.path == '/predict':
+                status, body = 200, self.server.batcher.submit(payload).result()
+            elif self.path == '/skills':
+                status, body = 200, {'skills': extract_skills(str(payload.get('text', '')))}
+            else:
+                status, body = 404, {'error': f'Unknown path {self.path}'}
+        except ValueError as e:
+            status, body = 400, {'error': f'Invalid request: {e}'}
+        except Exception as e:
+            logger.error(f"Error handling {self.path}: {e}")
+            status, body = 500, {'error': str(e)}
+
+        self._send(status, body)
+        if status != 404:
+            self.server.latency.record(self.path, time.perf_counter() - start, error=status >= 400)
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_text(self, status, text, content_type):
+        data = text.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_server(host='127.0.0.1', port=0, max_batch=SERVER_MAX_BATCH, max_wait_ms=SERVER_MAX_WAIT_MS):
+    """Start the service on a background thread; returns the server (port 0 picks a free port)"""
+    server = InferenceServer((host, port), max_batch, max_wait_ms)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def _request(url, payload=None, timeout=60):
+    data = None if payload is None else json.dumps(payload).encode()
+    request = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read() or b'{}')
+
+def run_load(url, payloads, concurrency):
+    """
+    Send payloads to url/predict from `concurrency` client threads
+
+    Returns:
+        dict: Client-side throughput and p50/p99 latency
+    """
+    def send(payload):
+        start = time.perf_counter()
+        status, _ = _request(f'{url}/predict', payload)
+        return time.perf_counter() - start, status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, payloads))
+    elapsed = time.perf_counter() - start
+    latencies = np.array([seconds for seconds, _ in results])
+    return {
+        'requests': len(payloads),
+        'errors': sum(status != 200 for _, status in results),
+        'throughput_rps': len(payloads) / elapsed,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(latencies, 99) * 1000),
+    }
+
+def _bench_payloads(n, seed=0):
+    rng = np.random.default_rng(seed)
+    words = ('python java django flask aws docker kubernetes team lead engineer data science machine learning '
+             'sql postgres react node api rest senior junior manager communication agile scrum built designed').split()
+    resumes = [' '.join(rng.choice(words, 300)) for _ in range(50)]
+    jobs = [' '.join(rng.choice(words, 120)) for _ in range(10)]
+    return [{'resume_text': resumes[i % len(resumes)], 'job_description': jobs[i % len(jobs)]} for i in range(n)]
+
+def _wait_ready(url, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if _request(f'{url}/readyz', timeout=5)[0] == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f'{url} did not become ready within {timeout}s')
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit prediction and skill extraction HTTP service')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    serve_parser = subparsers.add_parser('serve')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    serve_parser.add_argument('--max-batch', type=int, default=SERVER_MAX_BATCH)
+    serve_parser.add_argument('--max-wait-ms', type=float, default=SERVER_MAX_WAIT_MS)
+    serve_parser.add_argument('--trace', action='store_true', help='Enable per-stage tracing (also TRACING_ENABLED=1)')
+    bench_parser = subparsers.add_parser('bench', help='Load test; starts local servers unless --url is given')
+    bench_parser.add_argument('--url', default=None)
+    bench_parser.add_argument('--concurrency', type=int, default=16)
+    bench_parser.add_argument('--requests', type=int, default=400)
+    bench_parser.add_argument('--max-batch', type=int, default=SERVER_MAX_BATCH)
+    bench_parser.add_argument('--max-wait-ms', type=float, default=SERVER_MAX_WAIT_MS)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == 'serve':
+        if args.trace:
+            enable_tracing()
+        server = InferenceServer((args.host, args.port), args.max_batch, args.max_wait_ms)
+        logger.info(f"Serving on http://{args.host}:{server.server_address[1]}")
+        server.serve_forever()
+        return
+
+    payloads = _bench_payloads(args.requests)
+    if args.url:
+        targets = [('remote', args.url)]
+    else:
+        # Compare batching against one request per model call on the same process
+        targets = []
+        for label, max_batch in (('no batching', 1), (f'batch<={args.max_batch}', args.max_batch)):
+            server = start_server(max_batch=max_batch, max_wait_ms=args.max_wait_ms)
+            targets.append((label, f'http://127.0.0.1:{server.server_address[1]}'))
+
+    for label, url in targets:
+        _wait_ready(url)
+        run_load(url, payloads[:args.concurrency], args.concurrency)  # Warm-up
+        result = run_load(url, payloads, args.concurrency)
+        batcher = _request(f'{url}/metrics')[1]['batcher']
+        print(f"{label:>14}: {result['throughput_rps']:7.1f} req/s  p50 {result['p50_ms']:7.1f} ms  "
+              f"p99 {result['p99_ms']:7.1f} ms  errors {result['errors']}  "
+              f"mean batch {batcher['mean_batch_size']:.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,377 @@
+"""
+Near-duplicate job description detection with MinHash/LSH
+
+Job boards repost the same description with trivial edits (a changed location line, an extra
+"apply now", different punctuation). Each description is normalized exactly like the model
+input (fit_classifier.preprocess_text), cut into word shingles and summarized by a MinHash
+signature; LSH banding finds candidate duplicates in constant time and the signature estimate
+of the Jaccard similarity confirms them against a configurable threshold.
+
+JobDescriptionCache serves extracted skills and fit predictions computed for the first copy
+of a description to its near-duplicates, skipping skill extraction and model calls.
+
+Usage:
+    python src/jd_dedup.py report [--jobs 2000] [--duplicate-rate 0.4] [--threshold 0.8]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import time
+import zlib
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+from fit_classifier import preprocess_text
+
+logger = logging.getLogger(__name__)
+
+DEDUP_THRESHOLD = float(os.getenv('DEDUP_THRESHOLD', '0.8'))
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+MAX_CACHED_FITS = int(os.getenv('DEDUP_MAX_CACHED_FITS', '10000'))
+
+def _lsh_params(threshold, num_perm):
+    """
+    Bands and rows per band (bands * rows == num_perm) with the highest S-curve midpoint
+    (1 / bands) ** (1 / rows) at or below the threshold. Candidates are verified against the
+    signatures, so erring towards more candidates costs time but not precision.
+    """
+    options = [(num_perm // rows, rows) for rows in range(1, num_perm + 1) if num_perm % rows == 0]
+    return max((option for option in options if (1 / option[0]) ** (1 / option[1]) <= threshold),
+               key=lambda option: option[1], default=options[0])
+
+class MinHasher:
+    """MinHash signatures of word shingles over preprocess_text-normalized text"""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.default_rng(seed)
+        # Multiply-add-shift hashing h(x) = ((a * x + b) mod 2^64) >> 32 with a, b uniform 64-bit:
+        # strongly universal for the 32-bit shingle hashes, and uint64 arithmetic wraps mod 2^64
+        # by itself. (With small a and b, (a * x + b) would be increasing in x, so every
+        # permutation would pick the same minimum shingle.)
+        self._a = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+        self._b = rng.integers(0, np.iinfo(np.uint64).max, num_perm, dtype=np.uint64, endpoint=True)
+
+    def shingles(self, text):
+        """Distinct 32-bit hashes of the word shingles of a document"""
+        words = preprocess_text(text).split()
+        if not words:
+            return np.array([], dtype=np.uint64)
+        size = min(self.shingle_size, len(words))
+        hashes = {zlib.crc32(' '.join(words[i:i + size]).encode('utf-8')) for i in range(len(words) - size + 1)}
+        return np.fromiter(hashes, dtype=np.uint64, count=len(hashes))
+
+    def signature(self, text):
+        """uint32 signature of length num_perm, or None for a document without words"""
+        shingles = self.shingles(text)
+        if not len(shingles):
+            return None
+        hashed = (np.outer(shingles, self._a) + self._b) >> np.uint64(32)
+        return hashed.min(axis=0).astype(np.uint32)
+
+class NearDuplicateIndex:
+    """
+    LSH index of MinHash signatures
+
+    query() returns the indexed key whose estimated Jaccard similarity is highest and at least
+    the threshold, or None.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = _lsh_params(threshold, num_perm)
+        self._buckets = [{} for _ in range(self.bands)]
+        self._signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self._count = 0
+        self.keys = []
+
+    def __len__(self):
+        return self._count
+
+    def _band_keys(self, signature):
+        # Hashed band slices: int keys are smaller than bytes, and a collision only adds a candidate
+        # that the signature comparison in query() rejects
+        return [hash(signature[band * self.rows:(band + 1) * self.rows].tobytes()) for band in range(self.bands)]
+
+    def add(self, key, signature):
+        if self._count == len(self._signatures):
+            # Grow geometrically; signatures live in one contiguous array
+            grown = np.empty((max(64, 2 * len(self._signatures)), self.num_perm), dtype=np.uint32)
+            grown[:self._count] = self._signatures[:self._count]
+            self._signatures = grown
+        row = self._count
+        self._signatures[row] = signature
+        self.keys.append(key)
+        self._count += 1
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            # Most buckets hold one signature; store a bare row until a second one arrives
+            bucket = buckets.get(band_key)
+            if bucket is None:
+                buckets[band_key] = row
+            elif isinstance(bucket, list):
+                bucket.append(row)
+            else:
+                buckets[band_key] = [bucket, row]
+
+    def query(self, signature):
+        """
+        Returns:
+            tuple: (key, estimated Jaccard similarity) of the closest near-duplicate, or None
+        """
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, self._band_keys(signature)):
+            bucket = buckets.get(band_key)
+            if isinstance(bucket, list):
+                candidates.update(bucket)
+            elif bucket is not None:
+                candidates.add(bucket)
+        if not candidates:
+            return None
+        rows = np.fromiter(candidates, dtype=np.int64, count=len(candidates))
+        similarity = (self._signatures[rows] == signature).mean(axis=1)
+        best = int(np.argmax(similarity))
+        if similarity[best] < self.threshold:
+            return None
+        return self.keys[rows[best]], float(similarity[best])
+
+    def memory_bytes(self):
+        """Approximate bytes held: signatures plus bucket tables (dicts, band keys and rows)"""
+        total = self._count * self.num_perm * 4
+        for buckets in self._buckets:
+            total += sys.getsizeof(buckets)
+            for band_key, bucket in buckets.items():
+                total += sys.getsizeof(band_key) + sys.getsizeof(bucket)
+                if isinstance(bucket, list):
+                    total += sum(sys.getsizeof(row) for row in bucket)
+        return total
+
+def _text_key(text):
+    return hashlib.sha256((text or '').encode('utf-8')).hexdigest()
+
+class JobDescriptionCache:
+    """
+    Skills and fit predictions keyed by job description, shared between near-duplicates
+
+    The first copy of a description becomes the canonical entry; later copies whose estimated
+    Jaccard similarity reaches the threshold reuse its skills, and its fit prediction for the
+    same resume. Fit entries are kept in an LRU of max_fits items.
+    """
+
+    def __init__(self, threshold=DEDUP_THRESHOLD, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE,
+                 max_fits=MAX_CACHED_FITS):
+        self.hasher = MinHasher(num_perm, shingle_size)
+        self.index = NearDuplicateIndex(threshold, num_perm)
+        self._canonical = {}
+        self._skills = {}
+        self._fits = OrderedDict()
+        self.max_fits = max_fits
+        self.stats = {'lookups': 0, 'duplicates': 0, 'skill_calls': 0, 'skill_calls_skipped': 0,
+                      'model_calls': 0, 'model_calls_skipped': 0}
+
+    def canonical(self, jd_text):
+        """
+        Key of the canonical copy of jd_text, registering it if no near-duplicate is indexed
+
+        Returns:
+            tuple: (canonical key, is_duplicate)
+        """
+        self.stats['lookups'] += 1
+        key = _text_key(jd_text)
+        if key in self._canonical:
+            canonical = self._canonical[key]
+            self.stats['duplicates'] += canonical != key
+            return canonical, canonical != key
+
+        signature = self.hasher.signature(jd_text)
+        match = self.index.query(signature) if signature is not None else None
+        if match is not None:
+            canonical = match[0]
+        else:
+            canonical = key
+            if signature is not None:
+                self.index.add(key, signature)
+        self._canonical[key] = canonical
+        self.stats['duplicates'] += canonical != key
+        return canonical, canonical != key
+
+    def skills(self, jd_text, extract):
+        """Skills of jd_text, computing extract(jd_text) only for the first copy"""
+        canonical, _ = self.canonical(jd_text)
+        if canonical in self._skills:
+            self.stats['skill_calls_skipped'] += 1
+            return self._skills[canonical]
+        self.stats['skill_calls'] += 1
+        skills = extract(jd_text)
+        self._skills[canonical] = skills
+        return skills
+
+    def fit(self, resume_text, jd_text, predict):
+        """Fit prediction for a resume/job pair, computing predict(resume_text, jd_text) once per canonical job"""
+        canonical, _ = self.canonical(jd_text)
+        key = (_text_key(resume_text), canonical)
+        if key in self._fits:
+            self._fits.move_to_end(key)
+            self.stats['model_calls_skipped'] += 1
+            return self._fits[key]
+        self.stats['model_calls'] += 1
+        result = predict(resume_text, jd_text)
+        self._fits[key] = result
+        if len(self._fits) > self.max_fits:
+            self._fits.popitem(last=False)
+        return result
+
+def dedup_groups(texts, threshold=DEDUP_THRESHOLD):
+    """
+    Map each text to the position of its canonical copy (the first near-duplicate seen)
+
+    Returns:
+        list: canonical position per text; position i is canonical when result[i] == i
+    """
+    hasher = MinHasher()
+    index = NearDuplicateIndex(threshold)
+    groups = []
+    for position, text in enumerate(texts):
+        signature = hasher.signature(text)
+        match = index.query(signature) if signature is not None else None
+        if match is None:
+            groups.append(position)
+            if signature is not None:
+                index.add(position, signature)
+        else:
+            groups.append(match[0])
+    return groups
+
+def _repost(text, rng):
+    """A trivially edited copy: a changed word or two, a boilerplate line, different case and punctuation"""
+    words = text.split()
+    for _ in range(rng.integers(1, 3)):
+        words[rng.integers(len(words))] = rng.choice(['remote', 'hybrid', 'onsite', 'urgent', 'new'])
+    lines = [' '.join(words)]
+    if rng.random() < 0.5:
+        lines.append(rng.choice(['Apply now!', 'Equal opportunity employer.', 'Reposted 3 days ago']))
+    text = '\n'.join(lines)
+    return text.upper() if rng.random() < 0.2 else text.replace(' ', ', ', 1)
+
+def _sample_corpus(n_jobs, duplicate_rate, seed=0):
+    """Synthetic job descriptions where duplicate_rate of them are reposts of earlier ones"""
+    from vocab_pruning import _synthetic_documents
+    from fit_classifier import get_classifier
+
+    rng = np.random.default_rng(seed)
+    vectorizer = get_classifier().vectorizers['job_description_text']
+    n_unique = max(1, int(round(n_jobs * (1 - duplicate_rate))))
+    unique = _synthetic_documents(vectorizer, n_unique, 150, seed)
+    jobs, origin = list(unique), list(range(n_unique))
+    while len(jobs) < n_jobs:
+        source = int(rng.integers(n_unique))
+        jobs.append(_repost(unique[source], rng))
+        origin.append(source)
+    order = rng.permutation(n_jobs)
+    return [jobs[i] for i in order], [origin[i] for i in order]
+
+def report(n_jobs=2000, duplicate_rate=0.4, threshold=DEDUP_THRESHOLD, n_resumes=3, seed=0):
+    """
+    Run the cache over a sample corpus with known reposts
+
+    Returns:
+        dict: Detection quality, memory per signature, lookup latency, skipped calls and the
+        largest probability difference between a served prediction and a fresh one
+    """
+    from fit_classifier import get_classifier, predict_fit
+    from skills import extract_skills
+    from vocab_pruning import _synthetic_documents
+
+    logging.getLogger('fit_classifier').setLevel(logging.WARNING)
+    jobs, origin = _sample_corpus(n_jobs, duplicate_rate, seed)
+    resumes = _synthetic_documents(get_classifier().vectorizers['resume_text'], n_resumes, 300, seed + 1)
+
+    cache = JobDescriptionCache(threshold)
+    signature_seconds, lookup_seconds = [], []
+    first_of_origin, detected = {}, []
+    for position, text in enumerate(jobs):
+        start = time.perf_counter()
+        signature = cache.hasher.signature(text)
+        signature_seconds.append(time.perf_counter() - start)
+        if signature is not None:
+            start = time.perf_counter()
+            cache.index.query(signature)
+            lookup_seconds.append(time.perf_counter() - start)
+        canonical, is_duplicate = cache.canonical(text)
+        detected.append(is_duplicate)
+        first_of_origin.setdefault(origin[position], position)
+
+    truth = [first_of_origin[origin[i]] != i for i in range(n_jobs)]
+    true_positives = sum(d and t for d, t in zip(detected, truth))
+
+    # Score every resume against every job through the cache; compare served results with fresh ones
+    diffs, agreements = [], []
+    for text in jobs:
+        cache.skills(text, extract_skills)
+    for resume in resumes:
+        for text in jobs:
+            served = cache.fit(resume, text, predict_fit)
+            if cache.canonical(text)[1]:
+                fresh = predict_fit(resume, text)
+                diffs.append(max(abs(served['probabilities'][name] - fresh['probabilities'][name])
+                                 for name in fresh['probabilities']))
+                agreements.append(served['prediction'] == fresh['prediction'])
+
+    return {
+        'jobs': n_jobs,
+        'true_duplicates': sum(truth),
+        'detected_duplicates': sum(detected),
+        'precision': true_positives / max(1, sum(detected)),
+        'recall': true_positives / max(1, sum(truth)),
+        'bands_rows': [cache.index.bands, cache.index.rows],
+        'bytes_per_signature': cache.index.memory_bytes() / max(1, len(cache.index)),
+        'signature_us': float(np.median(signature_seconds) * 1e6),
+        'lookup_p50_us': float(np.percentile(lookup_seconds, 50) * 1e6),
+        'lookup_p99_us': float(np.percentile(lookup_seconds, 99) * 1e6),
+        'skill_calls': cache.stats['skill_calls'],
+        'skill_calls_skipped': cache.stats['skill_calls_skipped'],
+        'model_calls': cache.stats['model_calls'],
+        'model_calls_skipped': cache.stats['model_calls_skipped'],
+        'max_probability_diff': max(diffs, default=0.0),
+        'mean_probability_diff': float(np.mean(diffs)) if diffs else 0.0,
+        'label_agreement': float(np.mean(agreements)) if agreements else 1.0,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Near-duplicate job description detection')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    report_parser = subparsers.add_parser('report', help='Measure the cache on a synthetic corpus with reposts')
+    report_parser.add_argument('--jobs', type=int, default=2000)
+    report_parser.add_argument('--duplicate-rate', type=float, default=0.4)
+    report_parser.add_argument('--threshold', type=float, default=DEDUP_THRESHOLD)
+    report_parser.add_argument('--resumes', type=int, default=3)
+    report_parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    result = report(args.jobs, args.duplicate_rate, args.threshold, args.resumes)
+    if args.json:
+        print(json.dumps(result, indent=2))
+        return
+    print(f"Corpus: {result['jobs']} jobs, {result['true_duplicates']} reposts; "
+          f"detected {result['detected_duplicates']} (precision {result['precision']:.3f}, "
+          f"recall {result['recall']:.3f}) with {result['bands_rows'][0]} bands x {result['bands_rows'][1]} rows")
+    print(f"Memory: {result['bytes_per_signature']:.0f} bytes per signature (signature + LSH buckets)")
+    print(f"Signature: {result['signature_us']:.0f} us; lookup p50 {result['lookup_p50_us']:.0f} us, "
+          f"p99 {result['lookup_p99_us']:.0f} us")
+    print(f"Skill extraction: {result['skill_calls']} calls, {result['skill_calls_skipped']} skipped")
+    print(f"Model calls: {result['model_calls']} made, {result['model_calls_skipped']} skipped")
+    print(f"Served vs fresh predictions for reposts: label agreement {result['label_agreement']:.3f}, "
+          f"probability difference mean {result['mean_probability_diff']:.3f}, "
+          f"max {result['max_probability_diff']:.3f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,418 @@
+"""
+Inverted index over job descriptions for ranking a large job corpus against one resume
+
+Scoring every job with the XGBoost model is too slow for 100k+ descriptions. JobIndex
+stores the corpus as TF-IDF posting lists built with the model's own fitted job-description
+vectorizer. A query is answered in two stages:
+
+    1. retrieve: the resume is transformed with the same vectorizer and multiplied with the
+       posting lists (rows are L2-normalized, so the product is the cosine similarity);
+       only the postings of the resume's terms are touched. The top K jobs are kept.
+    2. rerank: the K candidates are scored with the model in one predict_advanced_batch call
+       and ordered by the Good Fit probability.
+
+The model has no resume/job similarity feature: for a fixed model, jobs rank almost the same
+whatever the resume, driven by job-side terms and statistics, so lexical similarity alone
+recovers few of the model's best jobs. Each job therefore also gets a prior at build time
+(its Good Fit probability against an empty resume), and by default half of the K candidates
+are the top jobs by prior, the other half the most similar by cosine. prior_share=0 gives
+pure cosine retrieval.
+
+Layout of an index directory (all arrays memory-mappable):
+    manifest.json       job count, vocabulary size and a fingerprint of the vectorizer
+    postings_*.npy      term -> job CSR matrix (indptr, indices, data)
+    job_ids.npy         job ids in index order
+    texts.bin           UTF-8 job texts back to back, needed by the reranker
+    text_offsets.npy    byte offset of each text in texts.bin
+    prior.npy           Good Fit prior per job (optional)
+    prior_order.npy     job positions by descending prior (optional)
+
+Usage:
+    python src/job_index.py build --jobs jobs.jsonl --out job_index/ [--no-prior]
+    python src/job_index.py query --index job_index/ --resume resume.pdf [-k 200] [--top 10]
+    python src/job_index.py bench [--jobs 100000] [--queries 20]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+JOB_COLUMN = 'job_description_text'
+RANK_CLASS = 'Good Fit'
+BUILD_CHUNK = 2048
+PRIOR_SHARE = 0.5
+
+def _classifier():
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fit_classifier import get_classifier
+
+    classifier = get_classifier()
+    if not classifier.is_loaded:
+        raise RuntimeError("Job index needs the advanced ML model, which is not loaded")
+    return classifier
+
+def _tfidf(vectorizer, texts):
+    """
+    Full-vocabulary TF-IDF rows; a pruned vectorizer (vocab_pruning.py) is bypassed so
+    cosine similarity uses every term
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    return TfidfVectorizer.transform(vectorizer, texts).astype(np.float32)
+
+def _job_priors(classifier, job_texts):
+    """Good Fit probability of each job against an empty resume, scored in chunks to bound memory"""
+    priors = np.empty(len(job_texts), dtype=np.float32)
+    for start in range(0, len(job_texts), BUILD_CHUNK):
+        results = classifier.predict_advanced_batch([''], job_texts[start:start + BUILD_CHUNK])
+        if results is None:
+            raise RuntimeError("Model scoring failed while computing job priors")
+        priors[start:start + len(results)] = [result['probabilities'][RANK_CLASS] for result in results]
+    return priors
+
+def vectorizer_fingerprint(vectorizer):
+    """SHA-256 of the vocabulary (in column order) and IDF weights"""
+    terms = [None] * len(vectorizer.vocabulary_)
+    for term, index in vectorizer.vocabulary_.items():
+        terms[index] = term
+    digest = hashlib.sha256('\n'.join(terms).encode('utf-8'))
+    digest.update(np.ascontiguousarray(vectorizer.idf_, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+class JobIndex:
+    """Term -> job posting lists plus the job texts needed for reranking"""
+
+    def __init__(self, postings, job_ids, texts, text_offsets, fingerprint, prior=None, prior_order=None):
+        self.postings = postings
+        self.job_ids = job_ids
+        self.texts = texts
+        self.text_offsets = text_offsets
+        self.fingerprint = fingerprint
+        self.prior = prior
+        self.prior_order = prior_order
+
+    def __len__(self):
+        return len(self.job_ids)
+
+    @classmethod
+    def build(cls, job_texts, job_ids=None, classifier=None, with_prior=True):
+        """
+        Index job descriptions with the model's job-description vectorizer
+
+        Args:
+            job_texts (iterable): Raw job description texts
+            job_ids (iterable): Ids in the same order (default: positions)
+            classifier (AdvancedFitClassifier): Loaded classifier (default: get_classifier())
+            with_prior (bool): Score every job once with the model for prior-based retrieval
+        """
+        classifier = classifier or _classifier()
+        vectorizer = classifier.vectorizers[JOB_COLUMN]
+        job_texts = ['' if text is None else str(text) for text in job_texts]
+        job_ids = [str(i) for i in (job_ids if job_ids is not None else range(len(job_texts)))]
+        if len(job_ids) != len(job_texts):
+            raise ValueError("job_ids and job_texts must have the same length")
+
+        # Transform in chunks so only one chunk of preprocessed text is alive at a time
+        blocks = [
+            _tfidf(vectorizer, [classifier._preprocess_text(text) for text in job_texts[start:start + BUILD_CHUNK]])
+            for start in range(0, len(job_texts), BUILD_CHUNK)
+        ]
+        matrix = sp.vstack(blocks, format='csr') if blocks else sp.csr_matrix((0, len(vectorizer.vocabulary_)),
+                                                                           dtype=np.float32)
+        postings = matrix.T.tocsr()
+        postings.sort_indices()
+
+        encoded = [text.encode('utf-8') for text in job_texts]
+        text_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=text_offsets[1:])
+        texts = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+        prior = prior_order = None
+        if with_prior:
+            prior = _job_priors(classifier, job_texts)
+            prior_order = np.argsort(-prior, kind='stable').astype(np.int64)
+        return cls(postings, np.array(job_ids), texts, text_offsets, vectorizer_fingerprint(vectorizer),
+                   prior, prior_order)
+
+    def save(self, out_dir):
+        """Write the index as .npy arrays plus a manifest"""
+        out_dir = Path(out_dir)
+        out_dir.mkdir(parents=True, exist_ok=True)
+        np.save(out_dir / 'postings_indptr.npy', self.postings.indptr)
+        np.save(out_dir / 'postings_indices.npy', self.postings.indices)
+        np.save(out_dir / 'postings_data.npy', self.postings.data)
+        np.save(out_dir / 'job_ids.npy', self.job_ids)
+        np.save(out_dir / 'text_offsets.npy', self.text_offsets)
+        (out_dir / 'texts.bin').write_bytes(np.asarray(self.texts).tobytes())
+        if self.prior is not None:
+            np.save(out_dir / 'prior.npy', self.prior)
+            np.save(out_dir / 'prior_order.npy', self.prior_order)
+        manifest = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'n_jobs': len(self),
+            'n_terms': self.postings.shape[0],
+            'nnz': int(self.postings.nnz),
+            'vectorizer_fingerprint': self.fingerprint,
+            'has_prior': self.prior is not None,
+        }
+        (out_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+        logger.info(f"Saved job index ({len(self)} jobs) to {out_dir}")
+        return out_dir
+
+    @classmethod
+    def load(cls, index_dir, mmap=True):
+        """Load an index written by save(); arrays are memory-mapped read-only by default"""
+        index_dir = Path(index_dir)
+        manifest = json.loads((index_dir / 'manifest.json').read_text())
+        if manifest.get('format_version') != INDEX_FORMAT_VERSION:
+            raise ValueError(f"Unsupported job index format version: {manifest.get('format_version')}")
+
+        mmap_mode = 'r' if mmap else None
+        arrays = {name: np.load(index_dir / f'{name}.npy', mmap_mode=mmap_mode)
+                  for name in ('postings_indptr', 'postings_indices', 'postings_data', 'text_offsets')}
+        postings = sp.csr_matrix(
+            (arrays['postings_data'], arrays['postings_indices'], arrays['postings_indptr']),
+            shape=(manifest['n_terms'], manifest['n_jobs']), copy=False
+        )
+        texts = (np.memmap(index_dir / 'texts.bin', dtype=np.uint8, mode='r')
+                 if mmap and arrays['text_offsets'][-1] else
+                 np.fromfile(index_dir / 'texts.bin', dtype=np.uint8))
+        prior = prior_order = None
+        if manifest.get('has_prior'):
+            prior = np.load(index_dir / 'prior.npy', mmap_mode=mmap_mode)
+            prior_order = np.load(index_dir / 'prior_order.npy', mmap_mode=mmap_mode)
+        return cls(postings, np.load(index_dir / 'job_ids.npy'), texts, arrays['text_offsets'],
+                   manifest['vectorizer_fingerprint'], prior, prior_order)
+
+    def job_text(self, position):
+        start, end = self.text_offsets[position], self.text_offsets[position + 1]
+        return bytes(self.texts[start:end]).decode('utf-8')
+
+    def check_vectorizer(self, vectorizer):
+        if vectorizer_fingerprint(vectorizer) != self.fingerprint:
+            raise ValueError("Job index was built with a different vectorizer; rebuild it for this model")
+
+    def similarities(self, resume_text, classifier=None):
+        """Cosine similarity of the resume to every indexed job, as a dense array"""
+        classifier = classifier or _classifier()
+        query = _tfidf(classifier.vectorizers[JOB_COLUMN], [classifier._preprocess_text(resume_text)])
+        # Sparse row times posting lists: only the postings of the resume's terms are read
+        product = (query @ self.postings).tocsr()
+        scores = np.zeros(len(self), dtype=np.float32)
+        scores[product.indices] = product.data
+        return scores
+
+    def retrieve(self, resume_text, k=200, classifier=None, prior_share=PRIOR_SHARE):
+        """
+        Candidate jobs: the top round(k * prior_share) by prior, filled up to k by cosine similarity
+
+        Returns:
+            tuple: (positions, similarities), most similar first
+        """
+        scores = self.similarities(resume_text, classifier)
+        k = min(k, len(scores))
+        if self.prior_order is None:
+            # Built with with_prior=False: cosine retrieval only, whatever prior_share asks for
+            n_prior, prior_top = 0, np.array([], dtype=np.int64)
+        else:
+            n_prior = int(round(k * prior_share))
+            prior_top = np.asarray(self.prior_order[:n_prior], dtype=np.int64)
+
+        # Enough cosine candidates to fill k even if every prior pick is among them
+        n_cosine = min(k + n_prior, len(scores))
+        if n_cosine == 0:
+            return np.array([], dtype=np.int64), scores[:0]
+        top = np.argpartition(-scores, n_cosine - 1)[:n_cosine] if n_cosine < len(scores) else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        top = np.concatenate([prior_top, top[~np.isin(top, prior_top)][:k - n_prior]])
+
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return top, scores[top]
+
+    def search(self, resume_text, k=200, top_n=10, classifier=None, prior_share=PRIOR_SHARE):
+        """
+        Retrieve k candidates and rerank them with the XGBoost model
+
+        Returns:
+            list: Up to top_n dicts (job_id, position, similarity, prediction, confidence,
+                probabilities), best Good Fit probability first
+        """
+        classifier = classifier or _classifier()
+        positions, similarities = self.retrieve(resume_text, k, classifier, prior_share)
+        if not len(positions):
+            return []
+        results = classifier.predict_advanced_batch([resume_text], [self.job_text(p) for p in positions])
+        if results is None:
+            raise RuntimeError("Model reranking failed")
+
+        ranked = sorted(
+            zip(positions, similarities, results),
+            key=lambda item: (-item[2]['probabilities'][RANK_CLASS], -item[1])
+        )
+        return [
+            {'job_id': str(self.job_ids[position]), 'position': int(position), 'similarity': float(similarity),
+             **result}
+            for position, similarity, result in ranked[:top_n]
+        ]
+
+def _percentile_ms(samples, q):
+    return float(np.percentile(samples, q) * 1000) if samples else 0.0
+
+def _synthetic_corpus(classifier, n_jobs, n_queries, n_topics=50, seed=0):
+    """
+    Topic-structured jobs and resumes drawn from the vectorizers' unigram vocabularies, so
+    that similar documents share terms and the model sees realistic TF-IDF rows
+    """
+    rng = np.random.default_rng(seed)
+    job_words = np.array(sorted(t for t in classifier.vectorizers[JOB_COLUMN].vocabulary_ if ' ' not in t))
+    resume_words = np.array(sorted(t for t in classifier.vectorizers['resume_text'].vocabulary_ if ' ' not in t))
+    topics = [rng.choice(job_words, 60, replace=False) for _ in range(n_topics)]
+
+    def document(topic, words, n_words, topic_share):
+        n_topic = int(n_words * topic_share)
+        return ' '.join(np.concatenate([rng.choice(topics[topic], n_topic), rng.choice(words, n_words - n_topic)]))
+
+    jobs = [document(rng.integers(n_topics), job_words, 150, 0.6) for _ in range(n_jobs)]
+    resumes = [document(rng.integers(n_topics), resume_words, 250, 0.4) for _ in range(n_queries)]
+    return jobs, resumes
+
+def bench(n_jobs=100000, n_queries=20, ks=(50, 100, 200, 500), top_n=10, exhaustive_queries=5,
+          index_dir=None):
+    """
+    Build an index over a synthetic corpus and compare retrieve-then-rerank with exhaustive scoring
+
+    recall@K is the share of the exhaustive top_n (every job scored by the model) that the
+    reranked top_n from K retrieved candidates recovers; candidate recall@K is the share of
+    the exhaustive top_n that appears anywhere among the K candidates. Both are reported for
+    pure cosine retrieval and for the default prior/cosine mix.
+    """
+    import tempfile
+
+    classifier = _classifier()
+    jobs, resumes = _synthetic_corpus(classifier, n_jobs, n_queries)
+
+    start = time.perf_counter()
+    index = JobIndex.build(jobs, classifier=classifier)
+    build_seconds = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_dir = Path(index_dir or tmp)
+        index.save(index_dir)
+        start = time.perf_counter()
+        index = JobIndex.load(index_dir)
+        load_seconds = time.perf_counter() - start
+        size_mb = sum(path.stat().st_size for path in index_dir.iterdir()) / 1e6
+
+        # Exhaustive reference on a few queries: every job through the model, in chunks to bound memory
+        exhaustive, exhaustive_seconds = [], []
+        for resume in resumes[:exhaustive_queries]:
+            start = time.perf_counter()
+            good = np.concatenate([
+                [result['probabilities'][RANK_CLASS]
+                 for result in classifier.predict_advanced_batch([resume], jobs[offset:offset + BUILD_CHUNK])]
+                for offset in range(0, len(jobs), BUILD_CHUNK)
+            ])
+            exhaustive_seconds.append(time.perf_counter() - start)
+            exhaustive.append(set(np.argsort(-good, kind='stable')[:top_n].tolist()))
+
+        report = {
+            'jobs': n_jobs, 'queries': n_queries, 'top_n': top_n,
+            'build_seconds': build_seconds, 'load_ms': load_seconds * 1000, 'index_mb': size_mb,
+            'exhaustive_ms': _percentile_ms(exhaustive_seconds, 50), 'k': {},
+        }
+        for k in ks:
+            report['k'][k] = {}
+            for mode, prior_share in (('cosine', 0.0), ('hybrid', PRIOR_SHARE)):
+                retrieve_seconds, search_seconds, recall, candidate_recall = [], [], [], []
+                for q, resume in enumerate(resumes):
+                    start = time.perf_counter()
+                    positions, _ = index.retrieve(resume, k, classifier, prior_share)
+                    retrieve_seconds.append(time.perf_counter() - start)
+                    start = time.perf_counter()
+                    hits = index.search(resume, k, top_n, classifier, prior_share)
+                    search_seconds.append(time.perf_counter() - start)
+                    if q < len(exhaustive):
+                        recall.append(len(exhaustive[q] & {hit['position'] for hit in hits}) / top_n)
+                        candidate_recall.append(len(exhaustive[q] & set(positions.tolist())) / top_n)
+                report['k'][k][mode] = {
+                    'recall': float(np.mean(recall)), 'candidate_recall': float(np.mean(candidate_recall)),
+                    'retrieve_p50_ms': _percentile_ms(retrieve_seconds, 50),
+                    'retrieve_p99_ms': _percentile_ms(retrieve_seconds, 99),
+                    'query_p50_ms': _percentile_ms(search_seconds, 50),
+                    'query_p99_ms': _percentile_ms(search_seconds, 99),
+                }
+    return report
+
+def _print_bench(report):
+    print(f"Index: {report['jobs']} jobs, built in {report['build_seconds']:.1f}s, "
+          f"{report['index_mb']:.1f} MB on disk, mmap load {report['load_ms']:.1f} ms")
+    print(f"Exhaustive model scoring: {report['exhaustive_ms']:.0f} ms per resume (p50)")
+    print(f"{'K':>6} {'mode':>7} {'recall@' + str(report['top_n']):>10} {'cand. recall':>13} "
+          f"{'retrieve p50/p99 ms':>20} {'query p50/p99 ms':>18}")
+    for k, modes in report['k'].items():
+        for mode, row in modes.items():
+            print(f"{k:>6} {mode:>7} {row['recall']:>10.2f} {row['candidate_recall']:>13.2f} "
+                  f"{row['retrieve_p50_ms']:>9.1f} / {row['retrieve_p99_ms']:<8.1f} "
+                  f"{row['query_p50_ms']:>8.1f} / {row['query_p99_ms']:<8.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Build and query an inverted index of job descriptions')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build')
+    build_parser.add_argument('--jobs', required=True, help='Directory of PDF/DOCX/TXT files or JSONL file')
+    build_parser.add_argument('--out', type=Path, required=True)
+    build_parser.add_argument('--no-prior', action='store_true', help='Skip model priors (cosine retrieval only)')
+    query_parser = subparsers.add_parser('query')
+    query_parser.add_argument('--index', type=Path, required=True)
+    query_parser.add_argument('--resume', required=True, help='Resume file (PDF/DOCX/TXT)')
+    query_parser.add_argument('-k', type=int, default=200, help='Candidates retrieved for reranking')
+    query_parser.add_argument('--top', type=int, default=10)
+    query_parser.add_argument('--prior-share', type=float, default=PRIOR_SHARE,
+                              help='Share of candidates taken by model prior (0 = cosine only)')
+    bench_parser = subparsers.add_parser('bench')
+    bench_parser.add_argument('--jobs', type=int, default=100000)
+    bench_parser.add_argument('--queries', type=int, default=20)
+    bench_parser.add_argument('--exhaustive-queries', type=int, default=5)
+    bench_parser.add_argument('--json', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('fit_classifier').setLevel(logging.WARNING)
+    sys.path.insert(0, str(Path(__file__).parent))
+    from bulk_score import _read_document, iter_documents
+
+    if args.command == 'build':
+        records = list(iter_documents(args.jobs))
+        index = JobIndex.build([_read_document(path, text) for _, path, text in records],
+                               [doc_id for doc_id, _, _ in records], with_prior=not args.no_prior)
+        index.save(args.out)
+        print(f"✅ Indexed {len(index)} jobs ({index.postings.nnz} postings) -> {args.out}")
+    elif args.command == 'query':
+        classifier = _classifier()
+        index = JobIndex.load(args.index)
+        index.check_vectorizer(classifier.vectorizers[JOB_COLUMN])
+        resume_text = _read_document(args.resume, None)
+        start = time.perf_counter()
+        hits = index.search(resume_text, args.k, args.top, classifier, args.prior_share)
+        elapsed = time.perf_counter() - start
+        for rank, hit in enumerate(hits, 1):
+            print(f"{rank:>3}. {hit['job_id']}  {hit['prediction']:<13} "
+                  f"{RANK_CLASS}={hit['probabilities'][RANK_CLASS]:.3f}  cosine={hit['similarity']:.3f}")
+        print(f"Searched {len(index)} jobs in {elapsed * 1000:.0f} ms (k={args.k})")
+    else:
+        report = bench(args.jobs, args.queries, exhaustive_queries=args.exhaustive_queries)
+        if args.json:
+            print(json.dumps(report, indent=2))
+        else:
+            _print_bench(report)
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,5 @@
+from tracing import traced
+
 SKILL_RESOURCES = {
     # Programming Languages
     'python': 'https://www.coursera.org/specializations/python',
@@ -121,6 +123,7 @@ SKILL_RESOURCES = {
     'gpt': 'https://platform.openai.com/docs/models/gpt-4',
 }
 
+@traced('resources')
 def get_learning_resources(skills):
     """
     Get learning resources for a list of skills.
@@ -0,0 +1,202 @@
+"""
+Response cache for LLM calls, keyed by prompt template, rendered inputs, model and temperature
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from tracing import span
+
+class LLMResponseCache:
+    """
+    TTL + LRU cache of LLM responses.
+
+    Always keeps a bounded in-memory tier; when db_path is set, responses are also
+    written to a SQLite file so they survive restarts and session reloads. Both tiers
+    expire entries after ttl_seconds and evict least-recently-used entries past
+    max_entries.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=24 * 3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self._memory = OrderedDict()  # key -> (created_at, response)
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(template, rendered_prompt, model, temperature):
+        payload = json.dumps(
+            {"template": template, "prompt": rendered_prompt, "model": model, "temperature": temperature},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    response, created_at = row
+                    if not self._expired(created_at, now):
+                        self._db.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._memory_put(key, created_at, response)
+                        self.hits += 1
+                        return response
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+
+            self.misses += 1
+            return None
+
+    def put(self, key, response):
+        now = time.time()
+        with self._lock:
+            self._memory_put(key, now, response)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, response, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                    (key, response, now, now),
+                )
+                self._db.execute(
+                    "DELETE FROM llm_cache WHERE key NOT IN "
+                    "(SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                self._db.commit()
+
+    def record_bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def _memory_put(self, key, created_at, response):
+        self._memory[key] = (created_at, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.bypassed = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+# Process-wide cache; set LLM_CACHE_DB to a file path to enable the SQLite tier
+llm_cache = LLMResponseCache(
+    max_entries=int(os.getenv("LLM_CACHE_ENTRIES", "256")),
+    ttl_seconds=float(os.getenv("LLM_CACHE_TTL", str(24 * 3600))),
+    db_path=os.getenv("LLM_CACHE_DB") or None,
+)
+
+def cache_disabled():
+    return os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes")
+
+def cached_completion(llm, prompt, inputs, use_cache=True, cache=None):
+    """
+    Render a PromptTemplate and call the LLM, reusing a cached response for identical requests
+
+    Args:
+        llm: Callable LLM (LangChain OpenAI or any fake exposing model_name/temperature)
+        prompt (PromptTemplate): Prompt template to render
+        inputs (dict): Template variables
+        use_cache (bool): Set False to bypass the cache for this call
+        cache (LLMResponseCache): Cache to use (defaults to the process-wide llm_cache)
+
+    Returns:
+        str: LLM response
+    """
+    cache = cache or llm_cache
+    rendered = prompt.format(**inputs)
+
+    with span('llm', len(rendered), model=getattr(llm, 'model_name', type(llm).__name__)) as stage:
+        if not use_cache or cache_disabled():
+            cache.record_bypass()
+            stage.set(cache='bypass')
+            return llm(rendered)
+
+        key = _request_key(cache, llm, prompt, rendered)
+        response = cache.get(key)
+        stage.set(cache='miss' if response is None else 'hit')
+        if response is None:
+            response = llm(rendered)
+            cache.put(key, response)
+        return response
+
+async def acached_completion(llm, prompt, inputs, use_cache=True, cache=None):
+    """Async version of cached_completion; uses llm.ainvoke when the LLM provides it"""
+    cache = cache or llm_cache
+    rendered = prompt.format(**inputs)
+    key = None
+
+    with span('llm', len(rendered), model=getattr(llm, 'model_name', type(llm).__name__)) as stage:
+        if not use_cache or cache_disabled():
+            cache.record_bypass()
+            stage.set(cache='bypass')
+        else:
+            key = _request_key(cache, llm, prompt, rendered)
+            response = cache.get(key)
+            stage.set(cache='miss' if response is None else 'hit')
+            if response is not None:
+                return response
+
+        if hasattr(llm, "ainvoke"):
+            response = await llm.ainvoke(rendered)
+        else:
+            response = await asyncio.to_thread(llm, rendered)
+
+        if key is not None:
+            cache.put(key, response)
+        return response
+
+def _request_key(cache, llm, prompt, rendered):
+    return cache.make_key(
+        prompt.template,
+        rendered,
+        getattr(llm, "model_name", type(llm).__name__),
+        getattr(llm, "temperature", None),
+    )
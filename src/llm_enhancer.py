@@ -1,44 +1,91 @@
-from langchain_community.llms import OpenAI
-from langchain.prompts import PromptTemplate
+import asyncio
 import os
 import streamlit as st
 from dotenv import load_dotenv
+from llm_cache import acached_completion, cached_completion
 
 load_dotenv()
 
-def enhance_resume_section(resume_text, jd_text, missing_skills):
-    # Get API key from environment or Streamlit secrets
+# Per-call timeout (seconds) for the async variant
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+
+RESUME_PROMPT_TEMPLATE = (
+    "You are a career coach AI. Given the following resume section, job description, and missing skills, "
+    "suggest improved wording for the resume section to better match the job description and address the missing skills.\n"
+    "Resume Section:\n{resume}\n"
+    "Job Description:\n{jd}\n"
+    "Missing Skills:\n{missing_skills}\n"
+    "Improved Resume Section:"
+)
+
+def _get_openai_api_key():
+    """Return (api_key, error_message) from environment or Streamlit secrets"""
     openai_api_key = os.getenv('OPENAI_API_KEY')
     if not openai_api_key:
         try:
             openai_api_key = st.secrets["OPENAI_API_KEY"]
         except:
             st.error("⚠️ OpenAI API key not found. Please set OPENAI_API_KEY in environment variables or Streamlit secrets.")
-            return "OpenAI API key not configured. Please contact the administrator."
+            return None, "OpenAI API key not configured. Please contact the administrator."
     
     if not openai_api_key:
-        return "OpenAI API key not available. Please configure your API key to use this feature."
+        return None, "OpenAI API key not available. Please configure your API key to use this feature."
+    return openai_api_key, None
+
+def _make_llm(temperature, openai_api_key):
+    # LangChain is imported on first use; it is the slowest import in the app
+    from langchain_community.llms import OpenAI
+    return OpenAI(temperature=temperature, openai_api_key=openai_api_key)
+
+def _build_request(resume_text, jd_text, missing_skills):
+    from langchain.prompts import PromptTemplate
+    prompt = PromptTemplate(
+        input_variables=["resume", "jd", "missing_skills"],
+        template=RESUME_PROMPT_TEMPLATE
+    )
+    inputs = {
+        "resume": resume_text,
+        "jd": jd_text,
+        # Callers pass sets; sorting keeps the prompt, and so the cache key, stable across processes
+        "missing_skills": ", ".join(sorted(set(missing_skills)))
+    }
+    return prompt, inputs
+
+def enhance_resume_section(resume_text, jd_text, missing_skills, use_cache=True, llm=None):
+    if llm is None:
+        # Get API key from environment or Streamlit secrets
+        openai_api_key, error = _get_openai_api_key()
+        if error:
+            return error
     
     try:
-        prompt = PromptTemplate(
-            input_variables=["resume", "jd", "missing_skills"],
-            template=(
-                "You are a career coach AI. Given the following resume section, job description, and missing skills, "
-                "suggest improved wording for the resume section to better match the job description and address the missing skills.\n"
-                "Resume Section:\n{resume}\n"
-                "Job Description:\n{jd}\n"
-                "Missing Skills:\n{missing_skills}\n"
-                "Improved Resume Section:"
-            )
-        )
-        llm = OpenAI(temperature=0.3, openai_api_key=openai_api_key)
-        return llm(
-            prompt.format(
-                resume=resume_text,
-                jd=jd_text,
-                missing_skills=", ".join(missing_skills)
-            )
+        prompt, inputs = _build_request(resume_text, jd_text, missing_skills)
+        if llm is None:
+            llm = _make_llm(0.3, openai_api_key)
+        return cached_completion(llm, prompt, inputs, use_cache=use_cache)
+    except Exception as e:
+        st.error(f"Error enhancing resume: {str(e)}")
+        return "Unable to generate resume improvements at this time. Please try again later."
+
+async def aenhance_resume_section(resume_text, jd_text, missing_skills, use_cache=True, llm=None,
+                                  timeout=LLM_TIMEOUT):
+    """Async version of enhance_resume_section with a per-call timeout"""
+    if llm is None:
+        openai_api_key, error = _get_openai_api_key()
+        if error:
+            return error
+    
+    try:
+        prompt, inputs = _build_request(resume_text, jd_text, missing_skills)
+        if llm is None:
+            llm = _make_llm(0.3, openai_api_key)
+        return await asyncio.wait_for(
+            acached_completion(llm, prompt, inputs, use_cache=use_cache),
+            timeout=timeout
         )
+    except asyncio.TimeoutError:
+        st.error(f"Resume enhancement timed out after {timeout:.0f}s.")
+        return "Resume improvements took too long to generate. Please try again later."
     except Exception as e:
         st.error(f"Error enhancing resume: {str(e)}")
         return "Unable to generate resume improvements at this time. Please try again later."
@@ -0,0 +1,293 @@
+"""
+Split model artifact: a fast-loading alternative to the joblib pipeline pickle
+
+Layout of an artifact directory:
+    manifest.json               model metadata, vectorizer parameters, SHA-256 of every file and
+                                of the pickle it was exported from
+    booster.ubj                 native XGBoost model (UBJSON)
+    trees.npz                   the same trees as flat arrays for tree_evaluator.py (optional)
+    feature_columns.npy         model column names in training order
+    <column>_terms.npy          vectorizer vocabulary, ordered by vocabulary column
+    <column>_idf.npy            vectorizer IDF weights (memory-mappable)
+    <column>_output.npy         emitted vocabulary columns, for pruned vectorizers only
+
+Usage:
+    python src/model_artifact.py export [--pickle PATH] [--out DIR]
+    python src/model_artifact.py compare DIR [--pickle PATH]
+"""
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tree_evaluator import TOLERANCE, TREES_FILE, CompiledTrees
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT_VERSION = 1
+MODELS_DIR = Path(__file__).parent.parent / 'models'
+
+# TfidfVectorizer parameters needed to reproduce transform(); callables cannot be exported
+_VECTORIZER_PARAMS = (
+    'input', 'encoding', 'decode_error', 'strip_accents', 'lowercase', 'analyzer', 'token_pattern',
+    'stop_words', 'ngram_range', 'max_df', 'min_df', 'max_features', 'binary', 'dtype',
+    'norm', 'use_idf', 'smooth_idf', 'sublinear_tf',
+)
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _json_value(value):
+    """Convert numpy scalars and tuples in metadata to plain JSON types"""
+    if isinstance(value, dict):
+        return {key: _json_value(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_value(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+def _vectorizer_params(vectorizer):
+    params = {}
+    for name in _VECTORIZER_PARAMS:
+        value = getattr(vectorizer, name)
+        if callable(value) and name != 'dtype':
+            raise ValueError(f"Cannot export vectorizer with a custom {name}")
+        params[name] = np.dtype(value).name if name == 'dtype' else _json_value(value)
+    return params
+
+def export_artifact(pipeline_data, out_dir, source_pickle=None):
+    """
+    Write a loaded pipeline (the dict stored in ml_pipeline_xgboost_*.pkl) as a split artifact
+
+    Args:
+        pipeline_data (dict): Pipeline with model, vectorizers, label_encoder, feature_columns, target_names
+        out_dir (str | Path): Directory to create
+        source_pickle (str | Path): Pickle the pipeline was loaded from; its SHA-256 is recorded so
+            loaders can tell when the artifact is stale (see artifact_matches_pickle)
+
+    Returns:
+        Path: The artifact directory
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    files = {}
+
+    # The sklearn wrapper's save_model also stores the classifier metadata (n_classes_, etc.)
+    pipeline_data['model'].save_model(out_dir / 'booster.ubj')
+    files['booster'] = 'booster.ubj'
+
+    # Lets the classifier serve without XGBoost; models the evaluator cannot express ship without it
+    try:
+        CompiledTrees.from_booster(pipeline_data['model'].get_booster()).save(out_dir / TREES_FILE)
+        files['compiled_trees'] = TREES_FILE
+    except ValueError as e:
+        logger.warning(f"Not exporting compiled trees: {e}")
+
+    np.save(out_dir / 'feature_columns.npy', np.array(pipeline_data['feature_columns']))
+    files['feature_columns'] = 'feature_columns.npy'
+
+    vectorizers = {}
+    for col_name, vectorizer in pipeline_data['vectorizers'].items():
+        # Full vocabulary in column order, as fixed-width unicode
+        terms = np.empty(len(vectorizer.vocabulary_), dtype=object)
+        for term, index in vectorizer.vocabulary_.items():
+            terms[index] = term
+        terms_file, idf_file = f'{col_name}_terms.npy', f'{col_name}_idf.npy'
+        np.save(out_dir / terms_file, terms.astype(str))
+        np.save(out_dir / idf_file, np.asarray(vectorizer.idf_, dtype=np.float64))
+        files[f'{col_name}_terms'] = terms_file
+        files[f'{col_name}_idf'] = idf_file
+        if hasattr(vectorizer, 'output_indices_'):
+            np.save(out_dir / f'{col_name}_output.npy', vectorizer.output_indices_)
+            files[f'{col_name}_output'] = f'{col_name}_output.npy'
+        vectorizers[col_name] = _vectorizer_params(vectorizer)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model_name': pipeline_data.get('model_name', 'XGBoost'),
+        'timestamp': pipeline_data.get('timestamp'),
+        'target_names': list(pipeline_data['target_names']),
+        'label_classes': _json_value(list(pipeline_data['label_encoder'].classes_)),
+        'performance_metrics': _json_value(pipeline_data.get('performance_metrics', {})),
+        'vectorizers': vectorizers,
+        'files': files,
+        'checksums': {name: _sha256(out_dir / filename) for name, filename in files.items()},
+    }
+    if source_pickle is not None:
+        manifest['source_pickle'] = {'file': Path(source_pickle).name, 'sha256': _sha256(source_pickle)}
+    (out_dir / 'manifest.json').write_text(json.dumps(manifest, indent=2))
+    logger.info(f"Exported model artifact to {out_dir}")
+    return out_dir
+
+def _build_vectorizer(params, terms, idf):
+    from sklearn.feature_extraction.text import TfidfTransformer, TfidfVectorizer
+
+    params = dict(params)
+    params['ngram_range'] = tuple(params['ngram_range'])
+    params['dtype'] = np.dtype(params['dtype']).type
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms.tolist())}
+    vectorizer.fixed_vocabulary_ = False
+
+    transformer = TfidfTransformer(
+        norm=params['norm'], use_idf=params['use_idf'],
+        smooth_idf=params['smooth_idf'], sublinear_tf=params['sublinear_tf']
+    )
+    transformer.idf_ = idf
+    transformer.n_features_in_ = len(idf)
+    vectorizer._tfidf = transformer
+    return vectorizer
+
+def load_artifact(artifact_dir, verify=True, load_booster=True):
+    """
+    Load a split artifact into the same dict shape joblib.load returns for the pipeline pickle
+
+    IDF arrays are memory-mapped read-only, so worker processes share their pages. The vocabulary
+    is not: TfidfVectorizer needs a term -> column dict, which every process builds from the terms
+    file (about 0.5 MB per 5000-term vectorizer).
+
+    Args:
+        artifact_dir (str | Path): Directory written by export_artifact
+        verify (bool): Check every file against the manifest checksums
+        load_booster (bool): Load the XGBoost model; without it 'model' is None and xgboost is never
+            imported, so predictions have to come from 'compiled_trees'
+
+    Returns:
+        dict: Pipeline data (model, vectorizers, label_encoder, feature_columns, target_names, ...),
+            plus compiled_trees (CompiledTrees or None)
+    """
+    from sklearn.preprocessing import LabelEncoder
+
+    artifact_dir = Path(artifact_dir)
+    manifest = json.loads((artifact_dir / 'manifest.json').read_text())
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format version: {manifest.get('format_version')}")
+
+    files = manifest['files']
+    if verify:
+        for name, filename in files.items():
+            if _sha256(artifact_dir / filename) != manifest['checksums'][name]:
+                raise ValueError(f"Checksum mismatch for {filename} in {artifact_dir}")
+
+    model = None
+    if load_booster:
+        import xgboost as xgb
+        model = xgb.XGBClassifier()
+        model.load_model(artifact_dir / files['booster'])
+    compiled_trees = None
+    if 'compiled_trees' in files:
+        compiled_trees = CompiledTrees.load(artifact_dir / files['compiled_trees'])
+
+    vectorizers = {}
+    for col_name, params in manifest['vectorizers'].items():
+        terms = np.load(artifact_dir / files[f'{col_name}_terms'])
+        idf = np.load(artifact_dir / files[f'{col_name}_idf'], mmap_mode='r')
+        vectorizers[col_name] = _build_vectorizer(params, terms, idf)
+        if f'{col_name}_output' in files:
+            from vocab_pruning import prune_vectorizer
+            vectorizers[col_name] = prune_vectorizer(
+                vectorizers[col_name], np.load(artifact_dir / files[f'{col_name}_output'])
+            )
+
+    label_encoder = LabelEncoder()
+    label_encoder.classes_ = np.array(manifest['label_classes'])
+
+    return {
+        'model': model,
+        'compiled_trees': compiled_trees,
+        'vectorizers': vectorizers,
+        'label_encoder': label_encoder,
+        'feature_columns': np.load(artifact_dir / files['feature_columns']).tolist(),
+        'model_name': manifest['model_name'],
+        'timestamp': manifest['timestamp'],
+        'target_names': manifest['target_names'],
+        'performance_metrics': manifest['performance_metrics'],
+    }
+
+def find_latest_artifact(models_dir=MODELS_DIR):
+    """Return the newest artifact directory in models_dir, or None"""
+    manifests = list(Path(models_dir).glob('ml_artifact_*/manifest.json'))
+    if not manifests:
+        return None
+    return max(manifests, key=os.path.getctime).parent
+
+def artifact_matches_pickle(artifact_dir, pickle_path):
+    """True if the artifact was exported from this exact pickle (artifacts without a record never match)"""
+    manifest = json.loads((Path(artifact_dir) / 'manifest.json').read_text())
+    source = manifest.get('source_pickle')
+    return source is not None and source['sha256'] == _sha256(pickle_path)
+
+def _latest_pickle(models_dir=MODELS_DIR):
+    return max(Path(models_dir).glob('ml_pipeline_xgboost_*.pkl'), key=os.path.getctime)
+
+def _compare(artifact_dir, pickle_path, n_rows=200, seed=0):
+    """Check artifact predictions and TF-IDF output against the pickle"""
+    import joblib
+    import scipy.sparse as sp
+
+    start = time.perf_counter()
+    reference = joblib.load(pickle_path)
+    pickle_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    artifact = load_artifact(artifact_dir)
+    artifact_seconds = time.perf_counter() - start
+
+    texts = ['senior python engineer with aws docker kubernetes and machine learning experience',
+             'data analyst sql tableau excel reporting stakeholder communication', '']
+    for col_name, vectorizer in reference['vectorizers'].items():
+        expected = vectorizer.transform(texts)
+        actual = artifact['vectorizers'][col_name].transform(texts)
+        if (expected != actual).nnz:
+            raise AssertionError(f"TF-IDF output differs for {col_name}")
+
+    rng = np.random.default_rng(seed)
+    n_features = len(reference['feature_columns'])
+    X = sp.random(n_rows, n_features, density=0.3, format='csr', random_state=seed, dtype=np.float32)
+    X.data = rng.random(X.nnz, dtype=np.float32)
+    X = X.toarray()
+    if not np.array_equal(reference['model'].predict_proba(X), artifact['model'].predict_proba(X)):
+        raise AssertionError("Model probabilities differ")
+    if artifact['compiled_trees'] is not None:
+        difference = np.abs(artifact['compiled_trees'].predict_proba(X) - reference['model'].predict_proba(X)).max()
+        if difference > TOLERANCE:
+            raise AssertionError(f"Compiled tree probabilities differ by {difference:.2e}")
+
+    print(f"Artifact matches pickle ({n_rows} random rows, TF-IDF on {len(texts)} texts)")
+    print(f"Load time: pickle {pickle_seconds * 1000:.0f} ms, artifact {artifact_seconds * 1000:.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Export or check the split model artifact')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    export_parser = subparsers.add_parser('export')
+    export_parser.add_argument('--pickle', type=Path, default=None)
+    export_parser.add_argument('--out', type=Path, default=None)
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('artifact_dir', type=Path)
+    compare_parser.add_argument('--pickle', type=Path, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    pickle_path = args.pickle or _latest_pickle()
+
+    if args.command == 'export':
+        import joblib
+        pipeline_data = joblib.load(pickle_path)
+        timestamp = pipeline_data.get('timestamp') or time.strftime('%Y%m%d_%H%M%S')
+        out_dir = args.out or MODELS_DIR / f'ml_artifact_xgboost_{timestamp}'
+        export_artifact(pipeline_data, out_dir, source_pickle=pickle_path)
+        _compare(out_dir, pickle_path)
+    else:
+        _compare(args.artifact_dir, pickle_path)
+
+if __name__ == '__main__':
+    main()
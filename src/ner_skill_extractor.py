@@ -1,33 +1,64 @@
 import streamlit as st
-import spacy
-from spacy.matcher import PhraseMatcher
 from skills import COMMON_SKILLS
+from tracing import span, text_size
+
+# Skill matching only needs the tokenizer and LOWER attributes, so the statistical
+# pipes are never loaded or run
+UNUSED_PIPES = ["tok2vec", "tagger", "parser", "senter", "attribute_ruler", "lemmatizer", "ner"]
 
 @st.cache_resource
 def load_nlp():
     try:
+        # spaCy is imported here rather than at module level so the app starts without paying for it
+        import spacy
         # First attempt: try to load the model directly
-        return spacy.load("en_core_web_sm")
-    except OSError as e:
+        return spacy.load("en_core_web_sm", exclude=UNUSED_PIPES)
+    except (ImportError, OSError) as e:
         st.warning("⚠️ spaCy model not found. Falling back to basic extraction.")
         return None  # Explicitly return None if model is not available
 
+@st.cache_resource
+def load_skill_matcher():
+    """Compile the skill PhraseMatcher once per process, alongside the cached model"""
+    nlp = load_nlp()
+    if nlp is None:
+        return None
+
+    from spacy.matcher import PhraseMatcher
+    matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
+    # Create patterns correctly - flat list of Doc objects, not nested lists
+    patterns = list(nlp.tokenizer.pipe(COMMON_SKILLS))
+    matcher.add("SKILLS", patterns)
+    return matcher
+
+def _load_pipeline():
+    nlp = load_nlp()
+    matcher = load_skill_matcher()
+    if nlp is None or matcher is None:
+        raise RuntimeError("spaCy NER model not available; use basic extraction instead.")
+    return nlp, matcher
+
+def _skills_in_doc(doc, matcher):
+    matches = matcher(doc)
+    return list(set([doc[start:end].text for match_id, start, end in matches]))
+
 def extract_skills_ner(text):
     try:
-        nlp = load_nlp()
-        if nlp is None:
-            raise RuntimeError("spaCy NER model not available; use basic extraction instead.")
-        
-        doc = nlp(text)
-        matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
-        
-        # Create patterns correctly - flat list of Doc objects, not nested lists
-        patterns = [nlp.make_doc(skill) for skill in COMMON_SKILLS]
-        matcher.add("SKILLS", patterns)
-        
-        matches = matcher(doc)
-        skills_found = list(set([doc[start:end].text for match_id, start, end in matches]))
-        return skills_found
-        
+        nlp, matcher = _load_pipeline()
+        with span('skills_ner', text_size(text)):
+            return _skills_in_doc(nlp.make_doc(text), matcher)
+
+    except Exception as e:
+        raise RuntimeError(f"spaCy NER extraction failed: {str(e)}")
+
+def extract_skills_ner_batch(texts, batch_size=32):
+    """Extract skills from several documents (e.g. resume and job description) in one nlp.pipe call"""
+    # Any iterable: sizing the span would otherwise consume a generator before nlp.pipe sees it
+    texts = list(texts)
+    try:
+        nlp, matcher = _load_pipeline()
+        with span('skills_ner', text_size(*texts), documents=len(texts)):
+            return [_skills_in_doc(doc, matcher) for doc in nlp.pipe(texts, batch_size=batch_size)]
+
     except Exception as e:
         raise RuntimeError(f"spaCy NER extraction failed: {str(e)}")
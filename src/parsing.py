@@ -1,16 +1,307 @@
-from PyPDF2 import PdfReader
-from docx import Document
-
-def extract_text_from_pdf(file):
-    reader = PdfReader(file)
-    text = ""
-    for page in reader.pages:
-        text += page.extract_text() or ""
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from tracing import span
+
+logger = logging.getLogger(__name__)
+
+# Bump when extraction output changes so stale cache entries are never served
+PARSER_VERSION = "1"
+
+# PDF extraction limits; a document past either is truncated (with a warning) rather than blocking
+# a worker. PDF_MAX_PAGES=0 (the default) means no page limit, since PDF_MAX_CHARS already bounds the work.
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0")) or None
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "500000"))
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Below this many pages the process pool costs more than it saves
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "8"))
+
+class ParseCache:
+    """
+    Cache of extracted document text keyed by SHA-256 of the file bytes and parser version.
+
+    A bounded in-memory LRU tier is always used; an optional on-disk tier (one file per
+    entry, evicted least-recently-used once it exceeds disk_max_bytes) survives restarts
+    and is shared between worker processes.
+    """
+
+    def __init__(self, max_entries=64, disk_dir=None, disk_max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(data, kind):
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}:{kind}:".encode())
+        digest.update(data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return self._memory[key]
+
+        text = self._disk_get(key)
+        with self._lock:
+            if text is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._memory_put(key, text)
+            return text
+
+    def put(self, key, text):
+        with self._lock:
+            self._memory_put(key, text)
+        self._disk_put(key, text)
+
+    def _memory_put(self, key, text):
+        self._memory[key] = text
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_path(self, key):
+        return self.disk_dir / f"{key}.txt"
+
+    def _disk_get(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            text = path.read_text(encoding="utf-8")
+            os.utime(path)  # Mark as recently used for eviction
+            return text
+        except OSError:
+            return None
+
+    def _disk_put(self, key, text):
+        if self.disk_dir is None:
+            return
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_text(text, encoding="utf-8")
+            os.replace(tmp_path, path)
+            self._disk_evict()
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+
+    def _disk_evict(self):
+        entries = []
+        for path in self.disk_dir.glob("*.txt"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.disk_max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def disk_bytes(self):
+        if self.disk_dir is None:
+            return 0
+        return sum(path.stat().st_size for path in self.disk_dir.glob("*.txt"))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self.disk_bytes(),
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self.hits = self.misses = self.memory_hits = self.disk_hits = 0
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob("*.txt"):
+                path.unlink(missing_ok=True)
+
+# Process-wide cache; set PARSE_CACHE_DIR to enable the disk tier
+parse_cache = ParseCache(
+    max_entries=int(os.getenv("PARSE_CACHE_ENTRIES", "64")),
+    disk_dir=os.getenv("PARSE_CACHE_DIR") or None,
+    disk_max_bytes=int(os.getenv("PARSE_CACHE_MAX_BYTES", str(256 * 1024 * 1024))),
+)
+
+def get_parse_cache_stats():
+    return parse_cache.stats()
+
+def _read_bytes(file):
+    """Return the raw bytes of an uploaded file, file object, path or bytes"""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if isinstance(file, (str, os.PathLike)):
+        return Path(file).read_bytes()
+    if hasattr(file, "getvalue"):
+        return file.getvalue()
+    data = file.read()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return data
+
+def _cached_parse(file, kind, parser, use_cache):
+    data = _read_bytes(file)
+    with span('parse', len(data), kind=kind.split(':')[0]) as stage:
+        if not use_cache:
+            return parser(data)
+
+        key = parse_cache.make_key(data, kind)
+        text = parse_cache.get(key)
+        stage.set(cache='miss' if text is None else 'hit')
+        if text is None:
+            text = parser(data)
+            parse_cache.put(key, text)
+        return text
+
+# The document's reader in a PDF pool worker, set once by _init_pdf_worker
+_worker_reader = None
+
+def _init_pdf_worker(data):
+    """Pool initializer: parse the document once per worker instead of once per task"""
+    global _worker_reader
+    from PyPDF2 import PdfReader
+    _worker_reader = PdfReader(io.BytesIO(data))
+
+def _extract_pdf_pages(start, end):
+    """Worker task: extract the text of pages start..end-1 with the worker's reader"""
+    return [(number, _worker_reader.pages[number].extract_text() or "") for number in range(start, end)]
+
+def _iter_pdf_pages_parallel(data, n_pages, max_chars, workers):
+    chunk_size = max(1, n_pages // (workers * 4))
+    chunks = deque((start, min(start + chunk_size, n_pages)) for start in range(0, n_pages, chunk_size))
+    # One pool per document: the bytes reach each worker once, through the initializer, and
+    # tasks only carry page ranges
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(chunks)), initializer=_init_pdf_worker,
+                               initargs=(data,))
+    pending = set()
+    finished = {}  # page number -> length, for pages beyond the in-order prefix
+    next_page = 0
+    prefix_chars = 0
+
+    try:
+        while chunks or pending:
+            # Keep a bounded number of chunks in flight so an early stop wastes little work
+            while chunks and len(pending) < workers * 2:
+                pending.add(pool.submit(_extract_pdf_pages, *chunks.popleft()))
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for number, text in future.result():
+                    yield number, text
+                    finished[number] = len(text)
+
+            # Stop once the pages extracted in order from the start hold enough text
+            while next_page in finished:
+                prefix_chars += finished.pop(next_page)
+                next_page += 1
+            if max_chars is not None and prefix_chars >= max_chars:
+                return
+    finally:
+        # Workers still extracting a chunk after an early stop finish it and exit on their own
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def iter_pdf_pages(file, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, workers=PDF_WORKERS):
+    """
+    Yield (page_number, text) for the pages of a PDF as they finish extracting.
+
+    Long documents are split into page chunks processed by a worker pool, so pages may
+    arrive out of order. Extraction stops after max_pages pages (None: no limit, logging a
+    warning when pages are dropped), or once the pages extracted in order from the start
+    hold at least max_chars characters.
+    """
+    from PyPDF2 import PdfReader
+    data = _read_bytes(file)
+    reader = PdfReader(io.BytesIO(data))
+    n_pages = len(reader.pages)
+    if max_pages is not None and n_pages > max_pages:
+        logger.warning(f"PDF has {n_pages} pages, extracting only the first {max_pages} (PDF_MAX_PAGES)")
+        n_pages = max_pages
+
+    if workers <= 1 or n_pages < PDF_PARALLEL_MIN_PAGES:
+        chars = 0
+        for number in range(n_pages):
+            text = reader.pages[number].extract_text() or ""
+            yield number, text
+            chars += len(text)
+            if max_chars is not None and chars >= max_chars:
+                return
+        return
+
+    yield from _iter_pdf_pages_parallel(data, n_pages, max_chars, workers)
+
+def _parse_pdf(data, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS, workers=PDF_WORKERS):
+    try:
+        pages = dict(iter_pdf_pages(data, max_pages, max_chars, workers))
+    except Exception as e:
+        if workers <= 1:
+            raise
+        logger.warning(f"Parallel PDF extraction failed, retrying serially: {e}")
+        pages = dict(iter_pdf_pages(data, max_pages, max_chars, workers=1))
+
+    # Join the in-order prefix once instead of growing a string page by page
+    parts = []
+    number = 0
+    while number in pages:
+        parts.append(pages[number])
+        number += 1
+    text = "".join(parts)
+    if max_chars is not None and len(text) > max_chars:
+        logger.warning(f"PDF text truncated to {max_chars} of at least {len(text)} characters (PDF_MAX_CHARS)")
+        text = text[:max_chars]
     return text
 
-def extract_text_from_docx(file):
-    doc = Document(file)
+def _parse_docx(data):
+    from docx import Document
+    doc = Document(io.BytesIO(data))
     return "\n".join([para.text for para in doc.paragraphs])
 
-def extract_text_from_txt(file):
-    return file.read().decode('utf-8')
+def _parse_txt(data):
+    return data.decode('utf-8')
+
+def extract_text_from_pdf(file, use_cache=True, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS,
+                          workers=PDF_WORKERS):
+    return _cached_parse(
+        file,
+        f"pdf:{max_pages}:{max_chars}",
+        lambda data: _parse_pdf(data, max_pages, max_chars, workers),
+        use_cache
+    )
+
+def extract_text_from_docx(file, use_cache=True):
+    return _cached_parse(file, "docx", _parse_docx, use_cache)
+
+def extract_text_from_txt(file, use_cache=True):
+    return _cached_parse(file, "txt", _parse_txt, use_cache)
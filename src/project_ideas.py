@@ -1,41 +1,66 @@
-from langchain_community.llms import OpenAI
-from langchain.prompts import PromptTemplate
+import asyncio
 import os
 import streamlit as st
 from dotenv import load_dotenv
+from llm_cache import acached_completion, cached_completion
+from llm_enhancer import LLM_TIMEOUT, _get_openai_api_key, _make_llm
 
 load_dotenv()
 
-def generate_project_ideas(resume_text, skills):
-    # Get API key from environment or Streamlit secrets
-    openai_api_key = os.getenv('OPENAI_API_KEY')
-    if not openai_api_key:
-        try:
-            openai_api_key = st.secrets["OPENAI_API_KEY"]
-        except:
-            st.error("⚠️ OpenAI API key not found. Please set OPENAI_API_KEY in environment variables or Streamlit secrets.")
-            return "OpenAI API key not configured. Please contact the administrator."
+PROJECT_PROMPT_TEMPLATE = (
+    "Based on the following resume and skills, suggest 3 impactful project topics and descriptions which tackle real life problems (not limited to AI/ML) that align with the candidate's background and would impress recruiters in their field.\n"
+    "Resume:\n{resume}\n"
+    "Skills:\n{skills}\n"
+    "Project Ideas:"
+)
+
+def _build_request(resume_text, skills):
+    from langchain.prompts import PromptTemplate
+    prompt = PromptTemplate(
+        input_variables=["resume", "skills"],
+        template=PROJECT_PROMPT_TEMPLATE
+    )
+    inputs = {
+        "resume": resume_text,
+        # Callers pass sets; sorting keeps the prompt, and so the cache key, stable across processes
+        "skills": ", ".join(sorted(set(skills)))
+    }
+    return prompt, inputs
+
+def generate_project_ideas(resume_text, skills, use_cache=True, llm=None):
+    if llm is None:
+        # Get API key from environment or Streamlit secrets
+        openai_api_key, error = _get_openai_api_key()
+        if error:
+            return error
     
-    if not openai_api_key:
-        return "OpenAI API key not available. Please configure your API key to use this feature."
+    try:
+        prompt, inputs = _build_request(resume_text, skills)
+        if llm is None:
+            llm = _make_llm(0.5, openai_api_key)
+        return cached_completion(llm, prompt, inputs, use_cache=use_cache)
+    except Exception as e:
+        st.error(f"Error generating project ideas: {str(e)}")
+        return "Unable to generate project ideas at this time. Please try again later."
+
+async def agenerate_project_ideas(resume_text, skills, use_cache=True, llm=None, timeout=LLM_TIMEOUT):
+    """Async version of generate_project_ideas with a per-call timeout"""
+    if llm is None:
+        openai_api_key, error = _get_openai_api_key()
+        if error:
+            return error
     
     try:
-        prompt = PromptTemplate(
-            input_variables=["resume", "skills"],
-            template=(
-                "Based on the following resume and skills, suggest 3 impactful project topics and descriptions which tackle real life problems (not limited to AI/ML) that align with the candidate's background and would impress recruiters in their field.\n"
-                "Resume:\n{resume}\n"
-                "Skills:\n{skills}\n"
-                "Project Ideas:"
-            )
-        )
-        llm = OpenAI(temperature=0.5, openai_api_key=openai_api_key)
-        return llm(
-            prompt.format(
-                resume=resume_text,
-                skills=", ".join(skills)
-            )
+        prompt, inputs = _build_request(resume_text, skills)
+        if llm is None:
+            llm = _make_llm(0.5, openai_api_key)
+        return await asyncio.wait_for(
+            acached_completion(llm, prompt, inputs, use_cache=use_cache),
+            timeout=timeout
         )
+    except asyncio.TimeoutError:
+        st.error(f"Project idea generation timed out after {timeout:.0f}s.")
+        return "Project ideas took too long to generate. Please try again later."
     except Exception as e:
         st.error(f"Error generating project ideas: {str(e)}")
         return "Unable to generate project ideas at this time. Please try again later."
@@ -0,0 +1,335 @@
+"""
+Opt-in per-request profiler for predict_fit and the Streamlit analysis flow
+
+A captured request gets cProfile call stats and the top tracemalloc allocation sites:
+
+    with profile_request('predict_fit', resume_text=resume, job_description=job):
+        ...
+
+Profiling is off unless PROFILING_ENABLED=1 or enable() is called (the app also profiles a run
+opened with ?profile=1). While on, PROFILE_SAMPLE_RATE of requests are captured, one at a time
+per process. Each capture is written to PROFILE_DIR as <stem>.prof (pstats) and <stem>.json
+(timings, top functions and allocations, and SHA-256 hashes of the inputs - never the raw
+text); the oldest captures are deleted beyond PROFILE_MAX_FILES.
+
+Viewer:
+    python src/request_profiler.py list [--dir DIR] [--name NAME] [--input HASH_PREFIX]
+    python src/request_profiler.py top [--sort tottime|cumtime] [--limit 25] [--name NAME] [--input HASH_PREFIX]
+    python src/request_profiler.py hash FILE    SHA-256 of a file's text, to find its captures
+"""
+import argparse
+import cProfile
+import hashlib
+import itertools
+import json
+import logging
+import os
+import platform
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR') or Path(__file__).parent.parent / 'profiles')
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '1.0'))
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', '50'))
+# Frames kept per traced allocation, and functions / allocation sites summarized per capture
+PROFILE_TRACE_FRAMES = int(os.getenv('PROFILE_TRACE_FRAMES', '1'))
+PROFILE_TOP_N = 20
+
+_enabled = os.getenv('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_active = None
+_sequence = itertools.count(1)
+
+def _fingerprint(value):
+    """Hash of a text input (with its length); numbers and None are kept as they are"""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    data = value if isinstance(value, bytes) else str(value).encode('utf-8', errors='replace')
+    return {'sha256': hashlib.sha256(data).hexdigest(), 'length': len(value)}
+
+def _function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        return name
+    return f"{'/'.join(Path(filename).parts[-2:])}:{line}({name})"
+
+class RequestProfile:
+    """One capture in progress; created by start_profile() or profile_request()"""
+
+    def __init__(self, name, inputs):
+        self.name = name
+        self.inputs = dict(inputs)
+        self.thread = threading.current_thread()
+        self._profiler = cProfile.Profile()
+        self._own_tracemalloc = False
+        self._done = False
+
+    def _begin(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFILE_TRACE_FRAMES)
+            self._own_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._started = time.time()
+        self._wall = time.perf_counter()
+        self._cpu = time.thread_time()
+        self._profiler.enable()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop(error=exc_type is not None)
+        return False
+
+    def add_inputs(self, **inputs):
+        self.inputs.update(inputs)
+
+    def stop(self, error=False, **inputs):
+        """Finish the capture and write it; returns the .json path (None if discarded or failed)"""
+        if self._done:
+            return None
+        self._profiler.disable()
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        self.inputs.update(inputs)
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+            ])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            self._finish()
+
+        try:
+            return self._write(wall, cpu, peak, snapshot, error)
+        except Exception as e:
+            logger.warning(f"⚠️ Could not write profile for {self.name}: {e}")
+            return None
+
+    def discard(self):
+        """Stop without writing anything"""
+        if not self._done:
+            self._profiler.disable()
+            self._finish()
+
+    def _finish(self):
+        global _active
+        self._done = True
+        if self._own_tracemalloc:
+            tracemalloc.stop()
+        with _lock:
+            if _active is self:
+                _active = None
+
+    def _write(self, wall, cpu, peak, snapshot, error):
+        PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+        stem = f"{time.strftime('%Y%m%d_%H%M%S', time.localtime(self._started))}_{os.getpid()}_{next(_sequence):04d}_{self.name}"
+        self._profiler.dump_stats(PROFILE_DIR / f'{stem}.prof')
+
+        stats = pstats.Stats(self._profiler).stats
+        hottest = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP_N]
+        record = {
+            'name': self.name,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self._started)),
+            'pid': os.getpid(),
+            'python': platform.python_version(),
+            'wall_ms': wall * 1000,
+            'cpu_ms': cpu * 1000,
+            'peak_traced_kb': peak / 1024,
+            'error': error,
+            'inputs': {key: _fingerprint(value) for key, value in self.inputs.items()},
+            'top_functions': [
+                {'function': _function_label(func), 'calls': nc, 'tottime_ms': tt * 1000, 'cumtime_ms': ct * 1000}
+                for func, (cc, nc, tt, ct, callers) in hottest
+            ],
+            # Allocations still live when the request finished; see peak_traced_kb for transient use
+            'top_allocations': [
+                {'location': f'{stat.traceback[0].filename}:{stat.traceback[0].lineno}',
+                 'size_kb': stat.size / 1024, 'count': stat.count}
+                for stat in snapshot.statistics('lineno')[:PROFILE_TOP_N]
+            ],
+        }
+        path = PROFILE_DIR / f'{stem}.json'
+        path.write_text(json.dumps(record, indent=2))
+        _rotate()
+        logger.info(f"🔬 Profile of {self.name} written to {path} ({wall * 1000:.1f} ms)")
+        return path
+
+class _NoopProfile:
+    """Returned by profile_request() when the request is not captured"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_inputs(self, **inputs):
+        pass
+
+_NOOP_PROFILE = _NoopProfile()
+
+def start_profile(name, force=False, replace=False, **inputs):
+    """
+    Start capturing a request if profiling is on and the request is sampled (force skips both
+    checks); returns a RequestProfile to stop(), or None
+
+    Only one capture runs per process, so requests nested in a capture are not captured
+    themselves. A capture left unfinished by a dead thread is discarded, as is one on this
+    thread when replace is set (a new Streamlit run after an interrupted one).
+    """
+    global _active
+    if not force and (not _enabled or random.random() >= PROFILE_SAMPLE_RATE):
+        return None
+
+    with _lock:
+        stale = _active
+        if stale is not None and stale.thread.is_alive() and not (
+                replace and stale.thread is threading.current_thread()):
+            return None
+        capture = _active = RequestProfile(name, inputs)
+    if stale is not None:
+        logger.warning(f"⚠️ Discarding unfinished profile of {stale.name}")
+        stale._done = True
+        stale._profiler.disable()
+        # tracemalloc keeps running for the new capture, which now owns it
+        capture._own_tracemalloc = stale._own_tracemalloc
+    capture._begin()
+    return capture
+
+def profile_request(name, **inputs):
+    """Context manager capturing the enclosed request (see start_profile)"""
+    return start_profile(name, **inputs) or _NOOP_PROFILE
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def _captures(directory):
+    return sorted(Path(directory).glob('*.json'))
+
+def _rotate():
+    records = _captures(PROFILE_DIR)
+    for path in records[:max(0, len(records) - PROFILE_MAX_FILES)]:
+        path.unlink(missing_ok=True)
+        path.with_suffix('.prof').unlink(missing_ok=True)
+
+def load_captures(directory=None, name=None, input_prefix=None):
+    """Return [(json_path, record)] oldest first, optionally filtered by name or input hash prefix"""
+    captures = []
+    for path in _captures(directory or PROFILE_DIR):
+        try:
+            record = json.loads(path.read_text())
+        except (OSError, ValueError):
+            continue
+        if name and record.get('name') != name:
+            continue
+        if input_prefix and not any(isinstance(value, dict) and value['sha256'].startswith(input_prefix)
+                                    for value in record.get('inputs', {}).values()):
+            continue
+        captures.append((path, record))
+    return captures
+
+def summarize(captures, sort='tottime', limit=25):
+    """
+    Merge the call stats of several captures
+
+    Returns:
+        list: Up to `limit` dicts (function, profiles, calls, tottime_ms, cumtime_ms) sorted by
+            `sort`, where profiles is the number of captures the function appears in
+    """
+    totals = {}
+    for path, _ in captures:
+        prof = path.with_suffix('.prof')
+        if not prof.exists():
+            continue
+        for func, (cc, nc, tt, ct, callers) in pstats.Stats(str(prof)).stats.items():
+            entry = totals.setdefault(func, [0, 0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += nc
+            entry[2] += tt
+            entry[3] += ct
+    key = 3 if sort == 'cumtime' else 2
+    ranked = sorted(totals.items(), key=lambda item: item[1][key], reverse=True)[:limit]
+    return [{'function': _function_label(func), 'profiles': n, 'calls': calls,
+             'tottime_ms': tt * 1000, 'cumtime_ms': ct * 1000}
+            for func, (n, calls, tt, ct) in ranked]
+
+def _print_list(captures):
+    for path, record in captures:
+        hashes = ' '.join(f"{key}={value['sha256'][:12]}" for key, value in record['inputs'].items()
+                          if isinstance(value, dict))
+        print(f"{path.stem:<48} {record['wall_ms']:9.1f} ms  peak {record['peak_traced_kb']:8.0f} KB  {hashes}")
+    print(f"{len(captures)} capture(s)")
+
+def _print_top(captures, sort, limit):
+    if not captures:
+        print('No captures found')
+        return
+    walls = sorted(record['wall_ms'] for _, record in captures)
+    print(f"{len(captures)} capture(s); wall p50 {walls[len(walls) // 2]:.1f} ms, max {walls[-1]:.1f} ms")
+    print(f"{'tottime ms':>11} {'cumtime ms':>11} {'calls':>9} {'in':>4}  function")
+    for row in summarize(captures, sort, limit):
+        print(f"{row['tottime_ms']:11.1f} {row['cumtime_ms']:11.1f} {row['calls']:9d} {row['profiles']:4d}  {row['function']}")
+
+    allocations = {}
+    for _, record in captures:
+        for alloc in record.get('top_allocations', []):
+            allocations[alloc['location']] = allocations.get(alloc['location'], 0.0) + alloc['size_kb']
+    if allocations:
+        print('\nLargest live allocations at request end (KB, summed over captures)')
+        for location, size in sorted(allocations.items(), key=lambda item: item[1], reverse=True)[:10]:
+            print(f"{size:11.1f}  {location}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Summarize captured request profiles')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for command in ('list', 'top'):
+        sub = subparsers.add_parser(command)
+        sub.add_argument('--dir', type=Path, default=PROFILE_DIR)
+        sub.add_argument('--name', default=None, help='Only captures of this request name')
+        sub.add_argument('--input', default=None, metavar='HASH_PREFIX', help='Only captures with this input hash')
+        if command == 'top':
+            sub.add_argument('--sort', choices=['tottime', 'cumtime'], default='tottime')
+            sub.add_argument('--limit', type=int, default=25)
+    hash_parser = subparsers.add_parser('hash')
+    hash_parser.add_argument('file', type=Path)
+    args = parser.parse_args()
+
+    if args.command == 'hash':
+        # Same digest as a captured text input, so a document's captures can be found with --input
+        sys.path.insert(0, str(Path(__file__).parent))
+        from parsing import extract_text_from_docx, extract_text_from_pdf, extract_text_from_txt
+
+        data = args.file.read_bytes()
+        suffix = args.file.suffix.lower()
+        text = (extract_text_from_pdf(data) if suffix == '.pdf'
+                else extract_text_from_docx(data) if suffix == '.docx' else extract_text_from_txt(data))
+        print(_fingerprint(text)['sha256'])
+        return
+
+    captures = load_captures(args.dir, args.name, args.input)
+    if args.command == 'list':
+        _print_list(captures)
+    else:
+        _print_top(captures, args.sort, args.limit)
+
+if __name__ == '__main__':
+    main()
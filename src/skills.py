@@ -1,4 +1,8 @@
 import re
+from collections import deque
+from functools import lru_cache
+
+from tracing import span, text_size
 
 COMMON_SKILLS = [
     # Programming Languages
@@ -25,12 +29,106 @@ COMMON_SKILLS = [
 def normalize_skill(skill):
     return re.sub(r'[^a-z0-9]', '', skill.lower())
 
+# Word tokens: runs of letters/digits, optionally ending in '++' or '#' (c++, c#, f#)
+_TOKEN_RE = re.compile(r'[^\W_]+(?:\+\+|#)?')
+
+def tokenize_skill_text(text):
+    """Lowercased word tokens used for token-boundary skill matching"""
+    return [token.lower() for token in _TOKEN_RE.findall(text)]
+
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over word tokens for a fixed skill list.
+    
+    Compiled once per skill list, it finds every skill in a single left-to-right
+    pass over the text's tokens. Skills only match whole tokens, so 'go' does not
+    match inside "google". A multi-token skill such as 'next.js' also matches its
+    concatenated form ("nextjs").
+    """
+    
+    def __init__(self, skills):
+        self.skills = tuple(skills)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        
+        for skill in self.skills:
+            tokens = tuple(tokenize_skill_text(skill))
+            if not tokens:
+                continue
+            patterns = {tokens, (''.join(tokens),)}
+            for pattern in patterns:
+                self._add_pattern(pattern, skill)
+        
+        self._build_failure_links()
+    
+    def _add_pattern(self, tokens, skill):
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = next_state
+        if (skill, len(tokens)) not in self._output[state]:
+            self._output[state].append((skill, len(tokens)))
+    
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for token, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(token, 0)
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+    
+    def _scan(self, tokens):
+        """Yield (skill, first_token, last_token) for every match"""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, token in enumerate(tokens):
+            while state and token not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(token, 0)
+            for skill, length in output[state]:
+                yield skill, position - length + 1, position
+    
+    def extract(self, text):
+        """Return the sorted, de-duplicated skills found in text"""
+        return sorted({skill for skill, _, _ in self._scan(tokenize_skill_text(text))})
+    
+    def find(self, text):
+        """Return (skill, start, end) character offsets into text for every match"""
+        spans = [match.span() for match in _TOKEN_RE.finditer(text)]
+        tokens = [text[start:end].lower() for start, end in spans]
+        return [(skill, spans[first][0], spans[last][1]) for skill, first, last in self._scan(tokens)]
+
+@lru_cache(maxsize=16)
+def _compiled_matcher(skills):
+    return SkillMatcher(skills)
+
+def get_skill_matcher(skills=COMMON_SKILLS):
+    """Return the compiled SkillMatcher for a skill list, building it on first use"""
+    return _compiled_matcher(tuple(skills))
+
 def extract_skills(text, skills=COMMON_SKILLS):
-    found = set()
-    text_lower = text.lower()
-    text_normalized = re.sub(r'[^a-z0-9]', '', text_lower)
-    for skill in skills:
-        skill_norm = normalize_skill(skill)
-        if skill_norm in text_normalized:
-            found.add(skill)
-    return sorted(found)
+    with span('skills', text_size(text)):
+        return get_skill_matcher(skills).extract(text)
+
+def find_skill_matches(text, skills=COMMON_SKILLS):
+    """Return (skill, start, end) character offsets of every skill occurrence in text"""
+    return get_skill_matcher(skills).find(text)
+
+def skill_match(resume_skills, jd_skills):
+    """Return (matched, missing, extra, match_score) where match_score is the % of job skills matched"""
+    matched_skills = set(resume_skills) & set(jd_skills)
+    missing_skills = set(jd_skills) - set(resume_skills)
+    extra_skills = set(resume_skills) - set(jd_skills)
+    match_score = len(matched_skills) / len(jd_skills) * 100 if jd_skills else 0
+    return matched_skills, missing_skills, extra_skills, match_score
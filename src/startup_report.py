@@ -0,0 +1,121 @@
+"""
+Cold-start report: wall time to run the app script once and an import-time breakdown per module
+
+Runs the target under `python -X importtime` in a fresh process (app/main.py executes in
+Streamlit's bare mode, which renders nothing but runs the same top-level code as a first
+page load) and summarises the output:
+
+    python src/startup_report.py                      # app/main.py
+    python src/startup_report.py --first-prediction   # also time the deferred model load
+    python src/startup_report.py --json --budget 3.0  # machine-readable, exit 1 over budget
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+SRC_DIR = Path(__file__).parent
+APP_SCRIPT = ROOT / 'app' / 'main.py'
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$')
+
+# First prediction after startup; pays for the imports and model load the app defers
+_FIRST_PREDICTION = (
+    "import sys, time; sys.path.insert(0, {src!r}); "
+    "from fit_classifier import predict_fit; start = time.perf_counter(); "
+    "predict_fit('Python developer with AWS and Docker', 'Backend engineer: Python, AWS'); "
+    "print(time.perf_counter() - start)"
+)
+
+def parse_importtime(stderr):
+    """Return [(name, self_us, cumulative_us, depth)] from `-X importtime` output"""
+    entries = []
+    for line in stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+def _run(args):
+    env = dict(os.environ, PYTHONWARNINGS='ignore')
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+    return time.perf_counter() - start, proc
+
+def startup_report(script=APP_SCRIPT, top=15, first_prediction=False):
+    """
+    Measure a cold start of `script`
+
+    Returns:
+        dict: wall_seconds, import_seconds, app_modules (cumulative seconds per src/ module),
+            packages (self seconds per top-level package) and optionally first_prediction_seconds
+    """
+    wall_seconds, proc = _run(['-X', 'importtime', str(script)])
+    entries = parse_importtime(proc.stderr)
+
+    app_names = {path.stem for path in SRC_DIR.glob('*.py')}
+    app_modules = {}
+    packages = defaultdict(int)
+    for name, self_us, cumulative_us, depth in entries:
+        if name in app_names and name not in app_modules:
+            app_modules[name] = cumulative_us / 1e6
+        packages[name.split('.')[0]] += self_us
+
+    report = {
+        'script': str(script),
+        'wall_seconds': wall_seconds,
+        'import_seconds': sum(self_us for _, self_us, _, _ in entries) / 1e6,
+        'app_modules': dict(sorted(app_modules.items(), key=lambda item: -item[1])),
+        'packages': {name: us / 1e6 for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+    }
+
+    if first_prediction:
+        _, proc = _run(['-c', _FIRST_PREDICTION.format(src=str(SRC_DIR))])
+        lines = proc.stdout.strip().splitlines()
+        report['first_prediction_seconds'] = float(lines[-1]) if proc.returncode == 0 and lines else None
+    return report
+
+def _print_report(report):
+    print(f"Cold start of {report['script']}: {report['wall_seconds']:.2f}s wall, "
+          f"{report['import_seconds']:.2f}s importing")
+    if 'first_prediction_seconds' in report:
+        seconds = report['first_prediction_seconds']
+        print(f"First prediction (deferred imports + model load): "
+              f"{'failed' if seconds is None else f'{seconds:.2f}s'}")
+
+    print("\nApp modules (cumulative import time):")
+    for name, seconds in report['app_modules'].items():
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+
+    print("\nHeaviest packages (self import time):")
+    for name, seconds in report['packages'].items():
+        print(f"  {name:<28} {seconds * 1000:8.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description='Report cold-start time and import-time breakdown')
+    parser.add_argument('script', nargs='?', type=Path, default=APP_SCRIPT)
+    parser.add_argument('--top', type=int, default=15, help='Number of packages to list')
+    parser.add_argument('--first-prediction', action='store_true', help='Also time the first predict_fit call')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--budget', type=float, default=None, help='Exit with status 1 if wall time exceeds this')
+    args = parser.parse_args()
+
+    report = startup_report(args.script, args.top, args.first_prediction)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        _print_report(report)
+
+    if args.budget is not None and report['wall_seconds'] > args.budget:
+        print(f"\n❌ Cold start {report['wall_seconds']:.2f}s exceeds budget {args.budget:.2f}s", file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
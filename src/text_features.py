@@ -0,0 +1,62 @@
+"""
+Statistical text features shared by the serving classifier and the production predictor
+"""
+import numpy as np
+
+STAT_SUFFIXES = ('length', 'word_count', 'unique_words', 'avg_word_length', 'sentence_count', 'capital_ratio')
+
+# Every byte that is not an ASCII capital, for counting capitals with a single bytes.translate
+_NON_UPPER_BYTES = bytes(b for b in range(256) if not (65 <= b <= 90))
+
+def _count_upper(text):
+    """Count characters for which str.isupper() is true"""
+    if text.isascii():
+        return len(text.encode('ascii').translate(None, _NON_UPPER_BYTES))
+    return sum(map(str.isupper, text))
+
+def text_statistics(raw_text, processed_text):
+    """
+    Compute the six statistical features for one document
+
+    Args:
+        raw_text (str): Original document text (length, sentence count, capital ratio)
+        processed_text (str): Preprocessed text (word count, unique words, average word length)
+
+    Returns:
+        tuple: Values in STAT_SUFFIXES order, matching the training-time pandas features
+    """
+    if not isinstance(raw_text, str):
+        raw_text = '' if raw_text is None or raw_text != raw_text else str(raw_text)
+    if not isinstance(processed_text, str):
+        processed_text = '' if processed_text is None or processed_text != processed_text else str(processed_text)
+
+    # Split once and reuse the tokens for all word-level features
+    words = processed_text.split()
+    n_words = len(words)
+    avg_word_length = sum(map(len, words)) / n_words if n_words else 0
+
+    length = len(raw_text)
+    sentence_count = raw_text.count('.') + raw_text.count('!') + raw_text.count('?')
+    capital_ratio = _count_upper(raw_text) / length if length else 0
+
+    return (length, n_words, len(set(words)), avg_word_length, sentence_count, capital_ratio)
+
+def text_statistics_batch(raw_texts, processed_texts):
+    """
+    Compute the statistical features for a list of documents
+
+    This is a plain loop over text_statistics: the counts are str methods run per document, so
+    there is nothing for NumPy to vectorize. It avoids the pandas Series and per-feature .apply
+    passes the features used to be built with, and fills one preallocated array.
+
+    Args:
+        raw_texts (list): Original document texts
+        processed_texts (list): Preprocessed texts, aligned with raw_texts
+
+    Returns:
+        np.ndarray: float64 array of shape (n_documents, 6) in STAT_SUFFIXES order
+    """
+    stats = np.zeros((len(raw_texts), len(STAT_SUFFIXES)), dtype=np.float64)
+    for i, (raw_text, processed_text) in enumerate(zip(raw_texts, processed_texts)):
+        stats[i] = text_statistics(raw_text, processed_text)
+    return stats
@@ -0,0 +1,230 @@
+"""
+Lightweight tracing and metrics for the analysis pipeline
+
+Stages are wrapped in spans:
+
+    with span('parse', nbytes=len(data), kind='pdf'):
+        ...
+
+Sizes of caller-supplied text are taken with text_size(), which never raises, so tracing cannot
+turn odd input (None, NaN) into a different result.
+
+A span records wall time, CPU time of the calling thread and bytes processed, and knows its
+parent span (tracked with contextvars, so nesting works across threads and asyncio tasks).
+Finished spans are aggregated per stage into a latency histogram plus CPU, byte and error
+totals; count() keeps labelled counters such as predictions by model type.
+
+Exports:
+    prometheus_text()   Prometheus text exposition format (version 0.0.4)
+    snapshot()          the same aggregates as a dict
+    JSON logs           one JSON line per finished span on the "tracing" logger at INFO
+
+Tracing is off unless TRACING_ENABLED=1 or enable() is called. While disabled, span() returns
+a shared no-op context manager and count() returns immediately, so instrumented code pays one
+function call per stage.
+"""
+import contextvars
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'career_advisor'
+# Upper bounds (seconds) of the stage latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = os.getenv('TRACING_ENABLED', '').lower() in ('1', 'true', 'yes')
+_lock = threading.Lock()
+_stages = {}
+_counters = {}
+_current = contextvars.ContextVar('tracing_span', default=None)
+_span_ids = itertools.count(1)
+
+class _NoopSpan:
+    """Returned by span() while tracing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def add_bytes(self, nbytes):
+        pass
+
+    def set(self, **attrs):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+class Span:
+    """A timed stage; use through span()"""
+    __slots__ = ('stage', 'nbytes', 'attrs', 'span_id', 'parent_id', 'trace_id', '_token', '_wall', '_cpu')
+
+    def __init__(self, stage, nbytes=0, attrs=None):
+        self.stage = stage
+        self.nbytes = nbytes
+        self.attrs = attrs or {}
+        self.span_id = next(_span_ids)
+
+    def __enter__(self):
+        parent = _current.get()
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else self.span_id
+        self._token = _current.set(self)
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        wall = time.perf_counter() - self._wall
+        # Thread CPU time; for async spans it includes other tasks run on the thread meanwhile
+        cpu = time.thread_time() - self._cpu
+        _current.reset(self._token)
+        _record(self, wall, cpu, exc_type is not None)
+        return False
+
+    def add_bytes(self, nbytes):
+        self.nbytes += nbytes
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+def text_size(*texts):
+    """Total len() of the str / bytes arguments; anything else (None, NaN, ...) counts as 0"""
+    return sum(len(text) for text in texts if isinstance(text, (str, bytes)))
+
+def span(stage, nbytes=0, **attrs):
+    """Context manager timing one stage; attrs are added to the JSON log line"""
+    if not _enabled:
+        return _NOOP_SPAN
+    return Span(stage, nbytes, attrs)
+
+def traced(stage):
+    """Decorator running the function inside span(stage)"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with Span(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, amount=1, **labels):
+    """Add to the counter `name` with the given labels (exported as <prefix>_<name>_total)"""
+    if not _enabled:
+        return
+    key = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+def _record(finished, wall, cpu, error):
+    with _lock:
+        stats = _stages.get(finished.stage)
+        if stats is None:
+            stats = _stages[finished.stage] = {
+                'count': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'bytes': 0,
+                'buckets': [0] * len(LATENCY_BUCKETS),
+            }
+        stats['count'] += 1
+        stats['errors'] += int(error)
+        stats['wall_seconds'] += wall
+        stats['cpu_seconds'] += cpu
+        stats['bytes'] += finished.nbytes
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if wall <= bound:
+                stats['buckets'][i] += 1
+                break
+
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(json.dumps({
+            'event': 'span',
+            'stage': finished.stage,
+            'trace_id': finished.trace_id,
+            'span_id': finished.span_id,
+            'parent_id': finished.parent_id,
+            'wall_ms': round(wall * 1000, 3),
+            'cpu_ms': round(cpu * 1000, 3),
+            'bytes': finished.nbytes,
+            'error': error,
+            'ts': time.time(),
+            **finished.attrs,
+        }, default=str))
+
+def enable():
+    global _enabled
+    _enabled = True
+
+def disable():
+    global _enabled
+    _enabled = False
+
+def is_enabled():
+    return _enabled
+
+def reset():
+    """Drop all aggregated spans and counters"""
+    with _lock:
+        _stages.clear()
+        _counters.clear()
+
+def snapshot():
+    """Return {'stages': {stage: totals}, 'counters': [{'name', 'labels', 'value'}]}"""
+    with _lock:
+        return {
+            'enabled': _enabled,
+            'stages': {
+                stage: {key: (list(value) if key == 'buckets' else value) for key, value in stats.items()}
+                for stage, stats in _stages.items()
+            },
+            'counters': [{'name': name, 'labels': dict(labels), 'value': value}
+                         for (name, labels), value in _counters.items()],
+        }
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+def prometheus_text():
+    """Aggregates in the Prometheus text exposition format"""
+    data = snapshot()
+    stage_metric = f'{METRIC_PREFIX}_stage_duration_seconds'
+    lines = [f'# HELP {stage_metric} Wall time per pipeline stage', f'# TYPE {stage_metric} histogram']
+    for stage, stats in sorted(data['stages'].items()):
+        cumulative = 0
+        for bound, bucket in zip(LATENCY_BUCKETS, stats['buckets']):
+            cumulative += bucket
+            lines.append(f'{stage_metric}_bucket{_labels([("stage", stage), ("le", bound)])} {cumulative}')
+        lines.append(f'{stage_metric}_bucket{_labels([("stage", stage), ("le", "+Inf")])} {stats["count"]}')
+        lines.append(f'{stage_metric}_sum{_labels([("stage", stage)])} {stats["wall_seconds"]:.9f}')
+        lines.append(f'{stage_metric}_count{_labels([("stage", stage)])} {stats["count"]}')
+
+    for key, help_text in (('cpu_seconds', 'CPU time of the calling thread per pipeline stage'),
+                           ('bytes', 'Bytes processed per pipeline stage'),
+                           ('errors', 'Spans that ended with an exception per pipeline stage')):
+        metric = f'{METRIC_PREFIX}_stage_{key}_total'
+        lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} counter']
+        for stage, stats in sorted(data['stages'].items()):
+            lines.append(f'{metric}{_labels([("stage", stage)])} {stats[key]}')
+
+    by_name = {}
+    for counter in data['counters']:
+        by_name.setdefault(counter['name'], []).append(counter)
+    for name, counters in sorted(by_name.items()):
+        metric = f'{METRIC_PREFIX}_{name}_total'
+        lines.append(f'# TYPE {metric} counter')
+        for counter in counters:
+            lines.append(f'{metric}{_labels(sorted(counter["labels"].items()))} {counter["value"]}')
+    return '\n'.join(lines) + '\n'
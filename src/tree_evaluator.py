@@ -0,0 +1,360 @@
+"""
+NumPy evaluator for the fit model's XGBoost trees
+
+CompiledTrees flattens a trained gbtree booster into contiguous node arrays (split feature,
+threshold, children, default direction for missing values, leaf value) and scores rows without
+XGBoost: all trees are walked together, one depth level per step, so a row only visits the nodes
+on its path. Leaves point to themselves, so a fixed number of steps (the maximum depth) brings
+every tree to its leaf without per-tree bookkeeping.
+
+Only the features some tree splits on are read: a sparse row is scattered into a compact dense
+row of those columns, an absent entry being a missing value as in XGBoost. For single rows this
+skips the DMatrix construction that dominates XGBoost's predict_proba on small inputs.
+
+The arrays are saved as trees.npz in the split model artifact (model_artifact.py), which lets
+the classifier serve without importing XGBoost (FIT_TREE_EVALUATOR=only).
+
+Usage:
+    python src/tree_evaluator.py check [--pairs 200] [--rows 500]    compare with XGBoost
+    python src/tree_evaluator.py bench [--repeats 300]               latency against predict_proba
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+TREES_FILE = 'trees.npz'
+# Largest absolute probability difference from XGBoost the evaluator may show
+TOLERANCE = 1e-6
+SUPPORTED_OBJECTIVES = ('multi:softprob', 'binary:logistic')
+
+_ARRAYS = ('split_index', 'threshold', 'left', 'default_left', 'leaf_value', 'roots', 'tree_class', 'base_margin')
+
+def _parse_base_score(value):
+    """base_score is a scalar string in older models and a bracketed vector ("[5E-1,5E-1]") since XGBoost 2"""
+    return np.array([float(v) for v in str(value).strip('[]').split(',')], dtype=np.float64)
+
+def _flatten_tree(tree, offset):
+    """
+    Renumber one JSON tree breadth-first so every split's right child directly follows its left child
+
+    Returns:
+        tuple: (split_index, threshold, left, default_left, leaf_value, depth), node ids shifted by offset
+    """
+    if any(split_type != 0 for split_type in tree['split_type']):
+        raise ValueError("Categorical splits are not supported")
+    if int(tree['tree_param'].get('size_leaf_vector', '1')) > 1:
+        raise ValueError("Vector leaves are not supported")
+
+    left_children, right_children = tree['left_children'], tree['right_children']
+    order = [0]  # Original id of each renumbered node
+    depth = [0]
+    left = [0] * len(left_children)
+    for node, original in enumerate(order):
+        if left_children[original] == -1:
+            left[node] = node
+            continue
+        left[node] = len(order)
+        order += [left_children[original], right_children[original]]
+        depth += [depth[node] + 1] * 2
+
+    order = np.array(order)
+    is_leaf = np.asarray(left_children)[order] == -1
+    # Leaves keep their value in split_conditions; a NaN threshold keeps every row on the leaf
+    conditions = np.asarray(tree['split_conditions'], dtype=np.float32)[order]
+    return (np.where(is_leaf, 0, np.asarray(tree['split_indices'])[order]),
+            np.where(is_leaf, np.float32(np.nan), conditions),
+            np.array(left) + offset,
+            np.asarray(tree['default_left'], dtype=bool)[order],
+            np.where(is_leaf, conditions, 0),
+            max(depth))
+
+class CompiledTrees:
+    """
+    A gbtree ensemble as flat node arrays; build with from_booster() or load()
+
+    Node ids are global across trees. A split sends a row to left[node] when its value is below
+    threshold[node] and to left[node] + 1 otherwise; a missing value follows default_left[node].
+    """
+
+    def __init__(self, split_index, threshold, left, default_left, leaf_value, roots, tree_class,
+                 base_margin, num_feature, max_depth, objective):
+        self.split_index = split_index
+        self.threshold = threshold
+        self.left = left
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.tree_class = tree_class
+        self.base_margin = base_margin
+        self.num_feature = int(num_feature)
+        self.max_depth = int(max_depth)
+        self.objective = objective
+        self.num_class = len(base_margin)
+
+        # Trees grouped by output class, in boosting order within each class
+        trees_per_class = np.bincount(tree_class, minlength=self.num_class)
+        if (trees_per_class != trees_per_class[0]).any():
+            raise ValueError(f"Uneven number of trees per class: {trees_per_class.tolist()}")
+        self._class_order = np.argsort(tree_class, kind='stable')
+
+        # Rows are evaluated on a compact copy of their split-feature columns, stored twice: with
+        # missing values as -inf (below any threshold, so left) and as +inf (right). Each node
+        # reads the copy matching its default direction, so the walk never tests for NaN.
+        self._split_columns = self.split_features()
+        self._width = len(self._split_columns) + 1  # The last column collects entries no tree splits on
+        # intp, so scattering a row at these positions needs no index conversion copy
+        self._column_slot = np.full(self.num_feature, self._width - 1, dtype=np.intp)
+        self._column_slot[self._split_columns] = np.arange(len(self._split_columns))
+        self._node_slot = (np.searchsorted(self._split_columns, split_index)
+                           + np.where(default_left, 0, self._width)).astype(np.int32)
+
+    @classmethod
+    def from_booster(cls, booster):
+        """Compile an xgboost.Booster (e.g. XGBClassifier.get_booster())"""
+        return cls.from_model_json(json.loads(booster.save_raw('json')))
+
+    @classmethod
+    def from_model_json(cls, model):
+        """Compile the dict of an XGBoost JSON model; raises ValueError for unsupported models"""
+        learner = model['learner']
+        objective = learner['objective']['name']
+        if objective not in SUPPORTED_OBJECTIVES:
+            raise ValueError(f"Unsupported objective {objective}")
+        if learner['gradient_booster']['name'] != 'gbtree':
+            raise ValueError(f"Unsupported booster {learner['gradient_booster']['name']}")
+
+        params = learner['learner_model_param']
+        num_class = max(int(params.get('num_class', 0)), 1)
+        base_score = np.broadcast_to(_parse_base_score(params['base_score']), (num_class,)).copy()
+        # Softprob margins start at base_score itself; the logistic one is stored as a probability
+        base_margin = np.log(base_score / (1 - base_score)) if objective == 'binary:logistic' else base_score
+
+        gbtree = learner['gradient_booster']['model']
+        trees = gbtree['trees']
+        tree_info = gbtree['tree_info']
+        # predict_proba stops at the best iteration when the model was trained with early stopping
+        best_iteration = learner.get('attributes', {}).get('best_iteration')
+        if best_iteration is not None:
+            indptr = gbtree.get('iteration_indptr')
+            n_trees = indptr[int(best_iteration) + 1] if indptr else (int(best_iteration) + 1) * num_class
+            trees, tree_info = trees[:n_trees], tree_info[:n_trees]
+
+        parts, roots = [], []
+        offset = 0
+        for tree in trees:
+            parts.append(_flatten_tree(tree, offset))
+            roots.append(offset)
+            offset += len(parts[-1][0])
+        split_index, threshold, left, default_left, leaf_value, depths = zip(*parts)
+
+        return cls(
+            split_index=np.concatenate(split_index).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float32),
+            left=np.concatenate(left).astype(np.int32),
+            default_left=np.concatenate(default_left),
+            leaf_value=np.concatenate(leaf_value).astype(np.float32),
+            roots=np.array(roots, dtype=np.int32),
+            tree_class=np.asarray(tree_info, dtype=np.int32),
+            base_margin=base_margin,
+            num_feature=int(params['num_feature']),
+            max_depth=max(depths),
+            objective=objective,
+        )
+
+    def save(self, path):
+        meta = {'num_feature': self.num_feature, 'max_depth': self.max_depth, 'objective': self.objective}
+        np.savez(path, meta=np.array(json.dumps(meta)), **{name: getattr(self, name) for name in _ARRAYS})
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            return cls(**{name: data[name] for name in _ARRAYS}, **meta)
+
+    @property
+    def n_nodes(self):
+        return len(self.left)
+
+    def split_features(self):
+        """Sorted indices of the features any tree splits on"""
+        return np.unique(self.split_index[~np.isnan(self.threshold)]).astype(np.int64)
+
+    def predict_margin(self, X):
+        """
+        Raw per-class scores, as XGBoost's predict(..., output_margin=True)
+
+        Args:
+            X: scipy sparse matrix (absent entries are missing) or dense 2-D array (NaN is missing)
+
+        Returns:
+            np.ndarray: float64 array of shape (n_rows, num_class)
+        """
+        values = self._split_values(X)
+        n_rows = values.shape[0]
+        values = values.ravel()
+        # Start of each row's slice of the flattened values
+        offsets = (np.arange(n_rows, dtype=np.int32) * (2 * self._width))[:, None]
+        node = np.broadcast_to(self.roots, (n_rows, len(self.roots)))
+        for _ in range(self.max_depth):
+            node = self.left[node] + (values[offsets + self._node_slot[node]] >= self.threshold[node])
+
+        # Summed in float32 from the base margin, tree by tree, as XGBoost does
+        leaves = np.empty((n_rows, self.num_class, len(self.roots) // self.num_class + 1), dtype=np.float32)
+        leaves[:, :, 0] = self.base_margin
+        leaves[:, :, 1:] = self.leaf_value[node[:, self._class_order]].reshape(n_rows, self.num_class, -1)
+        return np.cumsum(leaves, axis=2)[:, :, -1].astype(np.float64)
+
+    def predict_proba(self, X):
+        """Class probabilities, as XGBClassifier.predict_proba (float32, shape (n_rows, n_classes))"""
+        margin = self.predict_margin(X)
+        if self.objective == 'binary:logistic':
+            positive = 1.0 / (1.0 + np.exp(-margin[:, 0]))
+            return np.column_stack([1.0 - positive, positive]).astype(np.float32)
+        exp = np.exp(margin - margin.max(axis=1, keepdims=True))
+        return (exp / exp.sum(axis=1, keepdims=True)).astype(np.float32)
+
+    def _split_values(self, X):
+        """The split-feature columns of X as float32 (n_rows, 2 * width): missing as -inf, then as +inf"""
+        if X.shape[1] != self.num_feature:
+            raise ValueError(f"Expected {self.num_feature} features, got {X.shape[1]}")
+        n_rows = X.shape[0]
+        values = np.empty((n_rows, 2, self._width), dtype=np.float32)
+        values[:, 0] = -np.inf
+        values[:, 1] = np.inf
+        if hasattr(X, 'tocsr'):
+            X = X.tocsr()
+            # Flat position of each stored entry in its row's -inf copy
+            positions = self._column_slot[X.indices]
+            if n_rows > 1:
+                positions += np.repeat(np.arange(n_rows, dtype=np.intp) * (2 * self._width), np.diff(X.indptr))
+            data = X.data.astype(np.float32, copy=False)
+        else:
+            dense = np.asarray(X, dtype=np.float32)[:, self._split_columns]
+            positions = (np.arange(n_rows, dtype=np.intp)[:, None] * (2 * self._width)
+                         + np.arange(dense.shape[1])).ravel()
+            data = dense.ravel()
+
+        # NaN entries are missing values too
+        present = ~np.isnan(data)
+        if not present.all():
+            positions, data = positions[present], data[present]
+        values = values.reshape(-1)
+        values[positions] = data
+        positions += self._width
+        values[positions] = data
+        return values.reshape(n_rows, -1)
+
+def max_difference(trees, model, X):
+    """Largest absolute difference of probabilities and of margins between the evaluator and an XGBClassifier"""
+    proba = np.abs(trees.predict_proba(X) - model.predict_proba(X)).max()
+    margin = np.abs(trees.predict_margin(X) - model.predict(X, output_margin=True).reshape(X.shape[0], -1)).max()
+    return float(proba), float(margin)
+
+def random_rows(n_rows, split_features, num_feature, seed=0, missing_share=0.3):
+    """
+    Sparse rows with random values on the split features, a share of them left out (missing),
+    for exercising every branch including the default directions
+    """
+    import scipy.sparse as sp
+
+    rng = np.random.default_rng(seed)
+    present = rng.random((n_rows, len(split_features))) >= missing_share
+    values = rng.random((n_rows, len(split_features)), dtype=np.float32)
+    # TF-IDF and ratio features live in [0, 1]; scale some up so count features take both branches
+    values *= np.where(rng.random(len(split_features)) < 0.2, 5000, 1).astype(np.float32)
+    values[rng.random(values.shape) < 0.3] = 0
+    rows, cols = np.nonzero(present)
+    return sp.csr_matrix((values[rows, cols], (rows, split_features[cols])), shape=(n_rows, num_feature))
+
+def _load_classifier():
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fit_classifier import get_classifier
+
+    classifier = get_classifier()
+    if not classifier.is_loaded or classifier.model is None:
+        raise SystemExit('❌ The XGBoost model is not loaded')
+    return classifier
+
+def _pair_rows(classifier, n_pairs):
+    """Sparse feature rows of synthetic resume/job pairs of mixed sizes"""
+    sys.path.insert(0, str(Path(__file__).parent.parent / 'benchmarks'))
+    import synthetic
+
+    sizes = list(synthetic.SIZES)
+    resumes = [synthetic.resume_text(sizes[i % len(sizes)], i) for i in range(n_pairs)]
+    jobs = [synthetic.job_text(sizes[(i // len(sizes)) % len(sizes)], i) for i in range(n_pairs)]
+    return classifier._assemble_sparse_rows(list(zip(
+        classifier._compute_document_blocks(resumes, 'resume_text'),
+        classifier._compute_document_blocks(jobs, 'job_description_text'))))
+
+def _check(n_pairs, n_rows):
+    classifier = _load_classifier()
+    trees = CompiledTrees.from_booster(classifier.model.get_booster())
+    print(f"Compiled {len(trees.roots)} trees, {trees.n_nodes} nodes, max depth {trees.max_depth}, "
+          f"{len(trees.split_features())} split features ({trees.objective})")
+
+    dense = random_rows(min(n_rows, 100), trees.split_features(), trees.num_feature, seed=1).toarray()
+    dense[dense == 0] = np.nan
+    checks = {
+        'pipeline rows': _pair_rows(classifier, n_pairs),
+        'random rows with missing values': random_rows(n_rows, trees.split_features(), trees.num_feature),
+        'dense rows with NaN': dense,
+    }
+
+    worst = 0.0
+    for name, X in checks.items():
+        proba_diff, margin_diff = max_difference(trees, classifier.model, X)
+        worst = max(worst, proba_diff)
+        print(f"  {name:<32} {X.shape[0]:5d} rows  max |proba diff| {proba_diff:.2e}  "
+              f"max |margin diff| {margin_diff:.2e}")
+    if worst > TOLERANCE:
+        print(f"❌ Probabilities differ by up to {worst:.2e} (tolerance {TOLERANCE:.0e})")
+        sys.exit(1)
+    print(f"✅ Matches XGBoost within {TOLERANCE:.0e}")
+
+def _median_ms(func, repeats):
+    func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return float(np.median(samples) * 1000)
+
+def _bench(repeats):
+    classifier = _load_classifier()
+    trees = CompiledTrees.from_booster(classifier.model.get_booster())
+    rows = _pair_rows(classifier, 256)
+
+    print(f"{'rows':>5} {'xgboost ms':>11} {'numpy ms':>9} {'speedup':>8}")
+    for n in (1, 2, 4, 8, 16, 32, 64, 256):
+        X = rows[:n]
+        xgb_ms = _median_ms(lambda: classifier.model.predict_proba(X), max(repeats // n, 5))
+        numpy_ms = _median_ms(lambda: trees.predict_proba(X), max(repeats // n, 5))
+        print(f"{n:5d} {xgb_ms:11.3f} {numpy_ms:9.3f} {xgb_ms / numpy_ms:7.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description='Check or benchmark the NumPy tree evaluator against XGBoost')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    check_parser = subparsers.add_parser('check')
+    check_parser.add_argument('--pairs', type=int, default=200, help='Synthetic resume/job pairs')
+    check_parser.add_argument('--rows', type=int, default=500, help='Random rows with missing values')
+    bench_parser = subparsers.add_parser('bench')
+    bench_parser.add_argument('--repeats', type=int, default=300)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    if args.command == 'check':
+        _check(args.pairs, args.rows)
+    else:
+        _bench(args.repeats)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+"""
+Model-guided TF-IDF vocabulary pruning
+
+The XGBoost model only splits on a fraction of the ~10k features the pipeline generates.
+prune_pipeline() builds a pipeline whose model reads only the features used in a split and
+whose vectorizers only emit the corresponding TF-IDF columns.
+
+Every vectorizer keeps its full vocabulary and IDF weights: the L2 normalization of a
+TF-IDF row runs over all vocabulary terms, so dropping unused terms would change the
+values of the used ones. Pruning therefore narrows the output and the model input, and
+predictions stay bitwise identical.
+
+Usage:
+    python src/vocab_pruning.py [--pickle PATH] [--out PATH]   # writes and checks a pruned pickle
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+MODELS_DIR = Path(__file__).parent.parent / 'models'
+
+class PrunedTfidfVectorizer(TfidfVectorizer):
+    """
+    TfidfVectorizer that emits only the vocabulary columns listed in output_indices_.
+
+    Weighting and normalization are computed over the full vocabulary exactly as in
+    TfidfVectorizer; the unused columns are dropped afterwards. Build instances with
+    prune_vectorizer() rather than fitting them.
+    """
+
+    def transform(self, raw_documents):
+        return super().transform(raw_documents)[:, self.output_indices_]
+
+    def get_feature_names_out(self, input_features=None):
+        return super().get_feature_names_out(input_features)[self.output_indices_]
+
+def prune_vectorizer(vectorizer, output_indices):
+    """
+    Return a PrunedTfidfVectorizer emitting output_indices; the fitted vocabulary and IDF
+    weights are shared with `vectorizer`, not copied (they may be memory-mapped)
+    """
+    pruned = PrunedTfidfVectorizer.__new__(PrunedTfidfVectorizer)
+    pruned.__dict__.update(vectorizer.__dict__)
+    pruned.output_indices_ = np.asarray(output_indices, dtype=np.int64)
+    return pruned
+
+def used_feature_indices(booster):
+    """Sorted indices of the features the booster splits on at least once"""
+    names = booster.feature_names or [f'f{i}' for i in range(booster.num_features())]
+    index = {name: i for i, name in enumerate(names)}
+    return np.array(sorted(index[name] for name in booster.get_score(importance_type='weight')), dtype=np.int64)
+
+def prune_model(model, keep):
+    """
+    Return a copy of an XGBClassifier that reads only the features in `keep` (sorted indices),
+    with split feature indices remapped to the narrower input
+    """
+    import xgboost as xgb
+
+    remap = np.full(model.get_booster().num_features(), -1, dtype=np.int64)
+    remap[keep] = np.arange(len(keep))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'model.json'
+        model.save_model(path)
+        data = json.loads(path.read_text())
+
+        learner = data['learner']
+        learner['learner_model_param']['num_feature'] = str(len(keep))
+        for key in ('feature_names', 'feature_types'):
+            if learner.get(key):
+                learner[key] = [learner[key][i] for i in keep]
+        for tree in learner['gradient_booster']['model']['trees']:
+            tree['tree_param']['num_feature'] = str(len(keep))
+            # Leaves carry a placeholder split index of 0, which may not be a kept feature
+            tree['split_indices'] = [
+                int(remap[feature]) if left != -1 else 0
+                for feature, left in zip(tree['split_indices'], tree['left_children'])
+            ]
+
+        path.write_text(json.dumps(data))
+        pruned = xgb.XGBClassifier()
+        pruned.load_model(path)
+    return pruned
+
+def prune_pipeline(pipeline_data):
+    """
+    Build a pruned copy of a pipeline dict (as stored in ml_pipeline_xgboost_*.pkl)
+
+    Returns:
+        tuple: (pruned pipeline dict, report dict)
+    """
+    feature_columns = list(pipeline_data['feature_columns'])
+    keep = used_feature_indices(pipeline_data['model'].get_booster())
+    kept_names = [feature_columns[i] for i in keep]
+    kept_set = set(kept_names)
+
+    vectorizers = {}
+    report = {'model_input_width': [len(feature_columns), len(keep)], 'vectorizer_output_width': {}}
+    for col_name, vectorizer in pipeline_data['vectorizers'].items():
+        output_indices = [i for i in range(len(vectorizer.vocabulary_)) if f'{col_name}_tfidf_{i}' in kept_set]
+        vectorizers[col_name] = prune_vectorizer(vectorizer, output_indices)
+        report['vectorizer_output_width'][col_name] = [len(vectorizer.vocabulary_), len(output_indices)]
+
+    pruned = dict(pipeline_data)
+    pruned.update({
+        'model': prune_model(pipeline_data['model'], keep),
+        'vectorizers': vectorizers,
+        'feature_columns': kept_names,
+        'pruned_from': {'n_features': len(feature_columns), 'timestamp': pipeline_data.get('timestamp')},
+    })
+    return pruned, report
+
+def _size(obj):
+    import pickle
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+def _best_time(func, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def compare_pipelines(original, pruned, resumes, jobs, repeats=3):
+    """
+    Score every resume against every job with both pipelines through AdvancedFitClassifier
+
+    Returns:
+        dict: Timings, maximum probability difference and whether all outputs are identical
+    """
+    sys.path.insert(0, str(Path(__file__).parent))
+    from fit_classifier import AdvancedFitClassifier
+
+    results = {}
+    for name, pipeline_data in (('original', original), ('pruned', pruned)):
+        classifier = AdvancedFitClassifier(pipeline_data)
+        # Repeats would otherwise time feature cache hits
+        for cache in classifier.feature_caches.values():
+            cache.max_bytes = 0
+        processed = [classifier._preprocess_text(text) for text in resumes]
+        vectorizer = pipeline_data['vectorizers']['resume_text']
+        transform_seconds, _ = _best_time(lambda: vectorizer.transform(processed), repeats)
+        batch_seconds, predictions = _best_time(
+            lambda: classifier.predict_advanced_batch(resumes, jobs, cross_product=True), repeats
+        )
+        results[name] = {
+            'predictions': predictions,
+            'transform_seconds': transform_seconds,
+            'batch_seconds': batch_seconds,
+            'dense_fallback': np.asarray(classifier._create_text_features(resumes[0], jobs[0]))[0],
+        }
+
+    original_proba = np.array([[r['probabilities'][t] for t in original['target_names']]
+                               for r in results['original']['predictions']])
+    pruned_proba = np.array([[r['probabilities'][t] for t in original['target_names']]
+                             for r in results['pruned']['predictions']])
+    dense_model_proba = (
+        original['model'].predict_proba(results['original']['dense_fallback'][None, :]),
+        pruned['model'].predict_proba(results['pruned']['dense_fallback'][None, :]),
+    )
+    return {
+        'pairs': len(original_proba),
+        'identical': bool(np.array_equal(original_proba, pruned_proba)
+                          and np.array_equal(*dense_model_proba)
+                          and all(a['prediction'] == b['prediction'] for a, b in
+                                  zip(results['original']['predictions'], results['pruned']['predictions']))),
+        'max_abs_diff': float(np.abs(original_proba - pruned_proba).max()),
+        'transform_seconds': [results['original']['transform_seconds'], results['pruned']['transform_seconds']],
+        'batch_seconds': [results['original']['batch_seconds'], results['pruned']['batch_seconds']],
+    }
+
+def _synthetic_documents(vectorizer, n_docs, n_words, seed):
+    """Documents drawn from the vectorizer's own unigram vocabulary, so TF-IDF rows are not empty"""
+    rng = np.random.default_rng(seed)
+    words = sorted(term for term in vectorizer.vocabulary_ if ' ' not in term)
+    return [' '.join(rng.choice(words, n_words)) for _ in range(n_docs)]
+
+def main():
+    parser = argparse.ArgumentParser(description='Prune the TF-IDF vocabulary output to the features the model uses')
+    parser.add_argument('--pickle', type=Path, default=None, help='Pipeline pickle (default: latest full pipeline)')
+    parser.add_argument('--out', type=Path, default=None, help='Output pickle path')
+    parser.add_argument('--resumes', type=int, default=100)
+    parser.add_argument('--jobs', type=int, default=5)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    import joblib
+    pickle_path = args.pickle or max(
+        (path for path in MODELS_DIR.glob('ml_pipeline_xgboost_*.pkl') if 'pruned' not in path.name),
+        key=os.path.getctime
+    )
+    original = joblib.load(pickle_path)
+    pruned, report = prune_pipeline(original)
+
+    resumes = _synthetic_documents(original['vectorizers']['resume_text'], args.resumes, 400, seed=0)
+    jobs = _synthetic_documents(original['vectorizers']['job_description_text'], args.jobs, 250, seed=1)
+    check = compare_pipelines(original, pruned, resumes, jobs)
+    if not check['identical']:
+        print(f"❌ Pruned pipeline differs from the original (max diff {check['max_abs_diff']:.3g}); not written")
+        sys.exit(1)
+
+    out_path = args.out or pickle_path.with_name(pickle_path.name.replace('ml_pipeline_xgboost_', 'ml_pipeline_xgboost_pruned_'))
+    joblib.dump(pruned, out_path)
+
+    before, after = report['model_input_width']
+    print(f"Model input width: {before} -> {after} features")
+    for col_name, (full, kept) in report['vectorizer_output_width'].items():
+        print(f"  {col_name}: {full} -> {kept} TF-IDF columns emitted (full vocabulary kept for L2 norm)")
+    print(f"Vocabulary memory (pickled vectorizers): {_size(original['vectorizers']) / 1024:.0f} KB -> "
+          f"{_size(pruned['vectorizers']) / 1024:.0f} KB")
+    print(f"Feature column names (pickled): {_size(original['feature_columns']) / 1024:.0f} KB -> "
+          f"{_size(pruned['feature_columns']) / 1024:.0f} KB")
+    print(f"Resume transform ({args.resumes} docs, best of 3): {check['transform_seconds'][0] * 1000:.1f} ms -> "
+          f"{check['transform_seconds'][1] * 1000:.1f} ms")
+    print(f"Batch prediction ({check['pairs']} pairs, best of 3): {check['batch_seconds'][0] * 1000:.1f} ms -> "
+          f"{check['batch_seconds'][1] * 1000:.1f} ms")
+    print(f"✅ Predictions identical on {check['pairs']} pairs and the dense path; wrote {out_path}")
+
+if __name__ == '__main__':
+    # Run from the importable module so pickled vectorizers reference vocab_pruning, not __main__
+    sys.path.insert(0, str(Path(__file__).parent))
+    import vocab_pruning
+    vocab_pruning.main()